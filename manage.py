@@ -1,58 +1,169 @@
 #!/usr/bin/env python3
 import typer
-import subprocess
 
+# Commands run in-process and import their modules lazily, so `--help` and
+# startup never pay for torch / LangChain / FAISS (see scripts/check_import_time.py).
 app = typer.Typer(help="Magento AI Assistant - Command Line Tool")
 
+@app.callback()
+def main(ctx: typer.Context, profile: bool = typer.Option(
+        False, "--profile", help="Write cProfile / tracemalloc artifacts to data/profiles for this command")):
+    if profile:
+        from src.core.profiling import Profiler, enable_profiling
+        # Decorated stages on worker threads (pipeline) profile themselves; the command's own thread is covered here
+        enable_profiling()
+        profiler = Profiler(ctx.invoked_subcommand or "manage").start()
+        ctx.call_on_close(profiler.stop)
+
 @app.command()
 def magento_pull():
     """Fetch all Magento products (full pull)."""
-    subprocess.run(["python", "-m", "src.ingestion.magento_full_pull"])
+    from src.ingestion.magento_full_pull import pull_all
+    pull_all()
 
 @app.command()
 def magento_test():
     """Test Magento API connection and print sample products."""
-    subprocess.run(["python", "-m", "src.ingestion.magento_test"])
+    from src.ingestion.magento_test import fetch_products
+    fetch_products()
 
 @app.command()
 def pdf_extract():
     """Extract sample text from PDF manual."""
-    subprocess.run(["python", "-m", "src.ingestion.PDF.pdf_reader"])
+    from src.ingestion.PDF import pdf_reader
+    pdf_reader.process_all_pdfs(
+        pdf_reader.PDF_FOLDER,
+        pdf_reader.RAW_OUTPUT_FOLDER,
+        pdf_reader.STRUCTURED_OUTPUT_EN_FILE,
+        pdf_reader.STRUCTURED_OUTPUT_FR_FILE,
+        pdf_reader.STRUCTURED_OUTPUT_DE_FILE,
+    )
 
 @app.command()
 def runserver(port: int = 8000):
     """Run FastAPI app."""
-    subprocess.run(["uvicorn", "src.main:app", "--reload", "--port", str(port)])
+    import uvicorn
+    uvicorn.run("src.main:app", reload=True, port=port)
 
 @app.command()
-def sync():
-    """Run product sync script."""
-    subprocess.run(["python", "-m", "src.ingestion.magento_sync"])
+def sync(page_size: int = 100):
+    """Run product sync script (delta sync)."""
+    from src.ingestion.sync_manager import delta_sync
+    delta_sync(page_size=page_size)
 
 @app.command()
 def data_preprocess():
     """Clean and standardize Magento + PDF product data."""
-    subprocess.run(["python", "-m", "src.ingestion.preprocessor"])
+    from src.ingestion.preprocessor import preprocess_all
+    preprocess_all()
 
 @app.command()
 def data_save():
     """Save cleaned data to JSON and CSV formats."""
-    subprocess.run(["python", "-m", "src.ingestion.save_processor"])
+    from src.ingestion.save_processor import main
+    main()
 
-# sync_parser = subparsers.add_parser('sync-delta', help='Run delta sync for updated products')
-# sync_parser.add_argument('--page-size', type=int, default=100, help='API page size')
-# sync_parser.set_defaults(func=cmd_sync_delta)
 @app.command()
 def sync_delta(page_size: int = 100):
     """Run delta sync for updated products."""
-    subprocess.run(["python", "-m", "src.ingestion.sync_manager", "--page-size", str(page_size)])
+    from src.ingestion.sync_manager import delta_sync
+    delta_sync(page_size=page_size)
 
 @app.command("embed-products")
-def embed_products():
-    """Generate embeddings for all processed products."""
+def embed_products(batch_size: int = 64, workers: int = 0, chunk_size: int = 10000):
+    """Generate embeddings for all processed products (resumable, optional multi-process)."""
     from src.embeddings.embedder import ProductEmbedder
     embedder = ProductEmbedder()
-    embedder.generate_embeddings()
+    embedder.generate_embeddings(batch_size=batch_size, num_workers=workers, chunk_size=chunk_size)
+
+@app.command("build-passages")
+def build_passages(lang: str = "all"):
+    """Build datasheet passage index shards (one document per section / variant row); --lang en|fr|de|all."""
+    from src.embeddings.passage_index import DEFAULT_MODELS, PassageIndexBuilder
+    for shard in (DEFAULT_MODELS if lang == "all" else [lang]):
+        PassageIndexBuilder(shard).build_and_save()
+
+@app.command("cache-compact")
+def cache_compact(model: str = "sentence-transformers/all-MiniLM-L6-v2", variant: str = "torch"):
+    """Evict embedding-cache entries no longer referenced by any index bundle (variant: torch or onnx-int8)."""
+    from src.embeddings.embedding_cache import EmbeddingCache
+    EmbeddingCache(model, variant).compact()
+
+@app.command("bench")
+def bench(
+    configs: str = "semantic,semantic_collapsed,bm25,dense,hybrid",
+    k: int = 10,
+    queries: str = "data/eval/bench_queries.jsonl",
+    backend: str = None,
+    baseline: str = None,
+    max_recall_drop: float = 0.02,
+):
+    """Benchmark retrieval quality (recall@k, MRR, nDCG) and latency (p50/p95/p99, QPS) per configuration."""
+    from pathlib import Path
+    from src.search.benchmark import run_benchmark
+    run_benchmark(configs.split(","), Path(queries), k=k, backend=backend, baseline=baseline,
+                  max_recall_drop=max_recall_drop)
+
+@app.command("fake-magento")
+def fake_magento(
+    port: int = 8081,
+    products: int = 1000,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_401: float = 0.0,
+    error_429: float = 0.0,
+    error_5xx: float = 0.0,
+    seed: int = 0,
+):
+    """Serve a synthetic Magento REST API locally (set MAGENTO_BASE_URL=http://127.0.0.1:<port>)."""
+    import uvicorn
+    from src.utils.fake_magento import FakeCatalog, create_fake_magento
+    app_ = create_fake_magento(FakeCatalog(products, seed=seed), latency_ms=latency_ms, jitter_ms=jitter_ms,
+                               error_401=error_401, error_429=error_429, error_5xx=error_5xx, seed=seed)
+    uvicorn.run(app_, host="127.0.0.1", port=port, log_level="warning")
+
+@app.command("bench-ingest")
+def bench_ingest(
+    products: int = 2000,
+    page_size: int = 100,
+    touch: int = 100,
+    latency_ms: float = 5.0,
+    error_401: float = 0.0,
+    error_429: float = 0.0,
+    error_5xx: float = 0.0,
+):
+    """Benchmark full-pull and delta-sync throughput against the local fake Magento."""
+    from src.ingestion.benchmark import run_ingest_benchmark
+    run_ingest_benchmark(products=products, page_size=page_size, touch=touch, latency_ms=latency_ms,
+                         error_401=error_401, error_429=error_429, error_5xx=error_5xx)
+
+@app.command("fit-guard")
+def fit_guard():
+    """Fit the RAG relevance-guard thresholds on the labelled guard set (no LLM calls)."""
+    from src.rag.eval import fit_guard_thresholds
+    fit_guard_thresholds()
+
+@app.command("pipeline")
+def pipeline(
+    only: str = None,
+    force: str = None,
+    workers: int = 2,
+    plan: bool = False,
+):
+    """Run the catalog refresh DAG, skipping stages whose inputs are unchanged (--only / --force take stage lists)."""
+    from src.ingestion.stages import build_pipeline
+    dag = build_pipeline()
+    targets = only.split(",") if only else None
+    if plan:
+        for name, status in dag.plan(targets).items():
+            print(f"{'✅' if status == 'fresh' else '🔄'} {name}: {status}")
+        return
+    record = dag.run(targets, force=True if force == "all" else (force.split(",") if force else ()),
+                     max_workers=workers)
+    failed = [name for name, r in record["stages"].items() if r["status"] in ("failed", "blocked")]
+    print(f"🏁 Pipeline finished in {record['seconds']:.1f}s" + (f" — failed: {', '.join(failed)}" if failed else ""))
+    if failed:
+        raise typer.Exit(code=1)
 
 if __name__ == "__main__":
     app()
@@ -0,0 +1,79 @@
+"""
+Import-time gate for the CLI and API entry points.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+fails when the cumulative import time exceeds its budget, or when a heavy
+dependency (torch, sentence-transformers, LangChain, ...) gets imported at
+module level. Those belong inside the function that needs them, so that
+`manage.py --help` and the /health route start in milliseconds.
+
+    python scripts/check_import_time.py            # check all entry points
+    python scripts/check_import_time.py --top 15   # also print the slowest imports
+"""
+
+import argparse
+import subprocess
+import sys
+
+# Cumulative import time budget per entry point, in milliseconds.
+# src.main is dominated by fastapi itself (~300 ms).
+BUDGETS_MS = {
+    "manage": 150,
+    "src.main": 600,
+    "src.rag.rag_chain": 50,
+    "src.ingestion.sync_manager": 800,
+}
+
+FORBIDDEN = ("torch", "sentence_transformers", "transformers", "langchain_community", "langchain_core",
+             "langchain_openai", "langchain_classic")
+
+
+def import_times(module, runs=3):
+    """{imported module: cumulative µs} for `import module`, best of `runs` fresh interpreters."""
+    best = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise SystemExit(f"❌ import {module} failed:\n{result.stderr[-2000:]}")
+
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            # "import time:  self [us] | cumulative | imported package" (nesting shown by indentation)
+            _, cumulative, name = line[len("import time:"):].split("|")
+            name, micros = name.strip(), int(cumulative)
+            best[name] = min(best.get(name, micros), micros)
+    return best
+
+
+def check(module, budget_ms, top=0):
+    times = import_times(module)
+    total_ms = times.get(module, 0) / 1000
+    heavy = sorted(name for name in times if name in FORBIDDEN)
+
+    ok = total_ms <= budget_ms and not heavy
+    print(f"{'✅' if ok else '❌'} {module}: {total_ms:.0f} ms (budget {budget_ms} ms)")
+    if heavy:
+        print(f"   heavy imports at module level: {', '.join(heavy)}")
+    if top:
+        for name, micros in sorted(times.items(), key=lambda kv: kv[1], reverse=True)[1:top + 1]:
+            print(f"   {micros / 1000:8.1f} ms  {name}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when entry-point import time regresses")
+    parser.add_argument("modules", nargs="*", help="Entry points to check (default: all budgets)")
+    parser.add_argument("--top", type=int, default=0, help="Print the N slowest imports per entry point")
+    args = parser.parse_args()
+
+    modules = args.modules or list(BUDGETS_MS)
+    results = [check(module, BUDGETS_MS.get(module, 1000), top=args.top) for module in modules]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
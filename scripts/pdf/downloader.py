@@ -0,0 +1,152 @@
+"""
+Concurrent PDF downloader with conditional GETs and a content-hash manifest.
+
+Shared by pdf_downloads.py (datasheets) and installation_guides_downloads.py.
+A bounded pool of workers, each with its own keep-alive Session, fetches the
+unique URLs. When a file is already on disk, the request carries the ETag /
+Last-Modified from the manifest, so unchanged files cost one 304. Downloads
+go to a .part file and are renamed into place, so an interrupted run never
+leaves a truncated PDF.
+
+manifest.json (next to the PDFs) records per file: url, etag,
+last_modified, xxh3 content hash, size / mtime and the SKUs using it.
+pdf_reader seeds its hash cache from it, so a PDF whose hash did not change
+is not re-extracted either.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import requests
+import xxhash
+from requests.adapters import HTTPAdapter
+
+MANIFEST_NAME = "manifest.json"
+CHUNK_SIZE = 1 << 16
+
+
+def load_jobs(csv_path, code_column, url_for, filename_for, skip_codes=()):
+    """[(url, filename, [skus])] — one job per unique URL, SKUs grouped in a single pass."""
+    df = pd.read_csv(csv_path, dtype=str)
+    df[code_column] = df[code_column].fillna("").str.strip()
+    skipped = df[df[code_column].isin(["", "<NULL>", "nan"]) | df[code_column].str.upper().isin(skip_codes)]
+    if len(skipped):
+        print(f"Skipping {len(skipped)} SKUs without a {code_column}")
+    df = df.drop(skipped.index)
+
+    jobs = {}
+    for sku, code in zip(df["sku"], df[code_column]):
+        url = url_for(code)
+        jobs.setdefault(url, (url, filename_for(code), []))[2].append(sku)
+    return list(jobs.values())
+
+
+class PdfDownloader:
+    def __init__(self, dest_dir, workers=8, timeout=60):
+        self.dest_dir = Path(dest_dir)
+        self.manifest_path = self.dest_dir / MANIFEST_NAME
+        self.workers = workers
+        self.timeout = timeout
+        self._local = threading.local()
+        self.manifest = self.load_manifest()
+
+    def load_manifest(self):
+        if not self.manifest_path.exists():
+            return {}
+        with open(self.manifest_path, "r") as f:
+            return json.load(f)
+
+    def save_manifest(self):
+        tmp = self.manifest_path.with_name(MANIFEST_NAME + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            self._local.session = session
+        return session
+
+    def fetch(self, url, filename, skus):
+        """Download one file; returns (filename, status, manifest entry or None)."""
+        path = self.dest_dir / filename
+        previous = self.manifest.get(filename)
+
+        headers = {}
+        if previous and path.exists():
+            if previous.get("etag"):
+                headers["If-None-Match"] = previous["etag"]
+            if previous.get("last_modified"):
+                headers["If-Modified-Since"] = previous["last_modified"]
+
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 304:
+                return filename, "unchanged", {**previous, "skus": skus}
+            if response.status_code == 404:
+                return filename, "missing", None
+            response.raise_for_status()
+
+            tmp = path.with_name(filename + ".part")
+            digest = xxhash.xxh3_128()
+            with open(tmp, "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+            content_hash = digest.hexdigest()
+
+            if previous and path.exists() and previous.get("hash") == content_hash:
+                # Server ignored the validators but the bytes are the same: keep the file (and its mtime)
+                os.remove(tmp)
+                status = "unchanged"
+            else:
+                os.replace(tmp, path)
+                status = "updated" if previous else "new"
+
+            stat = path.stat()
+            return filename, status, {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "hash": content_hash,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "skus": skus,
+                "fetched_at": datetime.utcnow().isoformat(),
+            }
+
+    def run(self, jobs):
+        self.dest_dir.mkdir(parents=True, exist_ok=True)
+        counts = {"new": 0, "updated": 0, "unchanged": 0, "missing": 0, "failed": 0}
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pdf-download") as executor:
+            futures = {executor.submit(self.fetch, *job): job for job in jobs}
+            for future in as_completed(futures):
+                url, filename, skus = futures[future]
+                try:
+                    filename, status, entry = future.result()
+                except Exception as e:
+                    counts["failed"] += 1
+                    print(f"Failed to download {url}: {e}")
+                    continue
+
+                counts[status] += 1
+                if entry:
+                    self.manifest[filename] = entry
+                if status in ("new", "updated"):
+                    print(f"Successfully downloaded: {filename} (URL: {url})")
+                    print(f"   Associated SKUs: {', '.join(skus)}")
+                elif status == "missing":
+                    print(f"File not found (404): {url} — Skipping (may not exist for this series)")
+
+        self.save_manifest()
+        print(f"Download process completed: {counts}")
+        return counts
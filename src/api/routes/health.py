@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Response
+
+from src.core.metrics import render_metrics
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@router.get("/metrics")
+def metrics():
+    """Prometheus scrape endpoint."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
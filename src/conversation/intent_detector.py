@@ -0,0 +1,96 @@
+"""
+Local intent detection that runs before retrieval and generation.
+
+Intents: product_search, sku_lookup, spec_question, support, off_topic.
+
+SKU-shaped queries are recognised by pattern. Everything else is classified
+by nearest centroid: a handful of example queries per intent are embedded
+once at startup, and a query is assigned to the centroid with the highest
+cosine similarity. With the query vector already computed (it is shared with
+retrieval), classification is five dot products — well under a millisecond.
+"""
+
+import numpy as np
+
+from src.search.sku_index import looks_like_sku
+
+INTENT_EXAMPLES = {
+    "product_search": [
+        "kitchen drawer slides",
+        "heavy duty slides for a tool chest",
+        "large pocket door system",
+        "soft close drawer runners",
+        "stainless steel slides for outdoor use",
+        "locking slides for an equipment rack",
+        "slides for a 500 mm deep cabinet",
+        "push to open drawer slide",
+    ],
+    "spec_question": [
+        "what is the load rating of this slide",
+        "how long is the travel on the 3832",
+        "what is the slide thickness",
+        "is it corrosion resistant",
+        "what material are the balls made of",
+        "what is the temperature range",
+        "which screws do I need for mounting",
+        "can it be mounted flat",
+    ],
+    "support": [
+        "does this include warranty",
+        "where is my order",
+        "how do I return a product",
+        "what are the shipping costs",
+        "can I get a quote",
+        "how do I contact customer service",
+        "do you ship to Canada",
+        "I need an invoice for my purchase",
+    ],
+    "off_topic": [
+        "how to cook pasta",
+        "what is the weather tomorrow",
+        "tell me a joke",
+        "who won the football game",
+        "write me a poem",
+        "what is the capital of France",
+        "recommend a good movie",
+        "how do I lose weight",
+    ],
+}
+
+INTENTS = ["sku_lookup", *INTENT_EXAMPLES]
+
+
+class IntentDetector:
+    def __init__(self, embed_documents, embed_query, min_margin=0.05):
+        """
+        `embed_documents` / `embed_query` follow the LangChain Embeddings interface.
+        off_topic / support win only by at least `min_margin` over the best product
+        intent; close calls fall back to product_search so real questions reach retrieval.
+        """
+        self.embed_query = embed_query
+        self.min_margin = min_margin
+        self.labels = list(INTENT_EXAMPLES)
+
+        centroids = []
+        for label in self.labels:
+            vectors = np.asarray(embed_documents(INTENT_EXAMPLES[label]), dtype="float32")
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            centroid = vectors.mean(axis=0)
+            centroids.append(centroid / np.linalg.norm(centroid))
+        self.centroids = np.stack(centroids)
+
+    def scores(self, query_vector):
+        q = np.asarray(query_vector, dtype="float32")
+        return self.centroids @ (q / np.linalg.norm(q))
+
+    def detect(self, query: str, query_vector=None) -> str:
+        if looks_like_sku(query):
+            return "sku_lookup"
+
+        scores = self.scores(self.embed_query(query) if query_vector is None else query_vector)
+        best = self.labels[int(np.argmax(scores))]
+        if best in ("off_topic", "support"):
+            product_best = max(scores[self.labels.index("product_search")], scores[self.labels.index("spec_question")])
+            if scores[self.labels.index(best)] - product_best < self.min_margin:
+                return "product_search"
+        return best
@@ -0,0 +1,216 @@
+"""
+Server-side conversation memory with a bounded prompt footprint.
+
+Each session keeps:
+- the most recent turns, up to `max_history_tokens`
+- a running summary of older turns, capped at `max_summary_tokens`
+- the SKUs of the last retrieved products, for follow-ups like "does that one
+  come in stainless?"
+
+When the window overflows, only the evicted turns and the previous summary
+are summarized (incremental), so the history part of the prompt stays the
+same size however long the conversation runs. With background=True the
+request only pays for an extractive summary; the (LLM) summarizer runs on a
+worker thread and replaces it when done, unless the session has moved on.
+Sessions live in Redis when REDIS_URL is set, otherwise in process memory;
+both expire after a TTL.
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.logger import logger
+
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "1800"))
+MAX_HISTORY_TOKENS = 600
+MAX_SUMMARY_TOKENS = 150
+MAX_LAST_SKUS = 5
+
+# Words that make a question depend on the previous answer
+FOLLOWUP_PATTERN = re.compile(r"\b(it|its|that|this|those|these|they|them|one|ones|same)\b", re.IGNORECASE)
+
+SUMMARY_PROMPT = (
+    "Update the running summary of a customer conversation about Accuride products. "
+    "Keep product SKUs, requirements (load, length, material, finish) and open questions. "
+    "Answer with the new summary only, at most {max_words} words.\n\n"
+    "Current summary:\n{summary}\n\nNew turns:\n{turns}"
+)
+
+
+def count_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) — only used for budgeting."""
+    return len(text or "") // 4 + 1
+
+
+def new_session() -> dict:
+    return {"summary": "", "turns": [], "last_skus": []}
+
+
+class InMemorySessionStore:
+    """Process-local session store with per-session TTL (single worker / development)."""
+
+    def __init__(self, ttl=SESSION_TTL_SECONDS):
+        self.ttl = ttl
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            expires_at, session = entry
+            if expires_at < time.monotonic():
+                del self._sessions[session_id]
+                return None
+            return session
+
+    def set(self, session_id, session):
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic() + self.ttl, session)
+            if len(self._sessions) % 256 == 0:
+                self._purge_expired()
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in self._sessions.items() if expires_at < now]:
+            del self._sessions[key]
+
+
+class RedisSessionStore:
+    """Sessions as JSON strings in Redis, refreshed TTL on every write."""
+
+    def __init__(self, url, ttl=SESSION_TTL_SECONDS, prefix="session:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, session_id):
+        raw = self.client.get(self.prefix + session_id)
+        return json.loads(raw) if raw else None
+
+    def set(self, session_id, session):
+        self.client.setex(self.prefix + session_id, self.ttl, json.dumps(session))
+
+    def delete(self, session_id):
+        self.client.delete(self.prefix + session_id)
+
+
+def build_session_store(ttl=SESSION_TTL_SECONDS):
+    url = os.getenv("REDIS_URL")
+    if url:
+        return RedisSessionStore(url, ttl=ttl)
+    return InMemorySessionStore(ttl=ttl)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else text[-max_chars:]
+
+
+def extractive_summarizer(summary: str, turns, max_tokens: int = MAX_SUMMARY_TOKENS) -> str:
+    """LLM-free fallback: keep the customer's questions, newest last."""
+    questions = [t["content"] for t in turns if t["role"] == "human"]
+    return truncate_tokens(" | ".join([s for s in [summary, *questions] if s]), max_tokens)
+
+
+def llm_summarizer(llm):
+    """Summarizer that folds evicted turns into the previous summary with one small LLM call."""
+
+    def summarize(summary, turns, max_tokens=MAX_SUMMARY_TOKENS):
+        prompt = SUMMARY_PROMPT.format(
+            max_words=int(max_tokens * 0.75),
+            summary=summary or "(none)",
+            turns="\n".join(f"{t['role']}: {t['content']}" for t in turns),
+        )
+        try:
+            return truncate_tokens(llm.invoke(prompt).content.strip(), max_tokens)
+        except Exception as e:
+            logger.warning("⚠️ Summary update failed, keeping extractive summary: {}", e)
+            return extractive_summarizer(summary, turns, max_tokens)
+
+    return summarize
+
+
+class MemoryManager:
+    def __init__(self, store=None, summarizer=None, max_history_tokens=MAX_HISTORY_TOKENS,
+                 max_summary_tokens=MAX_SUMMARY_TOKENS, background=False):
+        self.store = store or build_session_store()
+        self.summarizer = summarizer or extractive_summarizer
+        self.max_history_tokens = max_history_tokens
+        self.max_summary_tokens = max_summary_tokens
+        self._summaries = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summaries") if background else None
+
+    def load(self, session_id):
+        if not session_id:
+            return new_session()
+        return self.store.get(session_id) or new_session()
+
+    def reset(self, session_id):
+        self.store.delete(session_id)
+
+    def history_messages(self, session):
+        """(role, content) messages for the prompt's history placeholder."""
+        messages = []
+        if session["summary"]:
+            messages.append(("system", f"Conversation so far: {session['summary']}"))
+        if session["last_skus"]:
+            messages.append(("system", f"Products discussed last: {', '.join(session['last_skus'])}"))
+        messages.extend((t["role"], t["content"]) for t in session["turns"])
+        return messages
+
+    def retrieval_query(self, query, session):
+        """Attach the last SKUs to follow-up questions so retrieval knows what "that one" is."""
+        if session["last_skus"] and FOLLOWUP_PATTERN.search(query):
+            return f"{query} {' '.join(session['last_skus'][:2])}"
+        return query
+
+    def update(self, session_id, query, answer, skus=None):
+        """Append a turn, summarize whatever falls out of the window, and persist."""
+        if not session_id:
+            return
+        session = self.load(session_id)
+        # A single long answer may not take over the whole window
+        max_chars = self.max_history_tokens * 2
+        session["turns"].extend([
+            {"role": "human", "content": query[:max_chars]},
+            {"role": "ai", "content": answer[:max_chars]},
+        ])
+        if skus:
+            session["last_skus"] = list(dict.fromkeys(s for s in skus if s))[:MAX_LAST_SKUS]
+
+        evicted = []
+        while len(session["turns"]) > 2 and self._turn_tokens(session) > self.max_history_tokens:
+            evicted.extend(session["turns"][:2])
+            del session["turns"][:2]
+        if evicted and self._summaries is None:
+            session["summary"] = self.summarizer(session["summary"], evicted, self.max_summary_tokens)
+        elif evicted:
+            previous = session["summary"]
+            session["summary"] = extractive_summarizer(previous, evicted, self.max_summary_tokens)
+            self._summaries.submit(self._replace_summary, session_id, previous, evicted, session["summary"])
+
+        self.store.set(session_id, session)
+
+    def _replace_summary(self, session_id, previous, evicted, placeholder):
+        """Background half of update(): swap the extractive placeholder for the summarizer's output."""
+        summary = self.summarizer(previous, evicted, self.max_summary_tokens)
+        session = self.store.get(session_id)
+        # A later eviction already folded the placeholder into a newer summary
+        if session is not None and session["summary"] == placeholder:
+            session["summary"] = summary
+            self.store.set(session_id, session)
+
+    @staticmethod
+    def _turn_tokens(session):
+        return sum(count_tokens(t["content"]) for t in session["turns"])
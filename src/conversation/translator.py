@@ -0,0 +1,87 @@
+"""
+Query language detection and fallback translation.
+
+detect_language() is a local stopword/diacritic scorer for the languages our
+datasheets ship in (EN/FR/DE). It runs in microseconds and never leaves the
+process, so every query can be routed to the matching language index.
+translate() calls DeepL and is only meant as a fallback when no index exists
+for the detected language.
+"""
+
+import os
+import re
+import requests
+
+from src.core.logger import logger
+
+SUPPORTED_LANGUAGES = ("en", "fr", "de")
+DEFAULT_LANGUAGE = "en"
+
+DEEPL_API_URL = os.getenv("DEEPL_API_URL", "https://api-free.deepl.com/v2/translate")
+
+STOPWORDS = {
+    "en": {
+        "the", "and", "with", "for", "of", "to", "is", "are", "do", "does", "you", "have", "what",
+        "which", "how", "this", "that", "can", "in", "on", "a", "an", "it", "my", "slide", "slides",
+        "drawer", "load", "rating", "length", "steel", "extension", "stainless", "heavy", "duty",
+    },
+    "fr": {
+        "le", "la", "les", "des", "du", "de", "et", "avec", "pour", "est", "sont", "une", "un",
+        "quel", "quelle", "quels", "comment", "ce", "cette", "pouvez", "vous", "avez", "dans", "sur",
+        "glissière", "glissières", "tiroir", "charge", "longueur", "acier", "inoxydable", "course",
+    },
+    "de": {
+        "der", "die", "das", "und", "mit", "für", "von", "zu", "ist", "sind", "ein", "eine", "einen",
+        "welche", "welcher", "wie", "haben", "sie", "gibt", "es", "im", "auf", "nicht", "schiene",
+        "schienen", "auszug", "schublade", "last", "lastwert", "länge", "stahl", "edelstahl",
+    },
+}
+
+DIACRITICS = {
+    "fr": re.compile(r"[éèêàâçùûœîï]"),
+    "de": re.compile(r"[äöüß]"),
+}
+
+WORD_PATTERN = re.compile(r"[a-zà-öø-ÿœ]+")
+
+
+def detect_language(text: str, default: str = DEFAULT_LANGUAGE) -> str:
+    """Return "en", "fr" or "de" for a query; `default` when there is no signal."""
+    tokens = WORD_PATTERN.findall((text or "").lower())
+    if not tokens:
+        return default
+
+    scores = {lang: sum(token in words for token in tokens) for lang, words in STOPWORDS.items()}
+    for lang, pattern in DIACRITICS.items():
+        scores[lang] += 0.5 * len(pattern.findall(text.lower()))
+
+    top = max(scores.values())
+    if top == 0 or scores.get(default) == top:
+        return default
+    return max(scores, key=scores.get)
+
+
+def translate(text: str, target: str = DEFAULT_LANGUAGE, source: str = None, timeout: float = 5.0) -> str:
+    """
+    Translate with DeepL when DEEPL_API_KEY is set; otherwise return text unchanged.
+    Network errors also fall back to the original text.
+    """
+    api_key = os.getenv("DEEPL_API_KEY")
+    if not api_key or source == target:
+        return text
+
+    data = {"text": text, "target_lang": target.upper()}
+    if source:
+        data["source_lang"] = source.upper()
+    try:
+        res = requests.post(
+            DEEPL_API_URL,
+            headers={"Authorization": f"DeepL-Auth-Key {api_key}"},
+            data=data,
+            timeout=timeout,
+        )
+        res.raise_for_status()
+        return res.json()["translations"][0]["text"]
+    except Exception as e:
+        logger.warning("⚠️ Translation failed, using original text: {}", e)
+        return text
@@ -0,0 +1,104 @@
+"""
+Structured logging on loguru.
+
+    from src.core.logger import logger, sampled
+
+    item_log = sampled(100)                               # module level, bind once
+
+    logger.info("Loaded {} products", n)                  # normal event
+    item_log.info("Processed SKU {}", sku)                # 1 in 100 per call site
+    logger.opt(lazy=True).debug("Dists {}", lambda: arr)  # argument built only if emitted
+
+Configuration (environment):
+- LOG_LEVEL          global level, default INFO
+- LOG_MODULE_LEVELS  per-module overrides, e.g. "src.ingestion=DEBUG,src.search=WARNING"
+- LOG_JSON           "1" for one JSON object per line instead of text
+
+The sink is queue-backed (enqueue=True): callers only put the record on a
+queue and a background thread does the write, so logging from worker
+threads never serializes on stdout. loguru drops a call before building the
+record when its level is below every configured level, so debug calls cost
+nothing unless some module enables DEBUG.
+"""
+
+import os
+import sys
+from collections import defaultdict
+
+from loguru import logger
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_MODULE_LEVELS = os.getenv("LOG_MODULE_LEVELS", "")
+LOG_JSON = os.getenv("LOG_JSON", "0") == "1"
+
+TEXT_FORMAT = "<green>{time:HH:mm:ss.SSS}</green> | <level>{level: <7}</level> | <cyan>{name}</cyan> | {message}"
+
+
+def parse_module_levels(spec: str) -> dict:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        module, _, level = item.partition("=")
+        levels[module.strip()] = logger.level(level.strip().upper()).no
+    return levels
+
+
+class ModuleFilter:
+    """Per-module minimum level (longest prefix wins) plus per-call-site sampling."""
+
+    def __init__(self, default_level, module_levels):
+        self.default_no = logger.level(default_level).no
+        self.module_levels = module_levels
+        self._resolved = {}
+        self._counts = defaultdict(int)
+
+    def level_for(self, name):
+        no = self._resolved.get(name)
+        if no is None:
+            matches = [m for m in self.module_levels if name == m or name.startswith(m + ".")]
+            no = self.module_levels[max(matches, key=len)] if matches else self.default_no
+            self._resolved[name] = no
+        return no
+
+    def __call__(self, record):
+        if record["level"].no < self.level_for(record["name"]):
+            return False
+        every = record["extra"].get("sample")
+        if every:
+            site = (record["name"], record["line"])
+            self._counts[site] += 1
+            return self._counts[site] % every == 1 or every == 1
+        return True
+
+
+_configured = False
+
+
+def setup_logging(level=LOG_LEVEL, module_levels=LOG_MODULE_LEVELS, json_logs=LOG_JSON, sink=sys.stderr):
+    """(Re)configure the single queue-backed sink. Called on import with environment defaults."""
+    global _configured
+    levels = parse_module_levels(module_levels) if isinstance(module_levels, str) else dict(module_levels)
+    log_filter = ModuleFilter(level, levels)
+    # Handler level = lowest level anyone asked for, so everything below is rejected up front
+    min_no = min([log_filter.default_no, *levels.values()])
+
+    logger.remove()
+    logger.add(
+        sink,
+        level=min_no,
+        filter=log_filter,
+        format=TEXT_FORMAT,
+        serialize=json_logs,
+        enqueue=True,
+        backtrace=False,
+        diagnose=False,
+    )
+    _configured = True
+
+
+def sampled(every: int):
+    """Logger that emits 1 in `every` records per call site (for per-item events in loops)."""
+    return logger.bind(sample=every)
+
+
+if not _configured:
+    setup_logging()
@@ -0,0 +1,54 @@
+"""
+Prometheus metrics for the retrieval / RAG hot paths, exposed on /metrics.
+
+Histogram children are bound once at import (no label lookup per request)
+and used via `.time()` as a decorator or context manager, so instrumenting
+a stage costs a few microseconds. Every request is broken down into
+encode, ANN / BM25 search, rerank, LLM time-to-first-token and total time,
+so a slow chat can be attributed to retrieval or to the LLM. The LLM
+timings are fed by src/rag/callbacks.py, kept out of this module so the
+/metrics route does not import LangChain.
+"""
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+# Sub-millisecond to multi-second: covers a SKU lookup as well as a cold LLM call
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+REQUEST_SECONDS = Histogram(
+    "assistant_request_seconds", "End-to-end time per operation", ["operation"], buckets=LATENCY_BUCKETS
+)
+ENCODE_SECONDS = Histogram(
+    "assistant_encode_seconds", "Query embedding time", ["component"], buckets=LATENCY_BUCKETS
+)
+SEARCH_SECONDS = Histogram(
+    "assistant_search_seconds", "Index search time (ANN / BM25)", ["index"], buckets=LATENCY_BUCKETS
+)
+RERANK_SECONDS = Histogram("assistant_rerank_seconds", "Cross-encoder rerank time", buckets=LATENCY_BUCKETS)
+LLM_TTFT_SECONDS = Histogram("assistant_llm_ttft_seconds", "LLM time to first token", buckets=LATENCY_BUCKETS)
+LLM_SECONDS = Histogram("assistant_llm_seconds", "LLM total generation time", buckets=LATENCY_BUCKETS)
+PROMPT_TOKENS = Histogram("assistant_prompt_tokens", "Prompt tokens per LLM call", buckets=TOKEN_BUCKETS)
+
+CACHE_EVENTS = Counter("assistant_cache_events_total", "Cache lookups", ["cache", "result"])
+RAG_OUTCOMES = Counter("assistant_rag_outcomes_total", "How ask() requests were answered", ["intent", "outcome"])
+RERANK_TIMEOUTS = Counter("assistant_rerank_timeouts_total", "Reranks that exceeded the time budget")
+RERANK_BUSY = Counter("assistant_rerank_busy_total", "Reranks skipped because every cross-encoder worker was busy")
+
+# Pre-bound children for the hot paths
+ASK_SECONDS = REQUEST_SECONDS.labels("rag_ask")
+RETRIEVER_SEARCH_SECONDS = REQUEST_SECONDS.labels("retriever_search")
+SEMANTIC_SEARCH_SECONDS = REQUEST_SECONDS.labels("semantic_search")
+RETRIEVER_ENCODE_SECONDS = ENCODE_SECONDS.labels("retriever")
+SEMANTIC_ENCODE_SECONDS = ENCODE_SECONDS.labels("semantic_search")
+PRODUCT_ANN_SECONDS = SEARCH_SECONDS.labels("product_faiss")
+BUNDLE_ANN_SECONDS = SEARCH_SECONDS.labels("langchain_faiss")
+BM25_SECONDS = SEARCH_SECONDS.labels("bm25")
+QUERY_CACHE_HITS = CACHE_EVENTS.labels("query_embedding", "hit")
+QUERY_CACHE_MISSES = CACHE_EVENTS.labels("query_embedding", "miss")
+EMBEDDING_CACHE_HITS = CACHE_EVENTS.labels("embedding_cache", "hit")
+EMBEDDING_CACHE_MISSES = CACHE_EVENTS.labels("embedding_cache", "miss")
+
+
+def render_metrics():
+    return generate_latest(), CONTENT_TYPE_LATEST
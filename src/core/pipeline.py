@@ -0,0 +1,313 @@
+"""
+Incremental pipeline runner: stages form a DAG through the files they read and write.
+
+    pipeline = Pipeline([
+        Stage("preprocess", preprocess_all, inputs=[RAW_FILE], outputs=[CLEAN_FILE]),
+        Stage("save", save_main, inputs=[CLEAN_FILE], outputs=[CATALOG_FILE]),
+    ])
+    pipeline.run()
+
+A stage depends on every stage that produces one of its inputs (plus any
+listed in `after`). Before running, a stage is fingerprinted from the
+content hashes of its inputs, its `params` and its `probe()` (for external
+sources such as the Magento API). It is skipped when that fingerprint
+matches the last successful run and its outputs are unchanged on disk.
+
+File hashes (xxh3-128) are cached by (size, mtime) in the state file, so
+checking an untouched tree reads no file contents. Ready stages run in
+parallel on a thread pool; stages sharing a `lock` never overlap (e.g. the
+embedding builders that all rewrite index_info.json). Every run appends
+per-stage status and timings to data/pipeline/runs.jsonl.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+import xxhash
+
+from src.core.logger import logger
+
+PIPELINE_DIR = Path("data/pipeline")
+STATE_FILE = PIPELINE_DIR / "state.json"
+RUN_LOG_FILE = PIPELINE_DIR / "runs.jsonl"
+
+HASH_CHUNK = 1 << 20
+
+
+class Stage:
+    def __init__(self, name, run, inputs=(), outputs=(), after=(), params=None, probe=None, lock=None):
+        self.name = name
+        self.run = run
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.after = list(after)
+        self.params = params or {}
+        self.probe = probe
+        self.lock = lock
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+class FileHasher:
+    """Content hashes with a (size, mtime_ns) cache so unchanged files are never re-read."""
+
+    def __init__(self, cache=None):
+        self.cache = cache or {}
+        self._lock = threading.Lock()
+
+    def file_digest(self, path: Path) -> str:
+        stat = path.stat()
+        key = str(path)
+        cached = self.cache.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        h = xxhash.xxh3_128()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self.cache[key] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def digest(self, path: Path) -> str:
+        """Digest of a file, of a directory tree (names + contents), or "missing"."""
+        if path.is_file():
+            return self.file_digest(path)
+        if path.is_dir():
+            h = xxhash.xxh3_128()
+            for child in sorted(p for p in path.rglob("*") if p.is_file()):
+                h.update(str(child.relative_to(path)).encode("utf-8"))
+                h.update(self.file_digest(child).encode("ascii"))
+            return h.hexdigest()
+        return "missing"
+
+
+class Pipeline:
+    def __init__(self, stages, state_file=STATE_FILE, run_log_file=RUN_LOG_FILE):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_file = Path(state_file)
+        self.run_log_file = Path(run_log_file)
+        self.deps = self._resolve_deps()
+
+    # -----------------------------
+    # Graph
+    # -----------------------------
+    def _resolve_deps(self):
+        producers = {}
+        for stage in self.stages.values():
+            for output in stage.outputs:
+                if output in producers:
+                    raise ValueError(f"❌ {output} is produced by both {producers[output]} and {stage.name}")
+                producers[output] = stage.name
+
+        deps = {}
+        for stage in self.stages.values():
+            upstream = {producers[p] for p in stage.inputs if p in producers} | set(stage.after)
+            unknown = upstream - set(self.stages)
+            if unknown:
+                raise ValueError(f"❌ Stage {stage.name} depends on unknown stages: {sorted(unknown)}")
+            deps[stage.name] = upstream - {stage.name}
+
+        self._check_acyclic(deps)
+        return deps
+
+    @staticmethod
+    def _check_acyclic(deps):
+        visiting, done = set(), set()
+
+        def visit(name, path):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"❌ Pipeline cycle: {' → '.join(path + [name])}")
+            visiting.add(name)
+            for dep in deps[name]:
+                visit(dep, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in deps:
+            visit(name, [])
+
+    def upstream_closure(self, targets):
+        """`targets` plus every stage they (transitively) depend on."""
+        selected, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.stages:
+                raise ValueError(f"❌ Unknown stage: {name}")
+            if name not in selected:
+                selected.add(name)
+                stack.extend(self.deps[name])
+        return selected
+
+    # -----------------------------
+    # State
+    # -----------------------------
+    def load_state(self):
+        if not self.state_file.exists():
+            return {"stages": {}, "files": {}}
+        with open(self.state_file, "r") as f:
+            return json.load(f)
+
+    def save_state(self, state):
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        # Running stages keep adding entries; dump a shallow copy (values are replaced, never mutated)
+        snapshot = {key: dict(value) if isinstance(value, dict) else value for key, value in state.items()}
+        tmp = self.state_file.with_name(self.state_file.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(snapshot, f, indent=2)
+        os.replace(tmp, self.state_file)
+
+    def fingerprint(self, stage, hasher):
+        h = xxhash.xxh3_128()
+        for path in stage.inputs:
+            h.update(f"{path}={hasher.digest(path)};".encode("utf-8"))
+        h.update(json.dumps(stage.params, sort_keys=True, default=str).encode("utf-8"))
+        if stage.probe is not None:
+            h.update(json.dumps(stage.probe(), sort_keys=True, default=str).encode("utf-8"))
+        return h.hexdigest()
+
+    @staticmethod
+    def output_digests(stage, hasher):
+        return {str(path): hasher.digest(path) for path in stage.outputs}
+
+    def is_fresh(self, stage, fingerprint, record, hasher):
+        if not record or record.get("fingerprint") != fingerprint:
+            return False
+        outputs = self.output_digests(stage, hasher)
+        return "missing" not in outputs.values() and outputs == record.get("outputs")
+
+    # -----------------------------
+    # Run
+    # -----------------------------
+    def _check_stage(self, stage, state, hasher, force):
+        """(fingerprint, fresh?) — fingerprinting can itself fail (probe, unreadable input)."""
+        fingerprint = self.fingerprint(stage, hasher)
+        fresh = stage.name not in force and self.is_fresh(stage, fingerprint, state["stages"].get(stage.name), hasher)
+        return fingerprint, fresh
+
+    def _execute(self, stage, state, hasher, force):
+        start = time.perf_counter()
+        try:
+            fingerprint, fresh = self._check_stage(stage, state, hasher, force)
+            if fresh:
+                return {"status": "skipped", "seconds": time.perf_counter() - start, "fingerprint": fingerprint}
+
+            logger.info("▶️ {} ...", stage.name)
+            stage.run()
+            outputs = self.output_digests(stage, hasher)
+            missing = [path for path, digest in outputs.items() if digest == "missing"]
+            if missing:
+                raise FileNotFoundError(f"{stage.name} did not write {missing}")
+            state["stages"][stage.name] = {
+                "fingerprint": fingerprint,
+                "outputs": outputs,
+                "finished_at": datetime.utcnow().isoformat(),
+            }
+            return {"status": "ran", "seconds": time.perf_counter() - start, "fingerprint": fingerprint}
+        except Exception as e:
+            logger.exception("❌ Stage {} failed", stage.name)
+            return {"status": "failed", "seconds": time.perf_counter() - start, "error": f"{type(e).__name__}: {e}"}
+
+    def run(self, targets=None, force=(), max_workers=2):
+        """
+        Run `targets` (default: every stage) and whatever they depend on.
+        `force` lists stages to run even when fresh; their outputs then
+        invalidate downstream stages as usual. Returns the run record.
+        """
+        selected = self.upstream_closure(targets or list(self.stages))
+        force = set(self.stages) if force is True else set(force)
+        state = self.load_state()
+        hasher = FileHasher(state.setdefault("files", {}))
+        state.setdefault("stages", {})
+
+        results, pending, running, held_locks = {}, set(selected), {}, set()
+        started_at = datetime.utcnow().isoformat()
+        run_start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline") as executor:
+            while pending or running:
+                for name in sorted(pending):
+                    stage = self.stages[name]
+                    dep_status = [results.get(dep, {}).get("status") for dep in self.deps[name] if dep in selected]
+                    if any(status in ("failed", "blocked") for status in dep_status):
+                        results[name] = {"status": "blocked", "seconds": 0.0}
+                        pending.discard(name)
+                        logger.warning("⏭️ {} blocked by a failed upstream stage", name)
+                    elif None not in dep_status and (stage.lock is None or stage.lock not in held_locks):
+                        pending.discard(name)
+                        if stage.lock:
+                            held_locks.add(stage.lock)
+                        running[executor.submit(self._execute, stage, state, hasher, force)] = name
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    held_locks.discard(self.stages[name].lock)
+                    r = results[name]
+                    icon = {"ran": "✅", "skipped": "⏩", "failed": "❌"}[r["status"]]
+                    logger.info("{} {}: {} in {:.2f}s", icon, name, r["status"], r["seconds"])
+                    # Persist every finished stage, so a crash later in the run does not redo it
+                    self.save_state(state)
+
+        record = {
+            "run_id": uuid.uuid4().hex[:12],
+            "started_at": started_at,
+            "seconds": time.perf_counter() - run_start,
+            "targets": sorted(targets) if targets else None,
+            "forced": sorted(force),
+            "stages": results,
+        }
+        self.append_run_log(record)
+        return record
+
+    def append_run_log(self, record):
+        self.run_log_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.run_log_file, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def plan(self, targets=None):
+        """Stage -> "fresh" / "stale" given the files on disk right now (nothing is run)."""
+        state = self.load_state()
+        hasher = FileHasher(state.get("files", {}))
+        status = {}
+        for name in self._topological(self.upstream_closure(targets or list(self.stages))):
+            stage = self.stages[name]
+            try:
+                _, fresh = self._check_stage(stage, state, hasher, force=())
+            except Exception as e:
+                status[name] = f"unknown ({type(e).__name__})"
+                continue
+            # A stale upstream will rewrite this stage's inputs
+            stale_upstream = any(status.get(dep) != "fresh" for dep in self.deps[name])
+            status[name] = "fresh" if fresh and not stale_upstream else "stale"
+        return status
+
+    def _topological(self, names):
+        order, seen = [], set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in sorted(self.deps[name]):
+                if dep in names:
+                    visit(dep)
+            order.append(name)
+
+        for name in sorted(names):
+            visit(name)
+        return order
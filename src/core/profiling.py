@@ -0,0 +1,215 @@
+"""
+On-demand CPU and memory profiling for pipeline stages and API requests.
+
+    python manage.py --profile data-preprocess       # whole command
+    @profiled("preprocess")                          # a stage, when profiling is on
+
+Each profile writes timestamped artifacts to data/profiles/:
+
+- <ts>_<name>.pstats      cProfile stats (`python -m pstats`, snakeviz)
+- <ts>_<name>.collapsed   collapsed stacks in µs (flamegraph.pl, speedscope)
+- <ts>_<name>.json        wall time, tracemalloc peak, top allocation sites
+                          and top functions by cumulative time
+
+`profiled` functions are free when profiling is off. It is switched on for
+the whole process by `enable_profiling()` (manage.py --profile does this, so
+stages running on pipeline worker threads get their own profiles), or for one
+API request by the middleware in src/main.py (`X-Profile: 1` when
+PROFILE_HEADER=1, or a PROFILE_SAMPLE_RATE fraction of requests). cProfile
+only sees the thread it runs on, and a thread that is already being
+profiled is not profiled again. Requests share the event-loop thread, so
+only one request is profiled at a time (`request_profile_slot`); others
+arriving meanwhile are served unprofiled.
+"""
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+from src.core.logger import logger
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "data/profiles"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "0") == "1"
+
+TOP_N = 25
+# Stacks contributing less than this (seconds) are dropped from the collapsed file
+MIN_STACK_SECONDS = 1e-5
+
+_enabled = False
+_request_profiling = ContextVar("request_profiling", default=False)
+_local = threading.local()
+_request_slot = threading.Lock()
+
+
+def enable_profiling(enabled=True):
+    global _enabled
+    _enabled = enabled
+
+
+def profile_request(enabled=True):
+    """Turn profiling on for the current request context (propagates to threadpool endpoints)."""
+    return _request_profiling.set(enabled)
+
+
+def end_request_profiling(token):
+    _request_profiling.reset(token)
+
+
+def request_profile_slot():
+    """Non-blocking claim of the single request-profiling slot; release() it when done."""
+    return _request_slot if _request_slot.acquire(blocking=False) else None
+
+
+def profiling_active():
+    return _enabled or _request_profiling.get()
+
+
+def _safe_name(name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name or "profile")
+
+
+def _frame_label(func):
+    filename, lineno, name = func
+    if filename == "~":  # built-ins
+        return name
+    return f"{name} ({Path(filename).name}:{lineno})"
+
+
+def collapsed_stacks(stats: pstats.Stats):
+    """
+    {"a;b;c": seconds} reconstructed from the cProfile caller graph.
+
+    cProfile keeps caller -> callee edges, not full stacks, so a function's
+    own time is split across call paths in proportion to each caller edge's
+    share of its cumulative time (the usual pstats-to-flamegraph estimate).
+    """
+    raw = stats.stats
+    children = defaultdict(list)
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            children[caller].append((func, edge[3]))
+
+    stacks = defaultdict(float)
+
+    def walk(func, path, fraction):
+        _, _, own, cumulative, _ = raw[func]
+        path = path + (_frame_label(func),)
+        if own * fraction >= MIN_STACK_SECONDS:
+            stacks[";".join(path)] += own * fraction
+        for child, edge_cumulative in children[func]:
+            child_cumulative = raw[child][3]
+            share = fraction * min(1.0, edge_cumulative / child_cumulative) if child_cumulative else 0.0
+            # Skip recursion and branches too small to show up in a flamegraph
+            if _frame_label(child) in path or child_cumulative * share < MIN_STACK_SECONDS:
+                continue
+            walk(child, path, share)
+
+    for func, (_, _, _, _, callers) in raw.items():
+        if not callers:
+            walk(func, (), 1.0)
+    return stacks
+
+
+class Profiler:
+    """cProfile + tracemalloc around a block; writes the artifacts on stop()."""
+
+    def __init__(self, name, memory=True, output_dir=None):
+        self.name = _safe_name(name)
+        self.memory = memory
+        self.output_dir = Path(output_dir or PROFILE_DIR)
+        self.profile = cProfile.Profile()
+        self._owns_tracemalloc = False
+        self.artifacts = None
+
+    def start(self):
+        _local.active = True
+        if self.memory and not tracemalloc.is_tracing():
+            # Memory is process-wide: only the outermost profiler traces it
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        self._start = time.perf_counter()
+        self.profile.enable()
+        return self
+
+    def stop(self):
+        self.profile.disable()
+        wall = time.perf_counter() - self._start
+        _local.active = False
+
+        memory = None
+        if self._owns_tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memory = {
+                "peak_mb": peak / 2**20,
+                "top_allocations": [
+                    {"site": str(stat.traceback), "size_kb": stat.size / 1024, "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:TOP_N]
+                ],
+            }
+
+        self.artifacts = self.write(wall, memory)
+        logger.info("🔬 Profile {} ({:.2f}s{}) saved → {}", self.name, wall,
+                    f", peak {memory['peak_mb']:.1f} MB" if memory else "", self.artifacts["pstats"])
+        return self.artifacts
+
+    def write(self, wall, memory):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = self.output_dir / f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}_{self.name}"
+        paths = {ext: stem.with_suffix(f".{ext}") for ext in ("pstats", "collapsed", "json")}
+
+        self.profile.dump_stats(paths["pstats"])
+        stats = pstats.Stats(self.profile, stream=io.StringIO())
+
+        with open(paths["collapsed"], "w") as f:
+            for stack, seconds in sorted(collapsed_stacks(stats).items()):
+                f.write(f"{stack} {max(1, round(seconds * 1e6))}\n")
+
+        top_functions = sorted(stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)[:TOP_N]
+        with open(paths["json"], "w") as f:
+            json.dump({
+                "name": self.name,
+                "profiled_at": datetime.utcnow().isoformat(),
+                "wall_seconds": wall,
+                "memory": memory,
+                "top_cumulative": [
+                    {"function": _frame_label(func), "calls": nc, "own_s": own, "cumulative_s": cumulative}
+                    for func, (_, nc, own, cumulative, _) in top_functions
+                ],
+            }, f, indent=2)
+        return {ext: str(path) for ext, path in paths.items()}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+def profiled(name=None):
+    """Profile the decorated function when profiling is active and this thread is not already profiled."""
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiling_active() or getattr(_local, "active", False):
+                return func(*args, **kwargs)
+            with Profiler(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,104 @@
+import os
+import json
+import shutil
+import xxhash
+import numpy as np
+from pathlib import Path
+
+CHECKPOINT_ROOT = Path("data/embeddings/build_chunks")
+
+
+def text_lengths(model, texts):
+    """Token count per text when the model exposes a HF tokenizer, else character count."""
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is not None and callable(tokenizer):
+        encoded = tokenizer(texts, add_special_tokens=True, truncation=False)["input_ids"]
+        return np.asarray([len(ids) for ids in encoded])
+    return np.asarray([len(t) for t in texts])
+
+
+def _build_fingerprint(texts, chunk_size, model_name):
+    h = xxhash.xxh3_64()
+    h.update(f"{model_name}|{chunk_size}|{len(texts)}".encode())
+    for t in texts:
+        h.update(t.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _save_atomic(path: Path, array):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def encode_in_chunks(model, texts, build_name, model_name="", batch_size=64, chunk_size=10000,
+                     num_workers=0, resume=True):
+    """
+    Encode a large corpus with crash-safe progress checkpoints.
+
+    - texts are sorted by token length so every batch pads to similar lengths
+    - the sorted corpus is cut into chunks of `chunk_size`; each chunk is
+      written to CHECKPOINT_ROOT/<build_name>/chunk_XXXXX.npy as soon as it is done
+    - on restart, finished chunks are skipped (the manifest fingerprint makes
+      sure they belong to the same texts/model/chunking)
+    - num_workers > 1 spreads batches over a SentenceTransformer multi-process pool
+
+    Returns float32 vectors in the original text order. Call clear_checkpoints()
+    once the result has been persisted.
+    """
+    n = len(texts)
+    checkpoint_dir = CHECKPOINT_ROOT / build_name
+    manifest_file = checkpoint_dir / "manifest.json"
+    fingerprint = _build_fingerprint(texts, chunk_size, model_name)
+
+    if checkpoint_dir.exists():
+        manifest = json.loads(manifest_file.read_text()) if manifest_file.exists() else {}
+        if not resume or manifest.get("fingerprint") != fingerprint:
+            print(f"🧹 Discarding stale checkpoints in {checkpoint_dir}")
+            shutil.rmtree(checkpoint_dir)
+
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    manifest_file.write_text(json.dumps({"fingerprint": fingerprint, "count": n, "chunk_size": chunk_size}))
+
+    order = np.argsort(text_lengths(model, texts), kind="stable")
+    starts = list(range(0, n, chunk_size))
+
+    pool = None
+    if num_workers > 1 and hasattr(model, "start_multi_process_pool"):
+        print(f"🧵 Starting {num_workers} encoder worker processes")
+        pool = model.start_multi_process_pool(target_devices=["cpu"] * num_workers)
+
+    try:
+        for chunk_id, start in enumerate(starts):
+            chunk_file = checkpoint_dir / f"chunk_{chunk_id:05d}.npy"
+            if chunk_file.exists():
+                print(f"⏭️ Chunk {chunk_id + 1}/{len(starts)} already encoded")
+                continue
+
+            chunk_texts = [texts[i] for i in order[start:start + chunk_size]]
+            if pool is not None:
+                vectors = model.encode(chunk_texts, batch_size=batch_size, pool=pool)
+            else:
+                vectors = model.encode(chunk_texts, batch_size=batch_size, show_progress_bar=False)
+
+            _save_atomic(chunk_file, np.asarray(vectors, dtype="float32"))
+            print(f"💾 Chunk {chunk_id + 1}/{len(starts)} saved ({len(chunk_texts)} texts)")
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
+
+    # Reassemble in the caller's original order
+    embeddings = None
+    for chunk_id, start in enumerate(starts):
+        vectors = np.load(checkpoint_dir / f"chunk_{chunk_id:05d}.npy")
+        if embeddings is None:
+            embeddings = np.empty((n, vectors.shape[1]), dtype="float32")
+        embeddings[order[start:start + chunk_size]] = vectors
+
+    return embeddings if embeddings is not None else np.zeros((0, 0), dtype="float32")
+
+
+def clear_checkpoints(build_name):
+    shutil.rmtree(CHECKPOINT_ROOT / build_name, ignore_errors=True)
@@ -1,11 +1,18 @@
 import json
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
 
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
+import faiss
+import numpy as np
 from langchain_core.documents import Document
 
+from src.core.profiling import profiled
+from src.embeddings.embedding_cache import encode_with_cache
+from src.embeddings.docstore import LEGACY_PICKLE_NAME, write_docstore
+from src.embeddings.documents import DOC_COLUMNS, build_product_metadata, build_product_text, write_index_info
+from src.embeddings.encoders import load_encoder
+from src.ingestion.snapshot import load_catalog_records
+from src.search.lexical_index import BM25Index
+
 
 # ========================
 # PATHS
@@ -13,9 +20,11 @@ from langchain_core.documents import Document
 
 PROCESSED_FILE = Path("data/processed/magento_products_cleaned.json")
 EMBEDDING_DIR = Path("data/embeddings")
-EMBEDDING_DIR.mkdir(parents=True, exist_ok=True)
 
 META_FILE = EMBEDDING_DIR / "product_metadata.json"
+INDEX_FILE = EMBEDDING_DIR / "index.faiss"
+# Pickled docstore written by earlier builds (FAISS.save_local); superseded by docstore.jsonl
+LEGACY_PICKLE = EMBEDDING_DIR / LEGACY_PICKLE_NAME
 
 
 # ========================
@@ -26,73 +35,25 @@ class ProductFAISSBuilder:
     def __init__(self, model_name="sentence-transformers/all-MiniLM-L12-v2"):
         print(f"🧠 Loading embedding model: {model_name}")
         self.embedding_model_name = model_name
-        self.lc_embeddings = HuggingFaceEmbeddings(model_name=model_name)
+        self.encoder = load_encoder(model_name)
 
     def load_products(self):
-        if not PROCESSED_FILE.exists():
-            raise FileNotFoundError(f"❌ Missing processed file: {PROCESSED_FILE}")
-
-        with open(PROCESSED_FILE, "r") as f:
-            products = json.load(f)
+        products = load_catalog_records(DOC_COLUMNS, json_path=PROCESSED_FILE)
 
         print(f"📦 Loaded {len(products)} products")
         return products
 
     def build_text(self, p: dict) -> str:
-        """Build semantic text for embedding"""
-        parts = [
-            p.get("name", ""),
-            p.get("short_description", ""),
-            p.get("description", ""),
-            p.get("specifications", ""),
-            p.get("features", ""),
-            p.get("material", ""),
-            p.get("type", ""),
-            p.get("uom", ""),
-            p.get("country_of_manufacture", ""),
-            p.get("meta_keyword", ""),
-            p.get("meta_description", ""),
-            p.get("corrosion_resistant", False),
-            p.get("finish", ""),
-            p.get("temperature_range", ""),
-            p.get("material", ""),
-            # Add inherited or PDF specs
-            self._extract_specs(p.get("pdf_specs") or p.get("inherited_specs", {})),
-            # Explicit keywords for capacity/load
-            f"Capacity: {p.get('capacity', '')}" if p.get("capacity") else "",
-            f"Load Rating: {p.get('load_rating', '')}" if p.get("load_rating") else "",
-            f"Dimensions: {p.get('dimensions', '')}" if p.get("dimensions") else "",
-        ]
-        cleaned_parts = [str(part).strip() for part in parts if part]
-        return ". ".join(cleaned_parts).strip()
-
-    def _extract_specs(self, specs):
-        if not specs:
-            return ""
-        key_fields = [
-            "load_rating", "slide_extension", "slide_height", "slide_thickness",
-            "temperature_range", "main_material", "finish", "features_summary"
-        ]
-        return " ".join([f"{k.replace('_', ' ').title()}: {specs.get(k, '')}" for k in key_fields if specs.get(k)])
-    
+        """Build semantic text for embedding (canonical builder, see documents.py)."""
+        return build_product_text(p)
+
     def build_documents(self, products):
         docs = []
         metadata_out = []
 
         for p in products:
             text = self.build_text(p)
-
-            metadata = {
-                "product_id": p["product_id"],
-                "product_id": p["product_id"],
-                "sku": p.get("sku"),
-                "name": p.get("name"),
-                "type": p.get("type"),
-                "material": p.get("material"),
-                "load_rating": self._extract_specs((p.get("pdf_specs") or p.get("inherited_specs", {}))),
-                "capacity": p.get("capacity"),
-                "category_id": p.get("category_id")
-            }
+            metadata = build_product_metadata(p)
 
             docs.append(
                 Document(
@@ -111,24 +72,45 @@ class ProductFAISSBuilder:
 
         print(f"📘 Metadata saved → {META_FILE}")
 
-    def build_and_save_faiss(self):
+    @profiled("build_and_save_faiss")
+    def build_and_save_faiss(self, batch_size=64, num_workers=0, chunk_size=10000):
         products = self.load_products()
 
         print("🧩 Building LangChain documents...")
         docs, metadata = self.build_documents(products)
 
-        print("🔗 Creating FAISS vectorstore...")
-        vectorstore = FAISS.from_documents(docs, self.lc_embeddings)
-
-        print("💾 Saving FAISS index (LangChain format)...")
-        vectorstore.save_local(EMBEDDING_DIR)
+        print("🧠 Encoding documents...")
+        texts = [doc.page_content for doc in docs]
+        vectors = encode_with_cache(
+            self.encoder, texts, "langchain_faiss", self.embedding_model_name,
+            batch_size=batch_size, chunk_size=chunk_size, num_workers=num_workers,
+        )
+
+        # Same index FAISS.from_embeddings builds (L2); load it with docstore.load_vectorstore
+        print("🔗 Creating FAISS index...")
+        vectors = np.asarray(vectors, dtype="float32")
+        index = faiss.IndexFlatL2(vectors.shape[1])
+        index.add(vectors)
+
+        print("💾 Saving FAISS index and docstore...")
+        EMBEDDING_DIR.mkdir(parents=True, exist_ok=True)
+        faiss.write_index(index, str(INDEX_FILE))
+        write_docstore(docs, EMBEDDING_DIR)
+        if LEGACY_PICKLE.exists():
+            LEGACY_PICKLE.unlink()
+            print(f"🧹 Removed legacy pickled docstore → {LEGACY_PICKLE}")
+
+        print("🔤 Building BM25 index over the same texts...")
+        BM25Index.build([doc.page_content for doc in docs]).save()
 
         self.save_metadata(metadata)
+        write_index_info("langchain_faiss", self.embedding_model_name, len(docs))
 
         print("✅ FAISS index saved successfully!")
         print("📁 Files created:")
         print("  - index.faiss")
-        print("  - index.pkl")
+        print("  - docstore.jsonl / docstore_offsets.npy / docstore_metadata.json")
+        print("  - bm25_index.npz / bm25_vocab.json")
         print("  - product_metadata.json")
 
 
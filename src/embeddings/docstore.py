@@ -0,0 +1,149 @@
+"""
+Lazily hydrated document store for the LangChain FAISS bundle.
+
+Replaces the pickled index.pkl (every Document unpickled at startup) with
+plain files next to index.faiss:
+
+    docstore.jsonl           one {"page_content", "metadata"} object per index row
+    docstore_offsets.npy     int64 byte offset of every line (+ end of file)
+    docstore_metadata.json   metadata only, for the SKU index / family collapse
+
+LazyDocstore keeps the offsets in memory and memory-maps the JSONL, so a
+search parses only the k documents it returns. Docstore ids are row numbers
+as strings; load_vectorstore wires it into a read-only LangChain FAISS store.
+
+A bundle that still has only index.pkl (FAISS.save_local) is migrated once on
+first load: the pickle is read one last time, rewritten in this format and
+removed.
+"""
+
+import json
+import mmap
+import os
+import pickle
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+
+EMBEDDING_DIR = Path("data/embeddings")
+DOCSTORE_NAME = "docstore.jsonl"
+OFFSETS_NAME = "docstore_offsets.npy"
+METADATA_NAME = "docstore_metadata.json"
+LEGACY_PICKLE_NAME = "index.pkl"
+
+
+def write_docstore(docs, folder=EMBEDDING_DIR):
+    """Write the docs (in index row order) as JSONL + offsets + metadata sidecar."""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    offsets = [0]
+    tmp = folder / (DOCSTORE_NAME + ".tmp")
+    with open(tmp, "wb") as f:
+        for doc in docs:
+            line = json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False)
+            offsets.append(offsets[-1] + f.write(line.encode("utf-8") + b"\n"))
+
+    offsets_tmp = folder / (OFFSETS_NAME + ".tmp.npy")
+    np.save(offsets_tmp, np.asarray(offsets, dtype="int64"))
+    os.replace(offsets_tmp, folder / OFFSETS_NAME)
+    metadata_tmp = folder / (METADATA_NAME + ".tmp")
+    with open(metadata_tmp, "w", encoding="utf-8") as f:
+        json.dump([doc.metadata for doc in docs], f, ensure_ascii=False)
+    os.replace(metadata_tmp, folder / METADATA_NAME)
+    # docstore.jsonl marks a complete store, so it is moved into place last
+    os.replace(tmp, folder / DOCSTORE_NAME)
+
+
+def migrate_pickled_docstore(folder=EMBEDDING_DIR) -> bool:
+    """
+    One-time conversion of a FAISS.save_local bundle: index.pkl -> docstore files.
+    Returns True when a pickle was migrated (and removed).
+    """
+    folder = Path(folder)
+    legacy = folder / LEGACY_PICKLE_NAME
+    if (folder / DOCSTORE_NAME).exists() or not legacy.exists():
+        return False
+
+    print(f"🔄 Migrating pickled docstore → {folder / DOCSTORE_NAME}")
+    # The last unpickle of this file: it is our own build artifact, removed below
+    with open(legacy, "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    docs = [docstore.search(index_to_docstore_id[row]) for row in range(len(index_to_docstore_id))]
+    write_docstore(docs, folder)
+
+    legacy.unlink()
+    print(f"🧹 Removed legacy pickled docstore → {legacy} ({len(docs)} documents migrated)")
+    return True
+
+
+def load_docstore_metadata(folder=EMBEDDING_DIR):
+    with open(Path(folder) / METADATA_NAME, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class RowIds(Mapping):
+    """index_to_docstore_id without a dict: row i -> "i"."""
+
+    def __init__(self, size):
+        self.size = size
+
+    def __getitem__(self, row):
+        row = int(row)
+        if not 0 <= row < self.size:
+            raise KeyError(row)
+        return str(row)
+
+    def __iter__(self):
+        return iter(range(self.size))
+
+    def __len__(self):
+        return self.size
+
+
+class LazyDocstore(Docstore):
+    def __init__(self, folder=EMBEDDING_DIR):
+        folder = Path(folder)
+        path = folder / DOCSTORE_NAME
+        if not path.exists():
+            raise FileNotFoundError(f"❌ Missing docstore: {path}. Rebuild the bundle (embed-langchain).")
+
+        self.offsets = np.load(folder / OFFSETS_NAME)
+        self._file = open(path, "rb")
+        # mmap cannot map an empty file
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if len(self) else b""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def document(self, row: int) -> Document:
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return Document(**json.loads(self._data[start:end]))
+
+    def search(self, search: str):
+        try:
+            row = int(search)
+        except (TypeError, ValueError):
+            row = -1
+        if not 0 <= row < len(self):
+            return f"ID {search} not found."
+        return self.document(row)
+
+    def delete(self, ids):
+        raise NotImplementedError("LazyDocstore is read-only; rebuild the bundle instead")
+
+
+def load_vectorstore(embeddings, folder=EMBEDDING_DIR):
+    """LangChain FAISS store over index.faiss + LazyDocstore (migrating a legacy index.pkl first)."""
+    import faiss
+    from langchain_community.vectorstores import FAISS
+
+    migrate_pickled_docstore(folder)
+    index = faiss.read_index(str(Path(folder) / "index.faiss"))
+    docstore = LazyDocstore(folder)
+    if index.ntotal != len(docstore):
+        raise ValueError(f"❌ index.faiss has {index.ntotal} vectors but the docstore {len(docstore)} documents")
+    return FAISS(embeddings, index, docstore, RowIds(len(docstore)))
@@ -0,0 +1,117 @@
+"""
+Canonical product document construction.
+
+Every index builder (embedder.py, build_langchain_faiss.py), the incremental
+refresher (faiss_index_refresh.py) and the embedding cache see product text
+produced here, so vectors in one bundle always match what the refresher
+appends. Bump DOC_VERSION whenever build_product_text changes: bundles built
+with another version must be rebuilt rather than refreshed.
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+DOC_VERSION = 1
+
+INDEX_INFO_FILE = Path("data/embeddings/index_info.json")
+
+SPEC_FIELDS = [
+    "load_rating", "slide_extension", "slide_height", "slide_thickness",
+    "temperature_range", "main_material", "finish", "features_summary"
+]
+
+# Columns of the processed catalog that document construction reads
+DOC_COLUMNS = [
+    "product_id", "sku", "name", "short_description", "description", "specifications", "features",
+    "material", "type", "uom", "country_of_manufacture", "meta_keyword", "meta_description",
+    "corrosion_resistant", "finish", "temperature_range", "pdf_specs", "inherited_specs",
+    "capacity", "load_rating", "dimensions", "category_id",
+]
+
+
+def extract_specs(specs) -> str:
+    """Flatten the key PDF / inherited spec fields into 'Load Rating: 45 kg Finish: ...'."""
+    if not specs:
+        return ""
+    return " ".join([f"{k.replace('_', ' ').title()}: {specs.get(k, '')}" for k in SPEC_FIELDS if specs.get(k)])
+
+
+def product_specs(p: dict) -> dict:
+    return p.get("pdf_specs") or p.get("inherited_specs") or {}
+
+
+def build_product_text(p: dict) -> str:
+    """Build the semantic text embedded for a product."""
+    parts = [
+        p.get("name", ""),
+        p.get("short_description", ""),
+        p.get("description", ""),
+        p.get("specifications", ""),
+        p.get("features", ""),
+        p.get("material", ""),
+        p.get("type", ""),
+        p.get("uom", ""),
+        p.get("country_of_manufacture", ""),
+        p.get("meta_keyword", ""),
+        p.get("meta_description", ""),
+        "Corrosion resistant" if p.get("corrosion_resistant") else "",
+        p.get("finish", ""),
+        p.get("temperature_range", ""),
+        # Inherited or PDF specs
+        extract_specs(product_specs(p)),
+        # Explicit keywords for capacity/load
+        f"Capacity: {p.get('capacity', '')}" if p.get("capacity") else "",
+        f"Load Rating: {p.get('load_rating', '')}" if p.get("load_rating") else "",
+        f"Dimensions: {p.get('dimensions', '')}" if p.get("dimensions") else "",
+    ]
+    cleaned_parts = [str(part).strip() for part in parts if part]
+    return ". ".join(cleaned_parts).strip()
+
+
+def build_product_metadata(p: dict) -> dict:
+    """Metadata stored alongside each vector (product_metadata.json / docstore)."""
+    return {
+        "product_id": p.get("product_id", p.get("sku")),
+        "sku": p.get("sku"),
+        "name": p.get("name"),
+        "type": p.get("type"),
+        "material": p.get("material"),
+        "load_rating": extract_specs(product_specs(p)),
+        "capacity": p.get("capacity"),
+        "category_id": p.get("category_id"),
+    }
+
+
+def read_index_info(bundle: str, info_file=INDEX_INFO_FILE) -> dict:
+    if not Path(info_file).exists():
+        return {}
+    with open(info_file, "r") as f:
+        return json.load(f).get(bundle, {})
+
+
+def write_index_info(bundle: str, model_name: str, count: int, info_file=INDEX_INFO_FILE, **extra):
+    """Record how a bundle was built (document version, model, size)."""
+    info = {}
+    if Path(info_file).exists():
+        with open(info_file, "r") as f:
+            info = json.load(f)
+
+    info[bundle] = {
+        "doc_version": DOC_VERSION,
+        "model": model_name,
+        "count": count,
+        "built_at": datetime.utcnow().isoformat(),
+        **extra,
+    }
+    with open(info_file, "w") as f:
+        json.dump(info, f, indent=2)
+
+
+def is_current(bundle: str, info_file=INDEX_INFO_FILE) -> bool:
+    """True if the bundle was built with the current DOC_VERSION."""
+    version = read_index_info(bundle, info_file).get("doc_version")
+    if version != DOC_VERSION:
+        print(f"⚠️ {bundle} was built with document version {version}, current is {DOC_VERSION}")
+        return False
+    return True
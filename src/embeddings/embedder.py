@@ -1,67 +1,66 @@
 import json
+import os
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
 import numpy as np
-from datetime import datetime
 
-# Use today's processed folder
-today = datetime.now().strftime("%Y-%m-%d")
+from src.core.profiling import profiled
+from src.embeddings.documents import DOC_COLUMNS, build_product_metadata, build_product_text, write_index_info
+from src.embeddings.embedding_cache import encode_with_cache
+from src.embeddings.encoders import load_encoder
+from src.ingestion.snapshot import load_catalog_records
+
 PROCESSED_FILE = Path(f"data/processed/magento_products_cleaned.json")
 
 EMBEDDING_DIR = Path("data/embeddings")
-EMBEDDING_DIR.mkdir(parents=True, exist_ok=True)
 
 OUTPUT_FILE = EMBEDDING_DIR / "product_embeddings.npy"
 META_FILE = EMBEDDING_DIR / "product_metadata.json"
 
+# float16 halves product_embeddings.npy; build_faiss_index upcasts on load
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float32")
+
 
 class ProductEmbedder:
 
     def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2"):
         print(f"🧠 Loading embedding model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+        self.model_name = model_name
+        self.model = load_encoder(model_name)
 
     def load_products(self):
-        if not PROCESSED_FILE.exists():
-            raise FileNotFoundError(f"❌ Missing processed products file at {PROCESSED_FILE}")
-
-        with open(PROCESSED_FILE, "r") as f:
-            return json.load(f)
+        # Only the columns document construction reads (Parquet snapshot, JSON export as fallback)
+        return load_catalog_records(DOC_COLUMNS, json_path=PROCESSED_FILE)
 
     def build_text(self, p):
-        """Combine product fields into a text blob for embedding."""
-        parts = [
-            p.get("name", ""),
-            p.get("description", ""),
-            p.get("features", ""),
-            str(p.get("dimensions", "")),
-            str(p.get("capacity", "")),
-        ]
-        return ". ".join([part for part in parts if part]).strip()
-
-    def generate_embeddings(self):
+        """Combine product fields into a text blob for embedding (canonical builder, see documents.py)."""
+        return build_product_text(p)
+
+    @profiled("generate_embeddings")
+    def generate_embeddings(self, batch_size=64, num_workers=0, chunk_size=10000):
+        """
+        Encode the catalog through the embedding cache; only uncached texts are encoded,
+        length-sorted, in checkpointed chunks, optionally across `num_workers` CPU processes.
+        """
         products = self.load_products()
         print(f"📦 Loaded {len(products)} products")
 
         texts = [self.build_text(p) for p in products]
         print("🧠 Generating embeddings...")
 
-        embeddings = self.model.encode(texts, show_progress_bar=True)
+        embeddings = encode_with_cache(
+            self.model, texts, "product_embeddings", self.model_name,
+            batch_size=batch_size, chunk_size=chunk_size, num_workers=num_workers,
+        )
 
         print("💾 Saving embeddings & metadata...")
-        np.save(OUTPUT_FILE, embeddings)
+        EMBEDDING_DIR.mkdir(parents=True, exist_ok=True)
+        np.save(OUTPUT_FILE, np.asarray(embeddings).astype(EMBEDDING_DTYPE))
 
-        metadata = [
-            {
-                "product_id": p["product_id"],
-                "sku": p["sku"],
-                "name": p["name"],
-            }
-            for p in products
-        ]
+        metadata = [build_product_metadata(p) for p in products]
 
         with open(META_FILE, "w") as f:
             json.dump(metadata, f, indent=2)
+        write_index_info("product_embeddings", self.model_name, len(products))
 
         print(f"✅ Saved {len(products)} embeddings → {OUTPUT_FILE}")
         print(f"📘 Metadata saved to → {META_FILE}")
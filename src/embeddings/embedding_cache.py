@@ -0,0 +1,193 @@
+"""
+Content-addressed embedding cache.
+
+Vectors are keyed on (model, encoder variant, xxh3-128 of the
+whitespace-normalized text) and stored as append-only segments under
+data/embeddings/cache/<model>/ (torch) or <model>@<variant>/ (e.g. onnx-int8,
+whose vectors differ slightly from torch ones for the same model):
+
+    seg_00000.keys.npy   16-byte digests (dtype S16)
+    seg_00000.vecs.npy   float32 vectors, same row order
+    refs/<bundle>.npy    digests used by an index bundle (embeddings, FAISS, ...)
+
+Every build records the keys it used in refs/. `compact()` rewrites the cache
+keeping only vectors referenced by at least one bundle.
+"""
+
+import os
+import argparse
+import xxhash
+import numpy as np
+from pathlib import Path
+
+from src.core.metrics import EMBEDDING_CACHE_HITS, EMBEDDING_CACHE_MISSES
+from src.embeddings.batch_encode import clear_checkpoints, encode_in_chunks
+
+CACHE_ROOT = Path("data/embeddings/cache")
+DEFAULT_VARIANT = "torch"
+
+
+def encoder_variant(model) -> str:
+    """Backend / quantization of an encoder ("torch", "onnx-int8"); part of the cache key."""
+    return getattr(model, "cache_variant", DEFAULT_VARIANT)
+
+
+def normalize_text(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def text_key(text: str) -> bytes:
+    return xxhash.xxh3_128_digest(normalize_text(text).encode("utf-8"))
+
+
+def _save_atomic(path: Path, array):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+class EmbeddingCache:
+    def __init__(self, model_name, variant=DEFAULT_VARIANT, cache_root=CACHE_ROOT):
+        self.model_name = model_name
+        self.variant = variant
+        # torch keeps the original directory name, so existing caches stay valid
+        suffix = "" if variant == DEFAULT_VARIANT else f"@{variant}"
+        self.dir = Path(cache_root) / (model_name.replace("/", "__") + suffix)
+        self.refs_dir = self.dir / "refs"
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.refs_dir.mkdir(exist_ok=True)
+        self._load()
+
+    def _segment_ids(self):
+        return sorted(int(p.name[4:9]) for p in self.dir.glob("seg_*.keys.npy"))
+
+    def _load(self):
+        self.index = {}
+        self.segments = {}
+        for seg_id in self._segment_ids():
+            keys = np.load(self.dir / f"seg_{seg_id:05d}.keys.npy")
+            self.segments[seg_id] = np.load(self.dir / f"seg_{seg_id:05d}.vecs.npy", mmap_mode="r")
+            for row, key in enumerate(keys.tolist()):
+                self.index[key] = (seg_id, row)
+
+    def __len__(self):
+        return len(self.index)
+
+    def lookup(self, keys):
+        """Return (vectors or None, missing positions). Rows for missing keys are left zero."""
+        found = [(pos, self.index[key]) for pos, key in enumerate(keys) if key in self.index]
+        missing = [pos for pos, key in enumerate(keys) if key not in self.index]
+        if not found:
+            return None, missing
+
+        dim = next(iter(self.segments.values())).shape[1]
+        vectors = np.zeros((len(keys), dim), dtype="float32")
+
+        # Gather per segment with one fancy-index read each
+        by_segment = {}
+        for pos, (seg_id, row) in found:
+            by_segment.setdefault(seg_id, ([], []))
+            by_segment[seg_id][0].append(pos)
+            by_segment[seg_id][1].append(row)
+        for seg_id, (positions, rows) in by_segment.items():
+            vectors[positions] = self.segments[seg_id][rows]
+
+        return vectors, missing
+
+    def add(self, keys, vectors):
+        """Persist new (key, vector) pairs as a new segment."""
+        new = [i for i, key in enumerate(keys) if key not in self.index]
+        if not new:
+            return
+
+        seg_id = (max(self.segments) + 1) if self.segments else 0
+        seg_keys = np.asarray([keys[i] for i in new], dtype="S16")
+        seg_vecs = np.asarray(vectors, dtype="float32")[new]
+        _save_atomic(self.dir / f"seg_{seg_id:05d}.vecs.npy", seg_vecs)
+        _save_atomic(self.dir / f"seg_{seg_id:05d}.keys.npy", seg_keys)
+
+        self.segments[seg_id] = np.load(self.dir / f"seg_{seg_id:05d}.vecs.npy", mmap_mode="r")
+        for row, key in enumerate(seg_keys.tolist()):
+            self.index[key] = (seg_id, row)
+
+    def record_refs(self, bundle_name, keys, extend=False):
+        """Remember which cache entries an index bundle depends on."""
+        ref_file = self.refs_dir / f"{bundle_name}.npy"
+        keys = np.asarray(keys, dtype="S16")
+        if extend and ref_file.exists():
+            keys = np.concatenate([np.load(ref_file), keys])
+        _save_atomic(ref_file, np.unique(keys))
+
+    def compact(self):
+        """Drop entries no bundle references and merge all segments into one."""
+        live = set()
+        for ref_file in self.refs_dir.glob("*.npy"):
+            live.update(np.load(ref_file).tolist())
+
+        keep = [key for key in self.index if key in live]
+        before = len(self.index)
+        vectors, _ = self.lookup(keep)
+
+        old_segments = self._segment_ids()
+        self.segments, self.index = {}, {}
+        if keep:
+            # Write the merged segment above the old ids before deleting them
+            seg_id = old_segments[-1] + 1
+            _save_atomic(self.dir / f"seg_{seg_id:05d}.vecs.npy", vectors)
+            _save_atomic(self.dir / f"seg_{seg_id:05d}.keys.npy", np.asarray(keep, dtype="S16"))
+        for old in old_segments:
+            (self.dir / f"seg_{old:05d}.keys.npy").unlink()
+            (self.dir / f"seg_{old:05d}.vecs.npy").unlink()
+
+        self._load()
+        print(f"🧹 Embedding cache compacted: {before} → {len(self.index)} entries")
+
+
+def encode_with_cache(model, texts, bundle_name, model_name, extend_refs=False, **chunk_kwargs):
+    """
+    Encode texts, paying encoder cost only for texts not already cached.
+    Misses are deduplicated and go through encode_in_chunks (length-sorted, checkpointed).
+    """
+    variant = encoder_variant(model)
+    cache = EmbeddingCache(model_name, variant)
+    keys = [text_key(t) for t in texts]
+    vectors, missing = cache.lookup(keys)
+    print(f"🗃️ Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses")
+    EMBEDDING_CACHE_HITS.inc(len(texts) - len(missing))
+    EMBEDDING_CACHE_MISSES.inc(len(missing))
+
+    if missing:
+        first_pos = {}
+        for pos in missing:
+            first_pos.setdefault(keys[pos], pos)
+        miss_keys = list(first_pos)
+        miss_vectors = encode_in_chunks(
+            model, [texts[first_pos[k]] for k in miss_keys], bundle_name, model_name=f"{model_name}@{variant}",
+            **chunk_kwargs
+        )
+        cache.add(miss_keys, miss_vectors)
+        clear_checkpoints(bundle_name)
+
+        if vectors is None:
+            vectors = np.zeros((len(texts), miss_vectors.shape[1]), dtype="float32")
+        lookup = dict(zip(miss_keys, miss_vectors))
+        for pos in missing:
+            vectors[pos] = lookup[keys[pos]]
+
+    cache.record_refs(bundle_name, keys, extend=extend_refs)
+    return vectors if vectors is not None else np.zeros((0, 0), dtype="float32")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding cache maintenance")
+    parser.add_argument("command", choices=["compact", "stats"])
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--variant", default=DEFAULT_VARIANT, help="torch or onnx-int8")
+    args = parser.parse_args()
+
+    cache = EmbeddingCache(args.model, args.variant)
+    if args.command == "compact":
+        cache.compact()
+    else:
+        print(f"📦 {len(cache)} cached vectors for {args.model} ({args.variant}) in {len(cache.segments)} segments")
@@ -0,0 +1,250 @@
+"""
+Query/document encoder backends.
+
+Every caller gets an object with the SentenceTransformer-style
+`encode(sentences, ...) -> np.ndarray` interface:
+
+- "torch": the regular sentence-transformers model (default)
+- "onnx":  the same model exported to ONNX, int8 dynamically quantized and run
+           on ONNX Runtime CPU. Importing it never pulls in torch.
+
+Select with the EMBEDDING_BACKEND env var or the `backend` argument.
+Export once with `python -m src.embeddings.encoders export`, then verify with
+`python -m src.embeddings.encoders parity`. The export records the model's
+sentence-transformers pooling mode (1_Pooling/config.json): mean, cls or max.
+"""
+
+import os
+import json
+import argparse
+import numpy as np
+from pathlib import Path
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_DIR = Path("data/models")
+POOLING_MODES = ("mean", "cls", "max")
+
+PARITY_SENTENCES = [
+    "550 liter chest freezer",
+    "heavy duty drawer slide 200 kg",
+    "corrosion resistant stainless steel slide",
+    "DZ4501-0060EC",
+    "Aluminium Part Extension Slide 400mm DA4120-0040",
+    "full extension slide with lock-out",
+]
+
+
+def onnx_dir_for(model_name: str) -> Path:
+    return ONNX_DIR / (model_name.replace("/", "__") + "-onnx-int8")
+
+
+class OnnxSentenceEncoder:
+    """Transformer encoder on ONNX Runtime with the exported pooling, SentenceTransformer.encode compatible."""
+
+    # Embedding-cache variant: int8 vectors must not be served to (or from) torch builds
+    cache_variant = "onnx-int8"
+
+    def __init__(self, model_name=DEFAULT_MODEL, model_dir=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir or onnx_dir_for(model_name))
+        model_file = model_dir / "model_int8.onnx"
+        if not model_file.exists():
+            raise FileNotFoundError(
+                f"❌ ONNX encoder missing at {model_file}. Run: python -m src.embeddings.encoders export"
+            )
+
+        with open(model_dir / "encoder_config.json", "r") as f:
+            self.config = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config.get("pad_token_id", 0))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(model_file), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self):
+        return self.config["dimension"]
+
+    def _encode_batch(self, batch):
+        encodings = self.tokenizer.encode_batch(batch)
+        input_ids = np.asarray([e.ids for e in encodings], dtype="int64")
+        attention_mask = np.asarray([e.attention_mask for e in encodings], dtype="int64")
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.asarray([e.type_ids for e in encodings], dtype="int64")
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Exports made before the pooling mode was recorded were all mean-pooled
+        pooling = self.config.get("pooling", "mean")
+        if pooling == "cls":
+            return token_embeddings[:, 0].astype("float32")
+        mask = attention_mask[..., None].astype("float32")
+        if pooling == "max":
+            return np.where(mask > 0, token_embeddings, -1e9).max(axis=1).astype("float32")
+        # Mean over non-padding tokens
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled.astype("float32")
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False, convert_to_tensor=False,
+               show_progress_bar=False, **kwargs):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        # Length-sort so each batch pads to similar lengths, then restore order
+        order = np.argsort([len(s) for s in sentences])
+        out = np.zeros((len(sentences), self.config["dimension"]), dtype="float32")
+        for start in range(0, len(sentences), batch_size):
+            idx = order[start:start + batch_size]
+            out[idx] = self._encode_batch([sentences[i] for i in idx])
+
+        if self.config.get("normalize") or normalize_embeddings:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+
+        return out[0] if single else out
+
+
+def load_encoder(model_name=DEFAULT_MODEL, backend=None):
+    """Return an encoder with SentenceTransformer.encode semantics for the chosen backend."""
+    backend = backend or DEFAULT_BACKEND
+    if backend == "onnx":
+        print(f"🧠 Loading ONNX int8 encoder: {model_name}")
+        return OnnxSentenceEncoder(model_name)
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    raise ValueError(f"❌ Unknown embedding backend: {backend}")
+
+
+class EncoderEmbeddings(Embeddings):
+    """LangChain Embeddings adapter over any load_encoder() backend."""
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+
+    def embed_documents(self, texts):
+        return np.asarray(self.encoder.encode(list(texts))).tolist()
+
+    def embed_query(self, text):
+        return np.asarray(self.encoder.encode([text]))[0].tolist()
+
+
+def load_langchain_embeddings(model_name=DEFAULT_MODEL, backend=None):
+    backend = backend or DEFAULT_BACKEND
+    if backend == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=model_name)
+    return EncoderEmbeddings(load_encoder(model_name, backend=backend))
+
+
+def pooling_mode(st_model) -> str:
+    """Pooling of a SentenceTransformer (its 1_Pooling/config.json); only modes the ONNX encoder implements."""
+    from sentence_transformers.models import Pooling
+
+    poolings = [module for module in st_model if isinstance(module, Pooling)]
+    mode = poolings[0].get_pooling_mode_str() if poolings else None
+    if mode not in POOLING_MODES:
+        raise ValueError(f"❌ Pooling '{mode}' is not supported by the ONNX encoder (expected one of {POOLING_MODES})")
+    return mode
+
+
+def export_onnx_int8(model_name=DEFAULT_MODEL, out_dir=None):
+    """Export the transformer to ONNX (dynamic batch/sequence axes) and quantize weights to int8."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    out_dir = Path(out_dir or onnx_dir_for(model_name))
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    # Fail before exporting anything if the model pools in a way _encode_batch cannot reproduce
+    pooling = pooling_mode(st_model)
+    transformer = st_model[0]
+    hf_model = transformer.auto_model.eval()
+    hf_tokenizer = transformer.tokenizer
+
+    sample = hf_tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_file = out_dir / "model_fp32.onnx"
+    print(f"📤 Exporting {model_name} → {fp32_file}")
+    with torch.no_grad():
+        torch.onnx.export(
+            hf_model,
+            tuple(sample[name] for name in input_names),
+            str(fp32_file),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=17,
+            # TorchScript exporter: honours dynamic_axes and does not need onnxscript
+            dynamo=False,
+        )
+
+    int8_file = out_dir / "model_int8.onnx"
+    print(f"🗜️ Quantizing (dynamic int8) → {int8_file}")
+    quantize_dynamic(str(fp32_file), str(int8_file), weight_type=QuantType.QInt8)
+    fp32_file.unlink()
+
+    hf_tokenizer.save_pretrained(str(out_dir))
+    config = {
+        "model_name": model_name,
+        "dimension": st_model.get_sentence_embedding_dimension(),
+        "max_seq_length": st_model.max_seq_length,
+        "pad_token_id": hf_tokenizer.pad_token_id or 0,
+        "pooling": pooling,
+        "normalize": any(type(module).__name__ == "Normalize" for module in st_model),
+    }
+    with open(out_dir / "encoder_config.json", "w") as f:
+        json.dump(config, f, indent=2)
+
+    print(f"✅ ONNX encoder ready in {out_dir}")
+    return out_dir
+
+
+def parity_cosines(reference_encoder, candidate_encoder, sentences=None):
+    """Per-sentence cosine similarity between two encoders' embeddings."""
+    sentences = sentences or PARITY_SENTENCES
+    reference = np.asarray(reference_encoder.encode(sentences), dtype="float32")
+    candidate = np.asarray(candidate_encoder.encode(sentences), dtype="float32")
+    reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate /= np.linalg.norm(candidate, axis=1, keepdims=True)
+    return (reference * candidate).sum(axis=1)
+
+
+def check_parity(model_name=DEFAULT_MODEL, sentences=None, min_cosine=0.99):
+    """
+    Compare ONNX int8 embeddings with the torch model on the same sentences.
+    Returns True when every pair's cosine similarity is at least min_cosine.
+    """
+    cosines = parity_cosines(load_encoder(model_name, backend="torch"), load_encoder(model_name, backend="onnx"),
+                             sentences)
+    print(f"📏 ONNX vs torch cosine — min: {cosines.min():.4f}, mean: {cosines.mean():.4f}")
+    ok = bool(cosines.min() >= min_cosine)
+    print("✅ Parity check passed" if ok else f"❌ Parity below {min_cosine}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ONNX int8 encoder tools")
+    parser.add_argument("command", choices=["export", "parity"])
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx_int8(args.model)
+    else:
+        raise SystemExit(0 if check_parity(args.model, min_cosine=args.min_cosine) else 1)
@@ -0,0 +1,173 @@
+"""
+Passage-level index over the structured datasheet output of pdf_reader.
+
+One shard per datasheet language (EN/FR/DE); FR and DE default to a
+multilingual encoder.
+
+Each datasheet section (features, notes, fixing, accessories, ...) and each
+variant row becomes its own document, split into windows that fit MiniLM's
+256-token limit. Passages keep their SKU and section in metadata, and
+passage_to_product_<lang>.npy (int32) maps every passage row to its product row in
+product_metadata.json so results can be grouped back to products. Other
+bundles (the LangChain docstore) resolve a hit through its SKU, not the row;
+PassageSearcher refuses a shard whose map does not fit product_metadata.json.
+"""
+
+import json
+import faiss
+import numpy as np
+from pathlib import Path
+
+from src.embeddings.documents import write_index_info
+from src.embeddings.embedding_cache import encode_with_cache
+from src.embeddings.encoders import load_encoder
+from src.ingestion.clean.sku import get_parent_sku, normalize_sku_for_lookup
+from src.search.build_faiss_index import build_faiss_index
+
+EMBEDDING_DIR = Path("data/embeddings")
+META_FILE = EMBEDDING_DIR / "product_metadata.json"
+PDF_SPECS_DIR = Path("data/datasheets/processed/clean_pdf_json")
+
+DEFAULT_MODELS = {
+    "en": "sentence-transformers/all-MiniLM-L6-v2",
+    "fr": "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+    "de": "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+}
+
+# Scalar spec fields summarised into one "specifications" passage
+SPEC_FIELDS = [
+    "load_rating", "slide_extension", "slide_height", "slide_thickness", "max_slide_length",
+    "temperature_range", "corrosion_resistant", "main_material", "ball_material",
+    "retainer_material", "finish", "unit_of_measure",
+]
+
+# Free-text sections, each embedded on its own
+TEXT_SECTIONS = [
+    "features", "notes", "fixing", "accessories", "spare_parts",
+    "permitted_mounting", "other_mounting", "flat_mounting_note",
+]
+
+VARIANT_COLUMNS = {"sl": "Slide length", "tr": "Travel", "a": "A", "w": "W", "l1": "L1"}
+
+# ~180 words stays under the 256 word-piece window for these datasheets
+MAX_WORDS = 180
+OVERLAP_WORDS = 30
+
+
+def passage_paths(lang: str = "en"):
+    """(index, metadata, passage->product map) files of a language shard."""
+    return (
+        EMBEDDING_DIR / f"passage_index_{lang}.faiss",
+        EMBEDDING_DIR / f"passage_metadata_{lang}.json",
+        EMBEDDING_DIR / f"passage_to_product_{lang}.npy",
+    )
+
+
+def pdf_specs_file(lang: str = "en") -> Path:
+    """Prefer the SKU-fixed file produced by scripts/pdf/normalised_sku.py."""
+    fixed = PDF_SPECS_DIR / f"product_specs_{lang}_fixed.json"
+    return fixed if fixed.exists() else PDF_SPECS_DIR / f"product_specs_{lang}.json"
+
+
+def split_words(text: str, max_words=MAX_WORDS, overlap=OVERLAP_WORDS):
+    words = text.split()
+    if len(words) <= max_words:
+        return [" ".join(words)] if words else []
+    step = max_words - overlap
+    return [" ".join(words[i:i + max_words]) for i in range(0, len(words) - overlap, step)]
+
+
+def spec_passages(spec: dict):
+    """Yield (sku, section, text) for one datasheet's structured specs."""
+    sku = normalize_sku_for_lookup(spec.get("product_id") or spec.get("sku"))
+
+    summary = "; ".join(
+        f"{field.replace('_', ' ').title()}: {spec[field]}" for field in SPEC_FIELDS if spec.get(field)
+    )
+    if summary:
+        yield sku, "specifications", summary
+
+    for section in TEXT_SECTIONS:
+        if spec.get(section):
+            for window in split_words(str(spec[section])):
+                yield sku, section, window
+
+    for variant in spec.get("variants") or []:
+        model = variant.get("model")
+        if not model:
+            continue
+        columns = ", ".join(f"{label} {variant[col]}" for col, label in VARIANT_COLUMNS.items() if variant.get(col))
+        yield normalize_sku_for_lookup(model), "variant", f"Model {model}: {columns}"
+
+
+class PassageIndexBuilder:
+    def __init__(self, lang="en", model_name=None):
+        self.lang = lang
+        self.model_name = model_name or DEFAULT_MODELS.get(lang, DEFAULT_MODELS["fr"])
+        self.model = load_encoder(self.model_name)
+
+    def product_rows(self):
+        """Normalized SKU -> product row; parent SKUs resolve to the first row of their family."""
+        with open(META_FILE, "r") as f:
+            metadata = json.load(f)
+
+        rows = {}
+        for row, meta in enumerate(metadata):
+            sku = normalize_sku_for_lookup(meta.get("sku") or "")
+            rows.setdefault(sku, row)
+        for row, meta in enumerate(metadata):
+            rows.setdefault(get_parent_sku(normalize_sku_for_lookup(meta.get("sku") or "")), row)
+        return rows
+
+    def build_passages(self):
+        lang = self.lang
+        specs_file = pdf_specs_file(lang)
+        if not specs_file.exists():
+            raise FileNotFoundError(f"❌ PDF specs not found: {specs_file}. Run pdf-extract first.")
+
+        with open(specs_file, "r", encoding="utf-8") as f:
+            specs_list = json.load(f)
+
+        rows = self.product_rows()
+        passages, product_ids, skipped = [], [], 0
+        for spec in specs_list:
+            parent_sku = normalize_sku_for_lookup(spec.get("product_id") or spec.get("sku"))
+            for sku, section, text in spec_passages(spec):
+                # Variant rows map to their own product when it exists, else to the datasheet's product
+                row = rows.get(sku, rows.get(parent_sku))
+                if row is None:
+                    skipped += 1
+                    continue
+                passages.append({
+                    "sku": sku,
+                    "product_sku": parent_sku,
+                    "section": section,
+                    "language": lang,
+                    "text": f"{sku} {section.replace('_', ' ')}: {text}",
+                })
+                product_ids.append(row)
+
+        print(f"🧩 Built {len(passages)} passages from {len(specs_list)} datasheets ({skipped} without a product)")
+        return passages, np.asarray(product_ids, dtype="int32")
+
+    def build_and_save(self):
+        index_file, meta_file, map_file = passage_paths(self.lang)
+        bundle = f"passages_{self.lang}"
+        passages, passage_to_product = self.build_passages()
+
+        vectors = encode_with_cache(self.model, [p["text"] for p in passages], bundle, self.model_name)
+        # Same storage options as faiss_index.bin (FAISS_STORAGE / FAISS_PCA_DIM)
+        index = build_faiss_index(np.asarray(vectors, dtype="float32"))
+
+        faiss.write_index(index, str(index_file))
+        np.save(map_file, passage_to_product)
+        with open(meta_file, "w", encoding="utf-8") as f:
+            json.dump(passages, f, ensure_ascii=False)
+        write_index_info(bundle, self.model_name, len(passages), language=self.lang)
+
+        print(f"💾 Passage index saved → {index_file} ({index.ntotal} passages)")
+
+
+if __name__ == "__main__":
+    for lang in DEFAULT_MODELS:
+        PassageIndexBuilder(lang).build_and_save()
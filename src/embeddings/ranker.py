@@ -0,0 +1,75 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from langchain_core.documents import Document
+
+from src.core.metrics import RERANK_BUSY, RERANK_SECONDS, RERANK_TIMEOUTS
+from src.core.logger import logger
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+DEFAULT_TIME_BUDGET_MS = float(os.getenv("RERANK_TIME_BUDGET_MS", "150"))
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores retrieved candidates with a small cross-encoder.
+
+    All (query, document) pairs go through the model as a single batch. The
+    forward pass runs on a worker thread; if it does not finish within the
+    time budget the candidates are returned in their original (vector) order
+    without rerank scores, so a slow CPU never blocks the request.
+
+    A pass that overran keeps its worker until it finishes. Requests arriving
+    meanwhile do not queue behind it (and blow their own budget): they see
+    every worker busy and fall back to vector order at once.
+    """
+
+    def __init__(self, model_name=DEFAULT_RERANK_MODEL, time_budget_ms=DEFAULT_TIME_BUDGET_MS, max_length=256,
+                 workers=1, model=None):
+        if model is None:
+            # Deferred: sentence_transformers pulls in torch
+            from sentence_transformers import CrossEncoder
+
+            logger.info("🧮 Loading cross-encoder: {}", model_name)
+            model = CrossEncoder(model_name, max_length=max_length)
+        self.model = model
+        self.time_budget_ms = time_budget_ms
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reranker")
+        self._free_workers = threading.Semaphore(workers)
+
+    def score(self, query, docs):
+        """Relevance score per document, one forward pass for the whole batch."""
+        pairs = [(query, doc.page_content) for doc in docs]
+        return self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+
+    @RERANK_SECONDS.time()
+    def rerank(self, query, docs, top_n=None):
+        """
+        Return docs sorted by cross-encoder score (stored in metadata["rerank_score"]),
+        truncated to top_n. Falls back to the incoming order when over budget.
+        """
+        if not docs:
+            return docs
+
+        if not self._free_workers.acquire(blocking=False):
+            RERANK_BUSY.inc()
+            logger.warning("⏱️ Cross-encoder busy with an earlier batch — keeping vector order")
+            return docs[:top_n]
+
+        future = self._executor.submit(self.score, query, docs)
+        future.add_done_callback(lambda _: self._free_workers.release())
+        try:
+            # A budget of 0 / None waits for the scores (offline evaluation)
+            scores = future.result(timeout=self.time_budget_ms / 1000 if self.time_budget_ms else None)
+        except TimeoutError:
+            RERANK_TIMEOUTS.inc()
+            logger.warning("⏱️ Rerank exceeded {:.0f} ms budget — keeping vector order", self.time_budget_ms)
+            return docs[:top_n]
+
+        # Copy rather than mutate: docs may be shared docstore objects
+        scored = [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "rerank_score": float(score)})
+            for doc, score in zip(docs, scores)
+        ]
+        ranked = sorted(scored, key=lambda doc: doc.metadata["rerank_score"], reverse=True)
+        return ranked[:top_n]
@@ -2,6 +2,14 @@ import fitz  # PyMuPDF
 import re
 import os
 import json
+from pathlib import Path
+
+from src.core.logger import logger, sampled
+from src.core.pipeline import FileHasher
+from src.core.profiling import profiled
+
+# Per-PDF progress: one line in 25
+pdf_log = sampled(25)
 
 # ---------- CONFIG ----------
 PDF_FOLDER = "scripts/pdf/datasheets"
@@ -14,7 +22,7 @@ STRUCTURED_OUTPUT_DE_FILE = "data/datasheets//processed/clean_pdf_json/product_s
 def extract_text_from_pdf(pdf_path):
     """Extract full text from a PDF."""
     if not os.path.exists(pdf_path):
-        print(f"❌ PDF not found: {pdf_path}")
+        logger.error("❌ PDF not found: {}", pdf_path)
         return None
 
     doc = fitz.open(pdf_path)
@@ -43,7 +51,7 @@ def separate_languages(text):
         re.match(r'^[A-Z0-9]{1,3}$', line_stripped) or
         line_stripped in ['SL', 'TR', 'A', 'B', 'C', 'D', 'W', 'L', 'mm', 'kg']):
             # Capture table block
-            print(f"Found shared block at line {i}")
+            logger.debug("Found shared block at line {}", i)
             table_start = i
             i += 1
             while i < len(lines):
@@ -52,19 +60,19 @@ def separate_languages(text):
                     re.match(r'^[\d,.-]+(\s+[\d,.-]+)*$', current) or
                     current in ['-', '']
                 ):
-                    print(f"Line {i}: {current}")
+                    logger.debug("Line {}: {}", i, current)
                     i += 1
                 else:
                     break
 
             lang_blocks['shared'].extend(lines[table_start:i])
             continue
-        print(f"Line {i}: {line_stripped}")
+        logger.debug("Line {}: {}", i, line_stripped)
         # Non-shared descriptive lines
         lang_blocks['en' if len(lang_blocks['en']) <= len(lang_blocks['fr']) else 
                     'fr' if len(lang_blocks['fr']) <= len(lang_blocks['de']) else 'de'].append(lines[i])
         i += 1
-    print(f"Shared: {len(lang_blocks['shared'])}")
+    logger.debug("Shared: {}", len(lang_blocks['shared']))
     # Alternative robust method: Split non-shared lines into approximate thirds
     non_shared = [line for line in lines if line not in lang_blocks['shared']]
     third = len(non_shared) // 3
@@ -80,7 +88,7 @@ def separate_languages(text):
     lang_blocks['shared'] = shared_text
 
     detected = [l for l in ['en', 'fr', 'de'] if lang_blocks[l].strip()]
-    print(f"Detected languages: {', '.join(detected)}")
+    logger.debug("Detected languages: {}", ", ".join(detected))
     return {k: v for k, v in lang_blocks.items() if k == 'shared' or k in detected}
 
 def extract_common_variants(text):
@@ -288,88 +296,127 @@ def extract_detailed_specs_de(text, shared_text):
     specs['variants'] = extract_common_variants(text)
     return {k: v for k, v in specs.items() if v is not None}
 
+# ---------- EXTRACTION CACHE ----------
+# Per-PDF specs keyed by content hash and extractor version, so unchanged PDFs are not re-parsed
+EXTRACTION_CACHE_NAME = "extraction_cache.json"
+# Bump whenever extract_detailed_specs_* / extract_pdf_specs output changes: cached specs
+# from another version are re-extracted
+EXTRACTOR_VERSION = 1
+# Written by scripts/pdf/downloader.py next to the PDFs
+DOWNLOAD_MANIFEST_NAME = "manifest.json"
+
+
+def load_extraction_cache(raw_output_folder, pdf_folder):
+    cache_file = os.path.join(raw_output_folder, EXTRACTION_CACHE_NAME)
+    cache = {"files": {}, "pdfs": {}}
+    if os.path.exists(cache_file):
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+
+    # The downloader already hashed what it fetched: reuse those hashes while size / mtime match
+    manifest_file = os.path.join(pdf_folder, DOWNLOAD_MANIFEST_NAME)
+    if os.path.exists(manifest_file):
+        with open(manifest_file, "r") as f:
+            manifest = json.load(f)
+        for name, entry in manifest.items():
+            if all(entry.get(k) is not None for k in ("size", "mtime_ns", "hash")):
+                cache["files"][str(Path(pdf_folder) / name)] = [entry["size"], entry["mtime_ns"], entry["hash"]]
+    return cache
+
+
+def save_extraction_cache(raw_output_folder, cache):
+    cache_file = os.path.join(raw_output_folder, EXTRACTION_CACHE_NAME)
+    with open(cache_file + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(cache_file + ".tmp", cache_file)
+
+
+def extract_pdf_specs(pdf_folder, pdf_file):
+    """{"en": specs, "fr": specs, "de": specs} for one datasheet, or None when it is skipped."""
+    sku = pdf_file.split("_")[0]
+    if pdf_file == "manual.pdf":
+        full_text = extract_text_from_pdf(os.path.join(pdf_folder, pdf_file))
+        sku = infer_sku_from_text(full_text)
+        logger.info("🔍 Inferred SKU for manual.pdf: {}", sku)
+
+    if len(sku) < 3 or not re.match(r'^[A-Z0-9-]+$', sku) or sku == 'manual':
+        logger.warning("⚠️ Skipping invalid SKU: {} from {}", sku, pdf_file)
+        return None
+
+    pdf_path = os.path.join(pdf_folder, pdf_file)
+    pdf_log.info("📄 Processing {} (SKU: {})...", pdf_file, sku)
+
+    full_text = extract_text_from_pdf(pdf_path)
+    logger.debug("✅ Extracted full text from {}", pdf_file)
+    if not full_text:
+        return None
+
+    specs = {}
+    for lang, extract in (("en", extract_detailed_specs_en), ("fr", extract_detailed_specs_fr),
+                          ("de", extract_detailed_specs_de)):
+        lang_specs = extract(full_text, full_text)
+        if lang_specs:
+            lang_specs['product_id'] = sku
+            lang_specs['language'] = lang
+        specs[lang] = lang_specs or {}
+
+    total_fields = sum(len(s) for s in specs.values())
+    if total_fields < 12:
+        logger.warning("⚠️ Low yield for {} ({} fields); review manual.", sku, total_fields)
+    return specs
+
+
 # ---------- MAIN SCRIPT ----------
+@profiled("process_all_pdfs")
 def process_all_pdfs(pdf_folder, raw_output_folder, en_output_file, fr_output_file, de_output_file):
     os.makedirs(raw_output_folder, exist_ok=True)
     os.makedirs(os.path.dirname(en_output_file), exist_ok=True)
 
-    pdf_files = [f for f in os.listdir(pdf_folder) if f.lower().endswith(".pdf")]
+    # Sorted so unchanged inputs give byte-identical outputs (the pipeline hashes them)
+    pdf_files = sorted(f for f in os.listdir(pdf_folder) if f.lower().endswith(".pdf"))
     if not pdf_files:
-        print(f"❌ No PDF files found in {pdf_folder}")
+        logger.error("❌ No PDF files found in {}", pdf_folder)
         return
 
-    all_specs_en = []
-    all_specs_fr = []
-    all_specs_de = []
+    cache = load_extraction_cache(raw_output_folder, pdf_folder)
+    hasher = FileHasher(cache["files"])
+    extracted = {}
+    reused = 0
 
     for pdf_file in pdf_files:
-        sku = pdf_file.split("_")[0]
-        if pdf_file == "manual.pdf":
-            full_text = extract_text_from_pdf(os.path.join(pdf_folder, pdf_file))
-            sku = infer_sku_from_text(full_text)
-            print(f"🔍 Inferred SKU for manual.pdf: {sku}")
-
-        if len(sku) < 3 or not re.match(r'^[A-Z0-9-]+$', sku) or sku == 'manual':
-            print(f"⚠️ Skipping invalid SKU: {sku} from {pdf_file}")
-            continue
-
-        pdf_path = os.path.join(pdf_folder, pdf_file)
-        print(f"📄 Processing {pdf_file} (SKU: {sku})...")
-
-        full_text = extract_text_from_pdf(pdf_path)
-        print(f"✅ Extracted full text from {pdf_file}")
-        if not full_text:
-            continue
-        
-        # lang_split = separate_languages(full_text)
-        # print(f"✅ Separated languages from {pdf_file}")
-        # raw_output_file = os.path.join(raw_output_folder, f"{sku}_manual.json")
-        # # raw_data = {"sku": sku, **full_text}
-        # with open(raw_output_file, "w", encoding="utf-8") as f:
-        #     json.dump(raw_data, f, indent=2, ensure_ascii=False)
-        # print(f"✅ Saved raw text to {raw_output_file}")
-
-        specs_en = {}
-        specs_fr = {}
-        specs_de = {}
-
-        specs_en = extract_detailed_specs_en(full_text, full_text)
-        if specs_en:
-            specs_en['product_id'] = sku
-            specs_en['language'] = 'en'
-            all_specs_en.append(specs_en)
-
-        specs_de = extract_detailed_specs_de(full_text, full_text)
-        if specs_de:
-            specs_de['product_id'] = sku
-            specs_de['language'] = 'de'
-            all_specs_de.append(specs_de)
-
-        specs_fr = extract_detailed_specs_fr(full_text, full_text)
-        if specs_fr:
-            specs_fr['product_id'] = sku
-            specs_fr['language'] = 'fr'
-            all_specs_fr.append(specs_fr)
-
-        defined_specs = [s for s in [specs_en, specs_fr, specs_de] if s]
-        total_fields = sum(len(s) for s in defined_specs)
-        if total_fields < 12:
-            print(f"⚠️ Low yield for {sku} ({total_fields} fields); review manual.")
+        content_hash = hasher.digest(Path(pdf_folder) / pdf_file)
+        cached = cache["pdfs"].get(pdf_file)
+        if cached and cached["hash"] == content_hash and cached.get("extractor") == EXTRACTOR_VERSION:
+            extracted[pdf_file] = cached
+            reused += 1
+        else:
+            extracted[pdf_file] = {"hash": content_hash, "extractor": EXTRACTOR_VERSION,
+                                   "specs": extract_pdf_specs(pdf_folder, pdf_file)}
+
+    # Entries for deleted PDFs are dropped with the old cache
+    cache["pdfs"] = extracted
+    cache["files"] = {k: v for k, v in cache["files"].items() if Path(k).name in extracted}
+    save_extraction_cache(raw_output_folder, cache)
+    logger.info("♻️ Reused cached specs for {} of {} PDFs", reused, len(pdf_files))
+
+    all_specs_en = [e["specs"]["en"] for e in extracted.values() if e["specs"] and e["specs"]["en"]]
+    all_specs_fr = [e["specs"]["fr"] for e in extracted.values() if e["specs"] and e["specs"]["fr"]]
+    all_specs_de = [e["specs"]["de"] for e in extracted.values() if e["specs"] and e["specs"]["de"]]
 
     if all_specs_en:
         with open(en_output_file, "w", encoding="utf-8") as f:
             json.dump(all_specs_en, f, indent=2, ensure_ascii=False)
-        print(f"✅ English specs saved to {en_output_file} ({len(all_specs_en)} entries)")
+        logger.info("✅ English specs saved to {} ({} entries)", en_output_file, len(all_specs_en))
 
     if all_specs_fr:
         with open(fr_output_file, "w", encoding="utf-8") as f:
             json.dump(all_specs_fr, f, indent=2, ensure_ascii=False)
-        print(f"✅ French specs saved to {fr_output_file} ({len(all_specs_fr)} entries)")
+        logger.info("✅ French specs saved to {} ({} entries)", fr_output_file, len(all_specs_fr))
 
     if all_specs_de:
         with open(de_output_file, "w", encoding="utf-8") as f:
             json.dump(all_specs_de, f, indent=2, ensure_ascii=False)
-        print(f"✅ German specs saved to {de_output_file} ({len(all_specs_de)} entries)")
+        logger.info("✅ German specs saved to {} ({} entries)", de_output_file, len(all_specs_de))
 
 if __name__ == "__main__":
     process_all_pdfs(PDF_FOLDER, RAW_OUTPUT_FOLDER, STRUCTURED_OUTPUT_EN_FILE, STRUCTURED_OUTPUT_FR_FILE, STRUCTURED_OUTPUT_DE_FILE)
\ No newline at end of file
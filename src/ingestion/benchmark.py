@@ -0,0 +1,97 @@
+"""
+Ingestion throughput against the local fake Magento (src/utils/fake_magento.py).
+
+Three phases, each timed with the server's request counts by endpoint and
+status (so retries from injected 401 / 429 / 5xx show up):
+
+- full pull      magento_full_pull.pull_all (products + configurable / bundle children)
+- initial delta  sync_manager.delta_sync from an empty sync state (every product)
+- delta          delta_sync after `touch` products changed
+
+The pipeline functions use relative data/ paths, so the run happens in a
+temporary working directory; results go to
+data/eval/bench_results/ingest_<timestamp>.json.
+"""
+
+import json
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.utils.fake_magento import FakeCatalog, FakeMagentoServer, create_fake_magento
+
+BENCH_RESULTS_DIR = Path("data/eval/bench_results")
+
+
+def _phase(app, func):
+    app.state.stats.clear()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    requests = {k: v for k, v in app.state.stats.items() if k != "seconds"}
+    return result, {
+        "seconds": seconds,
+        "requests": sum(requests.values()),
+        "requests_by_status": requests,
+        "server_seconds": app.state.stats["seconds"],
+    }
+
+
+def run_ingest_benchmark(products=2000, page_size=100, touch=100, latency_ms=5.0, jitter_ms=0.0, error_401=0.0,
+                         error_429=0.0, error_5xx=0.0, seed=0, output_dir=BENCH_RESULTS_DIR):
+    from src.ingestion.magento_full_pull import pull_all
+    from src.ingestion.sync_manager import delta_sync
+    from src.utils import magento_client
+
+    catalog = FakeCatalog(products, seed=seed)
+    app = create_fake_magento(catalog, latency_ms=latency_ms, jitter_ms=jitter_ms, error_401=error_401,
+                              error_429=error_429, error_5xx=error_5xx, retry_after=0, seed=seed)
+    output_dir = Path(output_dir).resolve()
+    results = {
+        "run_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "catalog": {"products": len(catalog), "configurables": len(catalog.children),
+                    "bundles": len(catalog.bundles)},
+        "settings": {"page_size": page_size, "touch": touch, "latency_ms": latency_ms, "jitter_ms": jitter_ms,
+                     "error_401": error_401, "error_429": error_429, "error_5xx": error_5xx},
+        "phases": {},
+    }
+
+    cwd, env = os.getcwd(), dict(os.environ)
+    with FakeMagentoServer(app) as url, tempfile.TemporaryDirectory() as workdir:
+        os.environ.update({"MAGENTO_BASE_URL": url, "MAGENTO_ADMIN_USERNAME": "bench",
+                           "MAGENTO_ADMIN_PASSWORD": "bench"})
+        magento_client.get_client.cache_clear()
+        os.chdir(workdir)
+        try:
+            pulled, stats = _phase(app, lambda: pull_all(page_size=page_size, page_delay=0))
+            results["phases"]["full_pull"] = {**stats, "products": len(pulled),
+                                              "products_per_s": len(pulled) / stats["seconds"]}
+
+            _, stats = _phase(app, lambda: delta_sync(page_size=page_size))
+            results["phases"]["initial_delta"] = {**stats, "products": len(catalog),
+                                                  "products_per_s": len(catalog) / stats["seconds"]}
+
+            touched = catalog.touch(touch)
+            _, stats = _phase(app, lambda: delta_sync(page_size=page_size))
+            results["phases"]["delta"] = {**stats, "products": len(touched),
+                                          "products_per_s": len(touched) / stats["seconds"]}
+        finally:
+            os.chdir(cwd)
+            os.environ.clear()
+            os.environ.update(env)
+            magento_client.get_client.cache_clear()
+
+    for name, phase in results["phases"].items():
+        print(f"📊 {name}: {phase['products']} products in {phase['seconds']:.2f}s "
+              f"({phase['products_per_s']:.0f}/s, {phase['requests']} requests)")
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_file = output_dir / f"ingest_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Ingestion benchmark saved → {output_file}")
+    return results
@@ -0,0 +1,46 @@
+import re
+
+
+def normalize_sku_for_lookup(sku: str) -> str:
+    """
+    Robust normalization for SKU to match PDF lookup keys.
+    Examples:
+    DZ4501EC      -> DZ4501-EC
+    DZ45010060EC  -> DZ4501-0060EC
+    DZ4501-60EC   -> DZ4501-0060EC
+    """
+    if not sku:
+        return sku
+
+    # Ensure there's a hyphen before the last alpha suffix (EC, TR, etc.)
+    m = re.match(r"(DZ\d{4})(?:-?(\d{2,4}))?([A-Z]+)$", sku)
+    if m:
+        base, length, suffix = m.groups()
+        if length:
+            length = length.zfill(4)  # pad to 4 digits if needed
+            return f"{base}-{length}{suffix}"
+        else:
+            return f"{base}-{suffix}"
+    return sku
+
+
+def get_parent_sku(sku: str) -> str:
+    """
+    Remove ONLY the length part of the SKU.
+    Keep all feature / mechanism suffixes.
+    """
+    parts = sku.split("-")
+
+    if len(parts) == 1:
+        return sku
+
+    # If last part is numeric (length), remove it
+    if parts[-1].isdigit():
+        return "-".join(parts[:-1])
+
+    # If last part ends with digits (e.g. 0040TR), strip digits only
+    m = re.match(r"(\d+)([A-Z]+)$", parts[-1])
+    if m:
+        return "-".join(parts[:-1] + [m.group(2)])
+
+    return sku
@@ -1,45 +1,51 @@
-from src.utils.magento_client import MagentoClient
+from src.utils.magento_client import get_client
 import json, time, os
+from src.core.logger import logger, sampled
 
-client = MagentoClient()
+# Per-page progress: one line in 10
+page_log = sampled(10)
 
-def fetch_all_products(page_size=100):
+# Pause between pages; 429s are handled by MagentoClient's backoff either way
+PAGE_DELAY_SECONDS = float(os.getenv("MAGENTO_PAGE_DELAY", "1"))
+
+def fetch_all_products(page_size=100, page_delay=PAGE_DELAY_SECONDS):
     all_items = []
     page = 1
 
     while True:
-        print(f"📦 Fetching page {page} ...")
+        page_log.info("📦 Fetching page {} ...", page)
         params = {
             "searchCriteria[currentPage]": page,
             "searchCriteria[pageSize]": page_size,
         }
-        data = client.get("/V1/products", params=params)
+        data = get_client().get("/V1/products", params=params)
         items = data.get("items", [])
         if not items:
             break
         all_items.extend(items)
-        if len(items) < page_size:
+        # total_count also stops stores that answer past-the-end pages with the last page again
+        if len(items) < page_size or len(all_items) >= data.get("total_count", float("inf")):
             break
         page += 1
-        time.sleep(1)
+        time.sleep(page_delay)
     return all_items
 
 
 def fetch_configurable_children(sku: str):
     try:
-        children = client.get(f"/V1/configurable-products/{sku}/children")
+        children = get_client().get(f"/V1/configurable-products/{sku}/children")
         return children if isinstance(children, list) else []
     except Exception as e:
-        print(f"⚠️  Failed to fetch children for {sku}: {e}")
+        logger.warning("⚠️  Failed to fetch children for {}: {}", sku, e)
         return []
 
 
 def fetch_bundle_items(sku: str):
     try:
-        bundle = client.get(f"/V1/bundle-products/{sku}/children")
+        bundle = get_client().get(f"/V1/bundle-products/{sku}/children")
         return bundle if isinstance(bundle, list) else []
     except Exception as e:
-        print(f"⚠️  Failed to fetch bundle items for {sku}: {e}")
+        logger.warning("⚠️  Failed to fetch bundle items for {}: {}", sku, e)
         return []
 
 
@@ -70,18 +76,22 @@ def build_structured_product(product):
     return structured
 
 
-if __name__ == "__main__":
-    print("🚀 Fetching all products from Magento...")
-    products = fetch_all_products()
+def pull_all(output_path="data/raw/magento_products_full.json", page_size=100, page_delay=PAGE_DELAY_SECONDS):
+    logger.info("🚀 Fetching all products from Magento...")
+    products = fetch_all_products(page_size=page_size, page_delay=page_delay)
 
     structured_products = []
     for p in products:
         structured_products.append(build_structured_product(p))
 
-    os.makedirs("data/raw/products", exist_ok=True)
-    output_path = "data/raw/magento_products_full.json"
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
     with open(output_path, "w") as f:
         json.dump(structured_products, f, indent=2)
 
-    print(f"✅ Saved {len(structured_products)} structured products to {output_path}")
+    logger.info("✅ Saved {} structured products to {}", len(structured_products), output_path)
+    return structured_products
+
+
+if __name__ == "__main__":
+    pull_all()
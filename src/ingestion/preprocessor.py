@@ -2,52 +2,37 @@ import json
 from datetime import datetime
 from pathlib import Path
 import re
-from clean.cleaners import clean_text, flatten_products, normalize_capacity, normalize_dimensions
-from clean.transformers import map_product_attributes
+from src.ingestion.clean.cleaners import clean_text, flatten_products, normalize_capacity, normalize_dimensions
+from src.ingestion.clean.transformers import map_product_attributes
+from src.ingestion.clean.sku import normalize_sku_for_lookup, get_parent_sku
 from typing import Dict, Any, List
+from src.core.logger import logger, sampled
+from src.core.profiling import profiled
 
 RAW_DIR = Path("data/raw")
 PROCESSED_DIR = Path("data/processed")
-PDF_EN_FILE = Path("data/datasheets/processed/clean_pdf_json/product_specs_en_fixed.json")  # English only
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)  # Ensure folder exists
+PDF_SPECS_DIR = Path("data/datasheets/processed/clean_pdf_json")
+PDF_EN_FILE = PDF_SPECS_DIR / "product_specs_en_fixed.json"
 
-def normalize_sku_for_lookup(sku: str) -> str:
-    """
-    Robust normalization for SKU to match PDF lookup keys.
-    Examples:
-    DZ4501EC      -> DZ4501-EC
-    DZ45010060EC  -> DZ4501-0060EC
-    DZ4501-60EC   -> DZ4501-0060EC
-    """
-    if not sku:
-        return sku
-
-    # Ensure there's a hyphen before the last alpha suffix (EC, TR, etc.)
-    m = re.match(r"(DZ\d{4})(?:-?(\d{2,4}))?([A-Z]+)$", sku)
-    if m:
-        base, length, suffix = m.groups()
-        if length:
-            length = length.zfill(4)  # pad to 4 digits if needed
-            return f"{base}-{length}{suffix}"
-        else:
-            return f"{base}-{suffix}"
-    return sku
+# Per-SKU corrections: one line in 50
+sku_log = sampled(50)
 
-def load_pdf_specs_en() -> Dict[str, Dict[str, Any]]:
-    """Load only English structured PDF specs and create SKU lookup."""
+def load_pdf_specs(lang: str = "en") -> Dict[str, Dict[str, Any]]:
+    """Load structured PDF specs for one language (en/fr/de) and create SKU lookup."""
     pdf_lookup = {}
+    pdf_file = PDF_SPECS_DIR / f"product_specs_{lang}_fixed.json"
 
-    if not PDF_EN_FILE.exists():
-        print(f"⚠️ English PDF specs file not found: {PDF_EN_FILE} (no PDF enrichment will be applied)")
+    if not pdf_file.exists():
+        logger.warning("⚠️ {} PDF specs file not found: {} (no PDF enrichment will be applied)", lang.upper(), pdf_file)
         return pdf_lookup
 
-    with open(PDF_EN_FILE, "r", encoding="utf-8") as f:
+    with open(pdf_file, "r", encoding="utf-8") as f:
         specs_list = json.load(f)
 
     for spec in specs_list:
         parent_sku = normalize_sku_for_lookup(spec.get("product_id") or spec.get("sku"))
         if parent_sku != spec.get("product_id"):
-            print(f"⚠️ PDF parent SKU corrected: {spec.get('product_id')} -> {parent_sku}")
+            sku_log.info("⚠️ PDF parent SKU corrected: {} -> {}", spec.get('product_id'), parent_sku)
             spec["product_id"] = parent_sku
 
         # Normalize all model SKUs inside
@@ -57,17 +42,22 @@ def load_pdf_specs_en() -> Dict[str, Dict[str, Any]]:
                 if model_sku:
                     normalized_model_sku = normalize_sku_for_lookup(model_sku)
                     if normalized_model_sku != model_sku:
-                        print(f"⚠️ PDF model SKU corrected: {model_sku} -> {normalized_model_sku}")
+                        sku_log.info("⚠️ PDF model SKU corrected: {} -> {}", model_sku, normalized_model_sku)
                         model_entry["model"] = normalized_model_sku
 
         # Use the normalized parent SKU as lookup key
         pdf_lookup[parent_sku] = spec
 
 
-    print(f"✅ Loaded English PDF specs for {len(pdf_lookup)} products")
+    logger.info("✅ Loaded {} PDF specs for {} products", lang.upper(), len(pdf_lookup))
     return pdf_lookup
 
 
+def load_pdf_specs_en() -> Dict[str, Dict[str, Any]]:
+    """English specs drive catalog enrichment; FR/DE datasheets are indexed as passage shards."""
+    return load_pdf_specs("en")
+
+
 
 def clean_escapes(text):
     """Replace common Unicode escape sequences with actual characters."""
@@ -98,27 +88,6 @@ def dedupe_by_sku(items):
                     merged[sku][k] = v
     return list(merged.values())
 
-def get_parent_sku(sku: str) -> str:
-    """
-    Remove ONLY the length part of the SKU.
-    Keep all feature / mechanism suffixes.
-    """
-    parts = sku.split("-")
-
-    if len(parts) == 1:
-        return sku
-
-    # If last part is numeric (length), remove it
-    if parts[-1].isdigit():
-        return "-".join(parts[:-1])
-
-    # If last part ends with digits (e.g. 0040TR), strip digits only
-    m = re.match(r"(\d+)([A-Z]+)$", parts[-1])
-    if m:
-        return "-".join(parts[:-1] + [m.group(2)])
-
-    return sku
-
 def identify_parents_and_children(products: List[Dict[str, Any]], pdf_lookup: Dict[str, Dict[str, Any]]) -> tuple[Dict[str, Dict], Dict[str, List[Dict]]]:
     """
     Identify parent products (those with rich description/features or pdf_specs)
@@ -225,13 +194,14 @@ def clean_product(p: Dict[str, Any]) -> Dict[str, Any]:
     
     return cleaned
 
+@profiled("preprocess_all")
 def preprocess_all():
     input_file = RAW_DIR / "magento_products_full.json"
     output_file = PROCESSED_DIR / "clean_products_with_pdf.json"
     
 
     if not input_file.exists():
-        print(f"❌ No raw data found at {input_file}")
+        logger.error("❌ No raw data found at {}", input_file)
         return
 
     with open(input_file, "r", encoding="utf-8") as f:
@@ -247,7 +217,7 @@ def preprocess_all():
         normalized_sku = normalize_sku_for_lookup(sku)
         pdf_specs = pdf_lookup.get(normalized_sku)
         if pdf_specs is None and normalized_sku != sku:
-            print(f"⚠️ SKU mismatch corrected: {sku} -> {normalized_sku}")
+            sku_log.info("⚠️ SKU mismatch corrected: {} -> {}", sku, normalized_sku)
         if pdf_specs:
             pdf_specs_clean = {k: v for k, v in pdf_specs.items() if k not in ["product_id", "sku", "language"]}
             item["pdf_specs"] = pdf_specs_clean
@@ -255,10 +225,11 @@ def preprocess_all():
     
     cleaned = [clean_product(item) for item in enriched_items]
     
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
     with open(output_file, "w", encoding="utf-8") as f:
         json.dump(cleaned, f, indent=2 , ensure_ascii=False)
 
-    print(f"✅ Cleaned {len(cleaned)} products → saved to {output_file}")
+    logger.info("✅ Cleaned {} products → saved to {}", len(cleaned), output_file)
 
 if __name__ == "__main__":
     preprocess_all()
@@ -1,7 +1,7 @@
 # src/ingestion/save_processor.py
 """
 Data Persistence Module for Magento AI Assistant
-Handles saving cleaned product data to JSON and CSV formats with timestamps and product_id keys.
+Handles saving cleaned product data to JSON, CSV and Parquet formats with timestamps and product_id keys.
 """
 
 import pandas as pd
@@ -10,8 +10,9 @@ from datetime import datetime
 from typing import Optional
 import re
 
+from .snapshot import snapshot_rows, write_snapshot
+
 PROCESSED_DIR = Path("data/processed")
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
 def load_cleaned_data(input_path: Optional[Path] = None) -> pd.DataFrame:
     """
@@ -85,7 +86,8 @@ def serialize_nested_for_csv(row: pd.Series) -> pd.Series:
 
 def save_to_formats(df: pd.DataFrame, output_dir: Optional[Path] = None) -> None:
     """
-    Export DataFrame to JSON (full fidelity) and CSV (tabular).
+    Export DataFrame to JSON (full fidelity), CSV (tabular) and a Parquet snapshot
+    (nested fields kept, column-selective reads; see snapshot.py).
     
     Args:
         df (pd.DataFrame): DataFrame to save.
@@ -96,6 +98,8 @@ def save_to_formats(df: pd.DataFrame, output_dir: Optional[Path] = None) -> None
     
     json_output = output_dir / "magento_products_cleaned.json"
     df.reset_index().to_json(json_output, orient='records', date_format='iso', indent=2)
+    # Before the CSV pass: clean_nested_strings edits the nested dicts in place
+    parquet_output = write_snapshot(df.reset_index(), output_dir / "magento_products_cleaned.parquet")
     
     csv_df = df.reset_index().apply(serialize_nested_for_csv, axis=1)
     csv_output = output_dir / "magento_products_cleaned.csv"
@@ -103,8 +107,10 @@ def save_to_formats(df: pd.DataFrame, output_dir: Optional[Path] = None) -> None
     
     print(f"✅ JSON exported: {json_output} ({len(df)} records)")
     print(f"✅ CSV exported: {csv_output} ({len(df)} records)")
+    print(f"✅ Parquet exported: {parquet_output} ({len(df)} records)")
 
-def validate_exports(json_path: Path, csv_path: Path, original_len: int) -> bool:
+def validate_exports(json_path: Path, csv_path: Path, original_len: int,
+                     parquet_path: Optional[Path] = None) -> bool:
     """
     Verify saved files match original data integrity.
     
@@ -112,6 +118,7 @@ def validate_exports(json_path: Path, csv_path: Path, original_len: int) -> bool
         json_path (Path): JSON file path.
         csv_path (Path): CSV file path.
         original_len (int): Expected row count.
+        parquet_path (Optional[Path]): Parquet snapshot path (row count read from the footer).
     
     Returns:
         bool: True if validation passes.
@@ -126,10 +133,15 @@ def validate_exports(json_path: Path, csv_path: Path, original_len: int) -> bool
         
         print(f"Validation: JSON rows={len(reloaded_json)} (match: {json_match}), "
               f"CSV rows={len(reloaded_csv)} (match: {csv_match})")
+        parquet_match = True
+        if parquet_path is not None:
+            parquet_rows = snapshot_rows(parquet_path)
+            parquet_match = parquet_rows == original_len
+            print(f"Validation: Parquet rows={parquet_rows} (match: {parquet_match})")
         if sample_key:
             print(f"Sample key intact: {sample_key}")
         
-        return json_match and csv_match
+        return json_match and csv_match and parquet_match
     except Exception as e:
         print(f"❌ Validation failed: {e}")
         return False
@@ -150,7 +162,8 @@ def main(input_path: Optional[str] = None) -> None:
         
         json_out = PROCESSED_DIR / "magento_products_cleaned.json"
         csv_out = PROCESSED_DIR / "magento_products_cleaned.csv"
-        if validate_exports(json_out, csv_out, len(df)):
+        parquet_out = PROCESSED_DIR / "magento_products_cleaned.parquet"
+        if validate_exports(json_out, csv_out, len(df), parquet_out):
             print("🎉 Json-save task completed successfully.")
         else:
             print("⚠️ Validation issues detected; check outputs manually.")
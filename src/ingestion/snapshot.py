@@ -0,0 +1,136 @@
+"""
+Columnar snapshot of the processed catalog (Parquet, zstd).
+
+save_to_formats writes magento_products_cleaned.parquet next to the JSON and
+CSV exports. Unlike the CSV, nested fields (capacity, dimensions, pdf_specs,
+custom attributes) stay nested as Arrow structs / lists, and readers load
+only the columns they need:
+
+    load_catalog_records(DOC_COLUMNS)   # embedders: list of product dicts
+    load_catalog_df()                   # sync_manager: full DataFrame
+
+Struct fields are unioned across rows; readers drop the None-valued keys
+this adds. A column that would not read back exactly that way (mixed scalar
+types, empty structs, dicts holding explicit nulls) is stored as JSON text
+and listed in the schema metadata, so every column round-trips.
+"""
+
+import json
+from pathlib import Path
+
+import pandas as pd
+
+PROCESSED_DIR = Path("data/processed")
+CATALOG_PARQUET = PROCESSED_DIR / "magento_products_cleaned.parquet"
+CATALOG_JSON = PROCESSED_DIR / "magento_products_cleaned.json"
+
+JSON_COLUMNS_KEY = b"json_columns"
+
+
+def _to_arrow_column(values):
+    """(Arrow array, stored-as-JSON?) for one column of Python values."""
+    import pyarrow as pa
+
+    values = [None if isinstance(v, float) and v != v else v for v in values]  # NaN -> null
+    try:
+        array = pa.array(values, from_pandas=True)
+        # Nested columns must read back exactly (explicit None values inside dicts would not)
+        if not _has_empty_struct(array.type) and (
+            not _is_nested(array.type) or [_prune(v) for v in array.to_pylist()] == values
+        ):
+            return array, False
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, OverflowError):
+        pass
+    return pa.array([None if v is None else json.dumps(v, default=str) for v in values], pa.string()), True
+
+
+def _is_nested(arrow_type):
+    import pyarrow as pa
+
+    return pa.types.is_struct(arrow_type) or pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type)
+
+
+def _has_empty_struct(arrow_type):
+    """Parquet cannot store a struct without fields (all-{} columns)."""
+    import pyarrow as pa
+
+    if pa.types.is_struct(arrow_type):
+        return arrow_type.num_fields == 0 or any(_has_empty_struct(f.type) for f in arrow_type)
+    if pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type):
+        return _has_empty_struct(arrow_type.value_type)
+    return False
+
+
+def write_snapshot(df: pd.DataFrame, path: Path = CATALOG_PARQUET, compression_level: int = 3) -> Path:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrays, json_columns = {}, []
+    for column in df.columns:
+        arrays[str(column)], as_json = _to_arrow_column(df[column].tolist())
+        if as_json:
+            json_columns.append(str(column))
+
+    table = pa.table(arrays)
+    table = table.replace_schema_metadata({JSON_COLUMNS_KEY: json.dumps(json_columns).encode()})
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    pq.write_table(table, tmp, compression="zstd", compression_level=compression_level)
+    tmp.replace(path)
+    return path
+
+
+def snapshot_rows(path: Path = CATALOG_PARQUET) -> int:
+    """Row count from the Parquet footer (no data read)."""
+    import pyarrow.parquet as pq
+
+    return pq.read_metadata(path).num_rows
+
+
+def _prune(value):
+    """Drop the None-valued keys Arrow adds when it unions struct fields across rows."""
+    if isinstance(value, dict):
+        return {k: _prune(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_prune(v) for v in value]
+    return value
+
+
+def read_snapshot_columns(columns=None, path: Path = CATALOG_PARQUET) -> dict:
+    """{column: [python values]} for the requested columns that exist in the snapshot."""
+    import pyarrow.parquet as pq
+
+    schema = pq.read_schema(path)
+    json_columns = set(json.loads((schema.metadata or {}).get(JSON_COLUMNS_KEY, b"[]")))
+    wanted = [c for c in (columns or schema.names) if c in schema.names]
+    table = pq.read_table(path, columns=wanted)
+
+    data = {}
+    for name in wanted:
+        values = table.column(name).to_pylist()
+        if name in json_columns:
+            data[name] = [None if v is None else json.loads(v) for v in values]
+        elif _is_nested(table.schema.field(name).type):
+            data[name] = [_prune(v) for v in values]
+        else:
+            data[name] = values
+    return data
+
+
+def load_catalog_records(columns=None, path: Path = CATALOG_PARQUET, json_path: Path = CATALOG_JSON) -> list:
+    """Product dicts (only `columns`, when given). Falls back to the JSON export for older runs."""
+    if not Path(path).exists():
+        if not Path(json_path).exists():
+            raise FileNotFoundError(f"❌ Missing processed catalog: {path} (or {json_path})")
+        with open(json_path, "r") as f:
+            return json.load(f)
+
+    data = read_snapshot_columns(columns, path)
+    names = list(data)
+    return [dict(zip(names, row)) for row in zip(*data.values())]
+
+
+def load_catalog_df(columns=None, path: Path = CATALOG_PARQUET) -> pd.DataFrame:
+    return pd.DataFrame(read_snapshot_columns(columns, path))
@@ -0,0 +1,150 @@
+"""
+The catalog refresh as pipeline stages (see src/core/pipeline.py).
+
+    magento-pull ─────────────┐
+    pdf-extract → pdf-fix-skus ┴→ preprocess → save → embed-products → build-index
+                                                    ├→ embed-langchain
+                                                    └→ build-passages (per language)
+
+Stage functions are imported when the stage runs, so listing or planning
+the pipeline loads neither torch nor the Magento client. The processed
+catalog, canonical document code and models are part of the fingerprints
+of the embedding stages: changing documents.py or a model rebuilds them.
+Likewise pdf_reader.py is an input of pdf-extract.
+"""
+
+from pathlib import Path
+
+from src.core.pipeline import Pipeline, Stage
+
+RAW_PRODUCTS_FILE = Path("data/raw/magento_products_full.json")
+PDF_FOLDER = Path("scripts/pdf/datasheets")
+PDF_SPECS_DIR = Path("data/datasheets/processed/clean_pdf_json")
+CLEAN_PRODUCTS_FILE = Path("data/processed/clean_products_with_pdf.json")
+CATALOG_JSON = Path("data/processed/magento_products_cleaned.json")
+CATALOG_CSV = Path("data/processed/magento_products_cleaned.csv")
+CATALOG_PARQUET = Path("data/processed/magento_products_cleaned.parquet")
+EMBEDDING_DIR = Path("data/embeddings")
+
+DOCUMENTS_CODE = Path("src/embeddings/documents.py")
+PDF_READER_CODE = Path("src/ingestion/PDF/pdf_reader.py")
+PASSAGE_LANGUAGES = ("en", "fr", "de")
+
+
+def specs_file(lang, fixed=False):
+    return PDF_SPECS_DIR / f"product_specs_{lang}{'_fixed' if fixed else ''}.json"
+
+
+# -----------------------------
+# Stage bodies
+# -----------------------------
+def magento_catalog_state():
+    """Product count + newest updated_at: one small API call instead of a full pull."""
+    from src.utils.magento_client import get_client
+
+    data = get_client().get("/V1/products", params={
+        "searchCriteria[currentPage]": 1,
+        "searchCriteria[pageSize]": 1,
+        "searchCriteria[sortOrders][0][field]": "updated_at",
+        "searchCriteria[sortOrders][0][direction]": "DESC",
+        "fields": "items[sku,updated_at],total_count",
+    })
+    items = data.get("items") or [{}]
+    return {"total_count": data.get("total_count"), "latest_update": items[0].get("updated_at")}
+
+
+def run_magento_pull():
+    from src.ingestion.magento_full_pull import pull_all
+    pull_all(str(RAW_PRODUCTS_FILE))
+
+
+def run_pdf_extract():
+    from src.ingestion.PDF.pdf_reader import RAW_OUTPUT_FOLDER, process_all_pdfs
+    process_all_pdfs(str(PDF_FOLDER), RAW_OUTPUT_FOLDER, *(str(specs_file(lang)) for lang in PASSAGE_LANGUAGES))
+
+
+def run_pdf_fix_skus():
+    from scripts.pdf.normalised_sku import fix_pdf_skus
+    fix_pdf_skus(specs_file("en"), specs_file("en", fixed=True))
+
+
+def run_preprocess():
+    from src.ingestion.preprocessor import preprocess_all
+    preprocess_all()
+
+
+def run_save():
+    from src.ingestion.save_processor import main
+    main(str(CLEAN_PRODUCTS_FILE))
+
+
+def run_embed_products():
+    from src.embeddings.embedder import ProductEmbedder
+    ProductEmbedder().generate_embeddings()
+
+
+def run_build_index():
+    from src.search.build_faiss_index import main
+    main()
+
+
+def run_embed_langchain():
+    from src.embeddings.build_langchain_faiss import ProductFAISSBuilder
+    ProductFAISSBuilder().build_and_save_faiss()
+
+
+def vector_storage():
+    """FAISS_STORAGE / FAISS_PCA_DIM: part of the fingerprint of every stage that writes an index."""
+    from src.search.build_faiss_index import FAISS_PCA_DIM, FAISS_STORAGE
+    return {"storage": FAISS_STORAGE, "pca_dim": FAISS_PCA_DIM}
+
+
+def passage_stage(lang):
+    from src.embeddings.passage_index import DEFAULT_MODELS, passage_paths
+
+    def run():
+        from src.embeddings.passage_index import PassageIndexBuilder
+        PassageIndexBuilder(lang).build_and_save()
+
+    return Stage(
+        f"build-passages-{lang}", run,
+        inputs=[specs_file(lang, fixed=lang == "en"), EMBEDDING_DIR / "product_metadata.json", DOCUMENTS_CODE],
+        outputs=passage_paths(lang),
+        params={"model": DEFAULT_MODELS.get(lang, DEFAULT_MODELS["fr"]), **vector_storage()},
+        lock="index_info",
+    )
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+def build_pipeline(**kwargs):
+    from src.embeddings.documents import DOC_VERSION
+    from src.embeddings.embedder import EMBEDDING_DTYPE
+
+    stages = [
+        Stage("magento-pull", run_magento_pull, outputs=[RAW_PRODUCTS_FILE], probe=magento_catalog_state),
+        Stage("pdf-extract", run_pdf_extract, inputs=[PDF_FOLDER, PDF_READER_CODE],
+              outputs=[specs_file(lang) for lang in PASSAGE_LANGUAGES]),
+        Stage("pdf-fix-skus", run_pdf_fix_skus, inputs=[specs_file("en")], outputs=[specs_file("en", fixed=True)]),
+        Stage("preprocess", run_preprocess, inputs=[RAW_PRODUCTS_FILE, specs_file("en", fixed=True)],
+              outputs=[CLEAN_PRODUCTS_FILE]),
+        Stage("save", run_save, inputs=[CLEAN_PRODUCTS_FILE], outputs=[CATALOG_JSON, CATALOG_CSV, CATALOG_PARQUET]),
+        # The three builders rewrite index_info.json (and two of them product_metadata.json): never concurrently
+        Stage("embed-products", run_embed_products, inputs=[CATALOG_PARQUET, DOCUMENTS_CODE],
+              outputs=[EMBEDDING_DIR / "product_embeddings.npy", EMBEDDING_DIR / "product_metadata.json"],
+              params={"doc_version": DOC_VERSION, "model": "sentence-transformers/all-MiniLM-L6-v2",
+                      "dtype": EMBEDDING_DTYPE},
+              lock="index_info"),
+        Stage("build-index", run_build_index, inputs=[EMBEDDING_DIR / "product_embeddings.npy"],
+              outputs=[EMBEDDING_DIR / "faiss_index.bin", EMBEDDING_DIR / "faiss_index_report.json"],
+              params=vector_storage()),
+        Stage("embed-langchain", run_embed_langchain, inputs=[CATALOG_PARQUET, DOCUMENTS_CODE],
+              outputs=[EMBEDDING_DIR / "index.faiss", EMBEDDING_DIR / "docstore.jsonl",
+                       EMBEDDING_DIR / "docstore_offsets.npy", EMBEDDING_DIR / "docstore_metadata.json",
+                       EMBEDDING_DIR / "bm25_index.npz", EMBEDDING_DIR / "bm25_vocab.json"],
+              params={"doc_version": DOC_VERSION, "model": "sentence-transformers/all-MiniLM-L12-v2"},
+              after=["embed-products"], lock="index_info"),
+        *(passage_stage(lang) for lang in PASSAGE_LANGUAGES),
+    ]
+    return Pipeline(stages, **kwargs)
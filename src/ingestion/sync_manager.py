@@ -3,10 +3,11 @@ from datetime import datetime
 from pathlib import Path
 import pandas as pd
 import argparse
-from src.utils.magento_client import MagentoClient  # For API access
+from src.utils.magento_client import get_client  # For API access
+from src.core.logger import logger
 from .save_processor import save_to_formats, embed_keys_and_timestamps  # For persistence
+from .snapshot import load_catalog_df  # Nested columns survive the reload (unlike the CSV)
 
-client = MagentoClient()
 SYNC_CONFIG_PATH = Path("data/sync_config.json")  # JSON for robustness
 
 def get_last_sync_date():
@@ -23,7 +24,7 @@ def update_last_sync_date(date: datetime):
     SYNC_CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
     with open(SYNC_CONFIG_PATH, "w") as f:
         json.dump(config, f, indent=2)
-    print(f"Updated sync config: last_sync_date = {date.isoformat()}")
+    logger.info("Updated sync config: last_sync_date = {}", date.isoformat())
 
 def fetch_delta_from_api(last_sync: datetime, page_size: int = 100) -> list:
     """Fetch deltas directly from Magento API."""
@@ -37,15 +38,15 @@ def fetch_delta_from_api(last_sync: datetime, page_size: int = 100) -> list:
             "searchCriteria[filterGroups][0][filters][0][condition_type]": "gt",  # Operator for > last_sync
             "searchCriteria[filterGroups][0][filters][0][value]": last_sync.isoformat() + "Z",  # UTC ISO timestamp
         }
-        data = client.get("/V1/products", params=params)
+        data = get_client().get("/V1/products", params=params)
         items = data.get("items", [])
         if not items:
             break
         all_delta.extend(items)
-        if len(items) < page_size:
+        if len(items) < page_size or len(all_delta) >= data.get("total_count", float("inf")):
             break
         page += 1
-    print(f"Fetched {len(all_delta)} delta products since {last_sync.isoformat()}")
+    logger.info("Fetched {} delta products since {}", len(all_delta), last_sync.isoformat())
     return all_delta
 
 def merge_deltas(existing_df: pd.DataFrame, delta_products: list) -> pd.DataFrame:
@@ -76,13 +77,16 @@ def merge_deltas(existing_df: pd.DataFrame, delta_products: list) -> pd.DataFram
     if new_skus:
         new_df = delta_df.loc[list(new_skus)]
         existing_df = pd.concat([existing_df, new_df], sort=False)  # sort=False preserves order
-        print(f"Appended {len(new_skus)} new SKUs")
+        logger.info("Appended {} new SKUs", len(new_skus))
     
     # Update overlapping using pd.update (safe, column-aligned overwrite)
     if overlapping_skus:
         overlapping_df = delta_df.loc[list(overlapping_skus)]
+        # Object dtype lets the API's lists / dicts replace typed (or CSV string) columns
+        shared = existing_df.columns.intersection(overlapping_df.columns)
+        existing_df[shared] = existing_df[shared].astype(object)
         existing_df.update(overlapping_df)  # Overwrites matching columns; ignores extras
-        print(f"Updated {len(overlapping_skus)} existing SKUs")
+        logger.info("Updated {} existing SKUs", len(overlapping_skus))
     
     return existing_df.reset_index()
 
@@ -93,8 +97,11 @@ def delta_sync(page_size: int = 100):
     
     # Load existing cleaned data
     processed_dir = Path("data/processed")
+    existing_parquet = processed_dir / "magento_products_cleaned.parquet"
     existing_csv = processed_dir / "magento_products_cleaned.csv"
-    if existing_csv.exists():
+    if existing_parquet.exists():
+        existing_df = load_catalog_df(path=existing_parquet)
+    elif existing_csv.exists():
         existing_df = pd.read_csv(existing_csv)
     else:
         existing_df = pd.DataFrame()
@@ -1,6 +1,49 @@
-from fastapi import FastAPI
+import random
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+
+from src.api.routes import health
+from src.core.profiling import (
+    PROFILE_HEADER, PROFILE_SAMPLE_RATE, Profiler, end_request_profiling, profile_request, request_profile_slot,
+)
 
 app = FastAPI()
+app.include_router(health.router)
+
+
+@app.middleware("http")
+async def profile_sampled_requests(request: Request, call_next):
+    """
+    Opt-in request profiling: `X-Profile: 1` (when PROFILE_HEADER=1) or a
+    PROFILE_SAMPLE_RATE fraction of requests. The request's @profiled
+    functions (e.g. ProductRAGService.ask on the threadpool) write profiles;
+    the event-loop side is profiled here without memory tracing.
+
+    Concurrent requests would share the loop thread's profiler, so while one
+    request is profiled the others are served unprofiled. X-Profile-Artifact
+    names the artifact stem (files in PROFILE_DIR), never a server path.
+    """
+    wanted = (PROFILE_HEADER and request.headers.get("x-profile") == "1") or (
+        PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE
+    )
+    slot = request_profile_slot() if wanted else None
+    if slot is None:
+        return await call_next(request)
+
+    try:
+        token = profile_request()
+        profiler = Profiler(f"api_{request.url.path}", memory=False).start()
+        try:
+            response = await call_next(request)
+        finally:
+            artifacts = profiler.stop()
+            end_request_profiling(token)
+    finally:
+        slot.release()
+    response.headers["X-Profile-Artifact"] = Path(artifacts["pstats"]).stem
+    return response
+
 
 @app.get("/")
 def read_root():
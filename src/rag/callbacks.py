@@ -0,0 +1,49 @@
+"""LangChain callbacks feeding the LLM histograms in src/core/metrics.py."""
+
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.core.metrics import LLM_SECONDS, LLM_TTFT_SECONDS, PROMPT_TOKENS
+
+
+class LLMTimingCallback(BaseCallbackHandler):
+    """
+    Records LLM time to first token, total time and prompt tokens.
+    TTFT needs a streaming model (build_llm sets streaming=True); state is
+    keyed by run_id so one handler can serve concurrent requests.
+    """
+
+    def __init__(self):
+        self._runs = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        # Estimate (~4 chars per token) in case the provider reports no usage
+        chars = sum(len(str(m.content)) for batch in messages for m in batch)
+        self._runs[run_id] = [time.perf_counter(), False, chars // 4]
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run and not run[1]:
+            run[1] = True
+            LLM_TTFT_SECONDS.observe(time.perf_counter() - run[0])
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        LLM_SECONDS.observe(time.perf_counter() - run[0])
+
+        prompt_tokens = run[2]
+        try:
+            usage = response.generations[0][0].message.usage_metadata or {}
+            prompt_tokens = usage.get("input_tokens") or prompt_tokens
+        except (AttributeError, IndexError):
+            pass
+        PROMPT_TOKENS.observe(prompt_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._runs.pop(run_id, None)
+
+
+LLM_TIMING = LLMTimingCallback()
@@ -1,6 +1,12 @@
+import os
+import sys
+import json
+from datetime import datetime
+
 from src.rag.formatter import format_rag_response
+from src.rag.guard import GUARD_THRESHOLDS_FILE, best_rerank_score, best_similarity, fit_threshold
 from src.rag.rag_chain import build_rag_chain
-import os
+
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 TEST_QUERIES = {
     "A":"kitchen drawers",
@@ -10,6 +16,28 @@ TEST_QUERIES = {
     "E":"how to cook pasta"
 }
 
+# Labelled guard set: should the assistant answer from the catalog (True) or say "I don't know" (False)?
+GUARD_EVAL_SET = [
+    ("kitchen drawers", True),
+    ("large pocket door system", True),
+    ("heavy duty drawer slides 200 kg", True),
+    ("stainless steel slides for marine use", True),
+    ("soft close slides for furniture", True),
+    ("locking slide for equipment rack", True),
+    ("full extension slides 500 mm", True),
+    ("linear motion rail system", True),
+    ("push to open drawer runner", True),
+    ("what is the load rating of DZ3832", True),
+    ("energy efficient freezer", False),
+    ("does this include warranty?", False),
+    ("how to cook pasta", False),
+    ("550 liter chest freezer", False),
+    ("best smartphone under 500", False),
+    ("car tyre pressure", False),
+    ("what time does the store open", False),
+    ("recipe for chocolate cake", False),
+]
+
 
 def run_eval():
     qa = build_rag_chain()
@@ -17,13 +45,77 @@ def run_eval():
     for key, query in TEST_QUERIES.items():
         print("=" * 60)
         print(f"Q {key}: {query}")
-        
+
         # Invoke with correct dict format
         res = qa.invoke({"input": query})
-        
+
         print(format_rag_response(res))
         print("\n")
 
 
+def fit_guard_thresholds(top_n=20, top_k=4, output_file=GUARD_THRESHOLDS_FILE):
+    """
+    Route, retrieve and rerank every guard query the way ProductRAGService does
+    (no LLM) and fit the rerank and similarity thresholds on the top_k reranked
+    docs, i.e. what is_confident_enough sees. Queries the service answers
+    without the guard (fixed-reply intents, SKU index hits) are left out.
+    """
+    from src.conversation.intent_detector import IntentDetector
+    from src.embeddings.ranker import CrossEncoderReranker
+    from src.rag.retriever import ProductRetriever
+    from src.rag.service import FIXED_REPLIES, retrieve_candidates
+
+    retriever = ProductRetriever()
+    intents = IntentDetector(retriever.embeddings.embed_documents, retriever.embed_query)
+    # No time budget here: every query must be scored
+    reranker = CrossEncoderReranker(time_budget_ms=None)
+
+    scores = {"rerank": ([], []), "similarity": ([], [])}
+    fitted = 0
+    for query, answerable in GUARD_EVAL_SET:
+        intent = intents.detect(query)
+        if intent == "sku_lookup":
+            if retriever.search_sku(query, k=top_n):
+                print(f"⏭️ {query!r}: answered from the SKU index")
+                continue
+            intent = "product_search"
+        if intent in FIXED_REPLIES:
+            print(f"⏭️ {query!r}: fixed {intent} reply")
+            continue
+
+        candidates = retrieve_candidates(retriever, intent, query, top_n=top_n)
+        reranked = reranker.rerank(query, candidates, top_n=top_k)
+        rerank, similarity = best_rerank_score(reranked), best_similarity(reranked)
+        print(f"{'✅' if answerable else '🚫'} {query!r} ({intent}): rerank={rerank}, similarity={similarity}")
+        fitted += 1
+
+        bucket = 0 if answerable else 1
+        if rerank is not None:
+            scores["rerank"][bucket].append(rerank)
+        if similarity is not None:
+            scores["similarity"][bucket].append(similarity)
+
+    thresholds, balanced_accuracy = {}, {}
+    for name, (positive, negative) in scores.items():
+        if positive and negative:
+            thresholds[name], balanced_accuracy[name] = fit_threshold(positive, negative)
+        else:
+            print(f"⚠️ No {name} threshold fit: {len(positive)} answerable / {len(negative)} unanswerable guarded queries")
+
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w") as f:
+        json.dump({
+            "thresholds": thresholds,
+            "balanced_accuracy": balanced_accuracy,
+            "queries": fitted,
+            "fitted_at": datetime.utcnow().isoformat(),
+        }, f, indent=2)
+    print(f"💾 Guard thresholds saved → {output_file}: {thresholds}")
+    return thresholds
+
+
 if __name__ == "__main__":
-    run_eval()
+    if len(sys.argv) > 1 and sys.argv[1] == "fit-guard":
+        fit_guard_thresholds()
+    else:
+        run_eval()
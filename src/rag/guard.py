@@ -1,5 +1,73 @@
-def is_confident_enough(docs, min_docs=2):
-    return len(docs) >= min_docs
+"""
+Relevance guard run before generation.
 
-def is_relevant_enough(docs, min_docs=1):
-    return len(docs) >= min_docs
+Thresholds are fit offline on the labelled guard set in src/rag/eval.py
+(`python -m src.rag.eval fit-guard`) and stored in guard_thresholds.json:
+"rerank" applies to cross-encoder scores, "similarity" to dense cosine
+similarity when reranking was skipped.
+"""
+
+import json
+import numpy as np
+from pathlib import Path
+
+GUARD_THRESHOLDS_FILE = Path("data/eval/guard_thresholds.json")
+
+# Used until fit_guard_thresholds has been run
+DEFAULT_THRESHOLDS = {"rerank": 0.2, "similarity": 0.35}
+
+
+def load_guard_thresholds(path=GUARD_THRESHOLDS_FILE):
+    if not Path(path).exists():
+        return dict(DEFAULT_THRESHOLDS)
+    with open(path, "r") as f:
+        return {**DEFAULT_THRESHOLDS, **json.load(f)["thresholds"]}
+
+
+def best_rerank_score(docs):
+    """Highest cross-encoder score among docs, or None if they were not reranked."""
+    scores = [doc.metadata["rerank_score"] for doc in docs if doc.metadata.get("rerank_score") is not None]
+    return max(scores) if scores else None
+
+
+def best_similarity(docs):
+    """Highest dense similarity among docs, or None if no doc came from the dense index."""
+    scores = [doc.metadata["similarity"] for doc in docs if doc.metadata.get("similarity") is not None]
+    return max(scores) if scores else None
+
+
+def is_confident_enough(docs, thresholds=None, min_score=None):
+    """
+    Confident when the best rerank score clears the rerank threshold
+    (`min_score` overrides it). If reranking was skipped (time budget), the
+    best dense similarity must clear the similarity threshold instead.
+    """
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+    best = best_rerank_score(docs)
+    if best is not None:
+        return best >= (thresholds["rerank"] if min_score is None else min_score)
+    return is_relevant_enough(docs, thresholds)
+
+
+def is_relevant_enough(docs, thresholds=None):
+    best = best_similarity(docs)
+    return best is not None and best >= (thresholds or DEFAULT_THRESHOLDS)["similarity"]
+
+
+def fit_threshold(positive_scores, negative_scores):
+    """
+    Threshold separating answerable (positive) from unanswerable (negative)
+    queries' best scores, maximising balanced accuracy. Ties go to the
+    midpoint between neighbouring scores.
+    """
+    pos = np.asarray(positive_scores, dtype="float64")
+    neg = np.asarray(negative_scores, dtype="float64")
+    values = np.unique(np.concatenate([pos, neg]))
+    candidates = np.concatenate([[values[0] - 1e-6], (values[:-1] + values[1:]) / 2, [values[-1] + 1e-6]])
+
+    # Score >= threshold means "answer"
+    tpr = (pos[None, :] >= candidates[:, None]).mean(axis=1)
+    tnr = (neg[None, :] < candidates[:, None]).mean(axis=1)
+    balanced = (tpr + tnr) / 2
+    best = int(np.argmax(balanced))
+    return float(candidates[best]), float(balanced[best])
@@ -1,4 +1,4 @@
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 # Custom prompt (matches your original intent)
 PRODUCT_QA_PROMPT = ChatPromptTemplate.from_messages(
@@ -15,6 +15,8 @@ Product Information:
 
 Answer (clear, factual, concise):
 """),
+        # Bounded session history from MemoryManager (summary + recent turns)
+        MessagesPlaceholder("history", optional=True),
         ("human", "{input}"),  # Note: LangChain expects {input} instead of {question}
     ]
 )
\ No newline at end of file
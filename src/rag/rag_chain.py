@@ -1,46 +1,54 @@
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_classic.chains import create_retrieval_chain
-from langchain_classic.chains.combine_documents import create_stuff_documents_chain
-
-from src.rag.retriever import ProductRetriever
-
 import os
 
+# Provider SDKs, chains and the retriever are imported inside the builders:
+# importing this module must stay cheap (manage.py --help, API startup).
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-def build_rag_chain():
-    # Load your FAISS retriever
-    retriever = ProductRetriever().get_retriever(top_k=5)
+def build_llm():
+    from langchain_openai import ChatOpenAI
+    from src.rag.callbacks import LLM_TIMING
 
-    # LLM
-    llm = ChatOpenAI(
+    return ChatOpenAI(
         model_name="gpt-3.5-turbo",
         temperature=0.2,
         openai_api_key=OPENAI_API_KEY,
+        # Streaming lets the timing callback see the first token (TTFT)
+        streaming=True,
+        stream_usage=True,
+        callbacks=[LLM_TIMING],
     )
 
-    # Custom prompt (use this one!)
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", """
-You are a Magento product expert.
-
-Use the following product information to answer the question.
-If the retrieved information contains relevant product details that answer the question, provide a clear, factual, concise response.
-If the retrieved information is not relevant to the question or does not contain the answer, say "I don't know".
 
-Product Information:
-{context}
+def build_summary_llm():
+    """Small non-streaming model for conversation summaries: kept out of the LLM timing metrics."""
+    from langchain_openai import ChatOpenAI
 
-Answer (clear, factual, concise):
-"""),
-            ("human", "{input}"),
-        ]
+    return ChatOpenAI(
+        model_name="gpt-3.5-turbo",
+        temperature=0,
+        openai_api_key=OPENAI_API_KEY,
+        max_tokens=200,
     )
 
+
+def build_answer_chain(llm=None):
+    """Generation-only chain: takes {"input", "context": [Document]} and returns the answer string."""
+    from langchain_classic.chains.combine_documents import create_stuff_documents_chain
+    from src.rag.prompts import PRODUCT_QA_PROMPT
+
+    return create_stuff_documents_chain(llm or build_llm(), PRODUCT_QA_PROMPT)
+
+
+def build_rag_chain():
+    from langchain_classic.chains import create_retrieval_chain
+    from src.rag.retriever import ProductRetriever
+
+    # Load your FAISS retriever
+    retriever = ProductRetriever().get_retriever(top_k=5)
+
     # Build the chains
-    question_answer_chain = create_stuff_documents_chain(llm, prompt)
+    question_answer_chain = build_answer_chain()
     rag_chain = create_retrieval_chain(retriever, question_answer_chain)
 
     return rag_chain
@@ -1,11 +1,22 @@
 import json
 import numpy as np
+from functools import lru_cache
 from pathlib import Path
 
 import faiss
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
+from typing import Any
 from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from src.core.metrics import (
+    BM25_SECONDS, BUNDLE_ANN_SECONDS, QUERY_CACHE_HITS, QUERY_CACHE_MISSES, RETRIEVER_ENCODE_SECONDS,
+    RETRIEVER_SEARCH_SECONDS,
+)
+from src.embeddings.documents import is_current, read_index_info
+from src.embeddings.encoders import load_langchain_embeddings
+from src.search.language_router import LanguageRouter
+from src.search.lexical_index import BM25_MATRIX_FILE, BM25Index, reciprocal_rank_fusion
+from src.search.sku_index import SKU_MATCH_SCORES, SkuIndex, looks_like_sku, search_families
 # from langchain_community.vectorstores.utils import InMemoryDocstore
 
 
@@ -16,38 +27,200 @@ INDEX_FILE = EMBED_DIR / "faiss_index.bin"
 EMBEDDINGS_FILE = EMBED_DIR / "product_embeddings.npy"
 META_FILE = EMBED_DIR / "product_metadata.json"
 
+# Model ProductFAISSBuilder uses when index_info.json does not say otherwise
+DEFAULT_BUNDLE_MODEL = "sentence-transformers/all-MiniLM-L12-v2"
+
+
+
+def distance_to_similarity(distances):
+    """Squared L2 distance between unit vectors -> cosine similarity."""
+    return 1.0 - np.asarray(distances, dtype="float32") / 2.0
 
 
 class ProductRetriever:
-    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2"):
-        print("🧠 Loading embedding model...")
-        self.embeddings = HuggingFaceEmbeddings(model_name=model_name)
+    """
+    Retrieval over the LangChain FAISS bundle written by ProductFAISSBuilder.
+
+    Documents carry the canonical product text (src/embeddings/documents.py),
+    and queries are embedded with the model recorded in index_info.json.
+    Every returned Document has metadata["similarity"] (dense cosine, None for
+    lexical-only hits) for the relevance guard.
+    """
+    def __init__(self, model_name=None, backend=None):
+        info = read_index_info("langchain_faiss")
+        is_current("langchain_faiss")
+        model_name = model_name or info.get("model", DEFAULT_BUNDLE_MODEL)
+
+        print(f"🧠 Loading embedding model: {model_name}")
+        self.embeddings = load_langchain_embeddings(model_name, backend=backend)
+        # Intent detection, retrieval and passage routing all embed the same query
+        self._cached_embed_query = lru_cache(maxsize=1024)(self._embed_query)
+
+        # langchain_community is slow to import; only pay for it when a retriever is built
+        from src.embeddings.docstore import load_docstore_metadata, load_vectorstore
+
+        print("🔗 Loading FAISS vectorstore...")
+        # Documents are hydrated from docstore.jsonl only for the rows a search returns
+        self.vectorstore = load_vectorstore(self.embeddings, EMBED_DIR)
 
         print("📦 Loading metadata...")
-        with open(META_FILE, "r") as f:
-            self.metadata = json.load(f)
+        self.metadata = load_docstore_metadata(EMBED_DIR)
+        self.skus = SkuIndex(self.metadata)
+
+        self.bm25 = None
+        if BM25_MATRIX_FILE.exists():
+            bm25 = BM25Index.load()
+            if bm25.size == len(self.metadata):
+                self.bm25 = bm25
+                print("🔤 BM25 index loaded — hybrid retrieval enabled")
+            else:
+                print(f"⚠️ BM25 index has {bm25.size} docs but metadata has {len(self.metadata)}; hybrid retrieval disabled")
+
+        self.passages = LanguageRouter(embedders={model_name: self.embed_query})
+        if self.passages:
+            print(f"🌐 Passage shards loaded: {', '.join(self.passages.shards)}")
 
-        print("🔢 Loading vectors...")
-        vectors = np.load(EMBEDDINGS_FILE).astype("float32")
+        print("✅ Retriever ready!")
 
-        print("🔗 Creating FAISS vectorstore from documents...")
-        docs = [
-            Document(page_content=f"{meta['name']} (SKU: {meta['sku']})", metadata=meta)
-            for meta in self.metadata
+    def get_retriever(self, top_k=5, collapse=False):
+        """LangChain retriever backed by search(), so chains get the SKU and hybrid paths too."""
+        return ProductSearchRetriever(product_retriever=self, k=top_k, collapse=collapse)
+
+    def _document(self, row, **extra):
+        """Stored document for an index row (freshly hydrated) with extra metadata attached."""
+        doc = self.vectorstore.docstore.document(row)
+        doc.metadata.update(extra)
+        return doc
+
+    def embed_query(self, query):
+        misses = self._cached_embed_query.cache_info().misses
+        vector = self._cached_embed_query(query)
+        if self._cached_embed_query.cache_info().misses == misses:
+            QUERY_CACHE_HITS.inc()
+        else:
+            QUERY_CACHE_MISSES.inc()
+        return vector
+
+    @RETRIEVER_ENCODE_SECONDS.time()
+    def _embed_query(self, query):
+        vector = np.asarray(self.embeddings.embed_query(query), dtype="float32")
+        vector.setflags(write=False)
+        return vector
+
+    def vector_search(self, query, k=5):
+        """Return (rows, distances) from the dense index, best first."""
+        q_emb = self.embed_query(query)[None, :]
+        with BUNDLE_ANN_SECONDS.time():
+            distances, indices = self.vectorstore.index.search(q_emb, k)
+        keep = indices[0] != -1
+        return indices[0][keep], distances[0][keep]
+
+    def hybrid_search(self, query, k=5, fetch_k=50, rrf_k=60, collapse=False, variants_per_family=1):
+        """Fuse dense and BM25 rankings with reciprocal-rank fusion."""
+        similarity = {}
+
+        def fuse(fetch_k):
+            vector_rows, distances = self.vector_search(query, k=fetch_k)
+            with BM25_SECONDS.time():
+                lexical_rows, _ = self.bm25.search(query, top_k=fetch_k)
+            similarity.update(zip(vector_rows.tolist(), distance_to_similarity(distances).tolist()))
+            fused = reciprocal_rank_fusion(vector_rows, lexical_rows, k=rrf_k)
+            return zip(*fused) if fused else ((), ())
+
+        if collapse:
+            groups = search_families(fuse, self.skus.family_ids, k, len(self.metadata), variants_per_family)
+            return self._family_documents(groups, "hybrid", similarity)
+        rows, scores = fuse(fetch_k)
+        return [
+            self._document(row, match="hybrid", score=score, similarity=similarity.get(row))
+            for row, score in list(zip(rows, scores))[:k]
         ]
-        self.vectorstore = FAISS.from_documents(docs, self.embeddings)
 
-        print("✅ Retriever ready!")
+    def _family_documents(self, groups, match, similarity):
+        """One Document per product family (best variant first), sibling SKUs in metadata["variants"]."""
+        docs = []
+        for score, family_rows in groups:
+            variants = [self.metadata[row]["sku"] for row in family_rows]
+            docs.append(self._document(
+                family_rows[0], match=match, score=float(score), variants=variants,
+                similarity=similarity.get(family_rows[0]),
+            ))
+        return docs
+
+    def search_passages(self, query, k=5, passages_per_product=2):
+        """
+        Spec-level retrieval: one Document per product whose content is only the
+        best-matching datasheet passages, not the whole product blob. The query is
+        routed to the passage shard of its language.
+        """
+        if not self.passages:
+            return self.search(query, k=k)
+
+        docs = []
+        for hit in self.passages.search(query, top_k=k, passages_per_product=passages_per_product):
+            # Shards index product_metadata.json rows; the docstore is another bundle, so go by SKU
+            row = self.skus.row_of(hit["sku"])
+            if row is None:
+                continue
+            doc = self._document(row, match="passage", score=hit["score"], similarity=hit["score"],
+                                 language=hit["language"])
+            doc.page_content = "\n".join(p["text"] for p in hit["passages"])
+            doc.metadata["sections"] = [p["section"] for p in hit["passages"]]
+            docs.append(doc)
+        return docs
+
+    def search_sku(self, query, k=5):
+        """Documents for exact / family / prefix SKU matches — no embedding involved."""
+        return [
+            self._document(row, match=match, score=SKU_MATCH_SCORES[match], similarity=SKU_MATCH_SCORES[match])
+            for row, match in self.skus.lookup(query, limit=k)
+        ]
+
+    @RETRIEVER_SEARCH_SECONDS.time()
+    def search(self, query, k=5, collapse=False, variants_per_family=1):
+        """
+        SKU lookup, else hybrid (or dense) retrieval. With collapse=True, k counts
+        product families so one slide's lengths cannot fill every slot.
+        """
+        if looks_like_sku(query):
+            docs = self.search_sku(query, k=k)
+            if docs:
+                return docs
+
+        if self.bm25 is not None:
+            return self.hybrid_search(query, k=k, collapse=collapse, variants_per_family=variants_per_family)
+
+        if collapse:
+            similarity = {}
+
+            def dense(fetch_k):
+                rows, distances = self.vector_search(query, k=fetch_k)
+                similarity.update(zip(rows.tolist(), distance_to_similarity(distances).tolist()))
+                return rows, distances
+
+            groups = search_families(dense, self.skus.family_ids, k, len(self.metadata), variants_per_family)
+            return self._family_documents(groups, "semantic", similarity)
+
+        hits = self.vectorstore.similarity_search_with_score_by_vector(self.embed_query(query).tolist(), k=k)
+        return [
+            Document(
+                page_content=doc.page_content,
+                metadata={**doc.metadata, "match": "semantic", "score": float(distance),
+                          "similarity": float(distance_to_similarity(distance))},
+            )
+            for doc, distance in hits
+        ]
+
+
+class ProductSearchRetriever(BaseRetriever):
+    """Thin LangChain adapter around ProductRetriever.search."""
 
-    def get_retriever(self, top_k=5):
-        return self.vectorstore.as_retriever(search_kwargs={"k": top_k})
+    product_retriever: Any
+    k: int = 5
+    collapse: bool = False
 
-    def search(self, query, k=5):
-        retriever = self.get_retriever(top_k=k)
-         # Safe call: use internal method if public one is unavailable
-        if hasattr(retriever, "get_relevant_documents"):
-            return retriever.get_relevant_documents(query)
-        return retriever._get_relevant_documents(query, run_manager=None)
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        return self.product_retriever.search(query, k=self.k, collapse=self.collapse)
 
 
 if __name__ == "__main__":
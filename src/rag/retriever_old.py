@@ -3,9 +3,10 @@ import numpy as np
 from pathlib import Path
 
 import faiss
-from langchain_community.vectorstores import FAISS
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
+
+from src.embeddings.docstore import load_vectorstore
 # from langchain_community.vectorstores.utils import InMemoryDocstore
 
 
@@ -36,11 +37,7 @@ class ProductRetriever:
             for meta in self.metadata
         ]
         # self.vectorstore = FAISS.from_documents(docs, self.embeddings)
-        self.vectorstore = FAISS.load_local(
-            folder_path=EMBED_DIR,
-            embeddings=self.embeddings,
-            allow_dangerous_deserialization=True
-        )
+        self.vectorstore = load_vectorstore(self.embeddings, EMBED_DIR)
 
 
         print("✅ Retriever ready!")
@@ -1,46 +1,114 @@
-from src.rag.rag_chain import build_rag_chain
+from src.conversation.intent_detector import IntentDetector
+from src.conversation.memory_manager import MemoryManager, llm_summarizer
+from src.core.metrics import ASK_SECONDS, RAG_OUTCOMES
+from src.core.logger import logger
+from src.core.profiling import profiled
+from src.embeddings.ranker import CrossEncoderReranker
+from src.rag.guard import is_confident_enough, load_guard_thresholds
+from src.rag.rag_chain import build_answer_chain, build_llm, build_summary_llm
+from src.rag.retriever import ProductRetriever
 from src.rag.formatter import format_rag_response
 
+OFF_TOPIC_ANSWER = "I can only help with questions about Accuride products."
+SUPPORT_ANSWER = (
+    "For orders, shipping, returns, quotes and warranty questions, "
+    "please contact Accuride customer service."
+)
+# Intents answered with a fixed reply: no retrieval, no guard, no LLM
+FIXED_REPLIES = {"off_topic": OFF_TOPIC_ANSWER, "support": SUPPORT_ANSWER}
 
-def is_confident_enough(docs, min_docs=8):
-    """
-    Determine if the retrieval is confident enough to answer.
-    Returns True if the number of documents meets the threshold.
-    """
-    return len(docs) >= min_docs
+
+def retrieve_candidates(retriever, intent, search_query, top_n=20, variants_per_family=3):
+    """Rerank candidates for an intent that reaches the guard (shared with fit_guard_thresholds)."""
+    if intent == "spec_question":
+        # Datasheet passages answer spec questions better than whole product blobs
+        return retriever.search_passages(search_query, k=top_n)
+    return retriever.search(search_query, k=top_n, collapse=True, variants_per_family=variants_per_family)
 
 
 class ProductRAGService:
     """
     A simple service wrapper around your RAG chain.
     Provides an ask() method for querying products.
+
+    A local intent detector runs first: SKU lookups are answered from the SKU
+    index, support and off-topic queries get a fixed reply, and only product
+    and spec questions go through retrieval. Candidates are reranked with a
+    cross-encoder, and the LLM is only called when the best rerank score
+    passes the guard.
     """
     def __init__(self):
-        print("🚀 Initializing ProductRAGService...")
-        self.qa = build_rag_chain()
-        print("✅ Service ready!")
+        logger.info("🚀 Initializing ProductRAGService...")
+        self.retriever = ProductRetriever()
+        self.reranker = CrossEncoderReranker()
+        self.thresholds = load_guard_thresholds()
+        self.intents = IntentDetector(self.retriever.embeddings.embed_documents, self.retriever.embed_query)
+        self.answer_chain = build_answer_chain(build_llm())
+        # Summaries use their own LLM (not in the answer timing metrics) and run off the request path
+        self.memory = MemoryManager(summarizer=llm_summarizer(build_summary_llm()), background=True)
+        logger.info("✅ Service ready!")
 
-    def ask(self, query: str, min_docs: int = 8):
+    @ASK_SECONDS.time()
+    @profiled("rag_ask")
+    def ask(self, query: str, top_n: int = 20, top_k: int = 4, min_score: float = None,
+            variants_per_family: int = 3, session_id: str = None):
         """
         Query the RAG chain and return formatted response.
-        Only returns an answer if the retrieval is confident enough.
+        Only returns an answer if the retrieval is confident enough: the guard
+        uses the thresholds fit by `python -m src.rag.eval fit-guard` unless
+        min_score overrides the rerank threshold.
+
+        top_n candidate families (best variant each, sibling SKUs listed in
+        metadata) are reranked and only the best top_k reach the prompt.
+
+        With a session_id, follow-ups are resolved against the session's last
+        SKUs and the bounded history (summary + recent turns) is sent along.
         """
-        raw_result = self.qa.invoke({"input": query})
+        intent = self.intents.detect(query)
+        logger.debug("Intent: {}", intent)
 
-        # Get the retrieved docs from the raw RAG response
-        retrieved_docs = raw_result.get("context", [])
+        if intent in FIXED_REPLIES:
+            RAG_OUTCOMES.labels(intent, "fixed_reply").inc()
+            return {"answer": FIXED_REPLIES[intent], "matched_products": [], "intent": intent}
+        if intent == "sku_lookup":
+            docs = self.retriever.search_sku(query, k=top_n)
+            if docs:
+                answer = f"Found {len(docs)} products matching {query}."
+                self.memory.update(session_id, query, answer, skus=[doc.metadata.get("sku") for doc in docs])
+                RAG_OUTCOMES.labels(intent, "sku_index").inc()
+                return {**format_rag_response({"answer": answer, "context": docs}), "intent": intent}
+            # Unknown part number: treat it as a normal product search
+            intent = "product_search"
 
-        # Check confidence
-        print(f"Confidence: min_docs={min_docs}, retrieved_docs={len(retrieved_docs)}")
-        if is_confident_enough(retrieved_docs, min_docs=min_docs):
-            return format_rag_response(raw_result)
-        else:
+        session = self.memory.load(session_id)
+        search_query = self.memory.retrieval_query(query, session)
+        candidates = retrieve_candidates(self.retriever, intent, search_query, top_n=top_n,
+                                         variants_per_family=variants_per_family)
+        # Score the resolved query: a pronoun-only follow-up says nothing about the product
+        retrieved_docs = self.reranker.rerank(search_query, candidates, top_n=top_k)
+
+        # Check confidence before paying for generation
+        scores = [round(doc.metadata.get("rerank_score") or 0.0, 3) for doc in retrieved_docs]
+        logger.debug("Confidence: thresholds={}, rerank_scores={}", self.thresholds, scores)
+        if not is_confident_enough(retrieved_docs, self.thresholds, min_score=min_score):
             # Not enough confident docs, respond safely
+            self.memory.update(session_id, query, "I don't know")
+            RAG_OUTCOMES.labels(intent, "guard_refused").inc()
             return {
                 "answer": "I don't know",
-                "matched_products": [doc.metadata for doc in retrieved_docs]
+                "matched_products": [doc.metadata for doc in retrieved_docs],
+                "intent": intent,
             }
 
+        answer = self.answer_chain.invoke({
+            "input": query,
+            "context": retrieved_docs,
+            "history": self.memory.history_messages(session),
+        })
+        self.memory.update(session_id, query, answer, skus=[doc.metadata.get("sku") for doc in retrieved_docs])
+        RAG_OUTCOMES.labels(intent, "llm").inc()
+        return {**format_rag_response({"answer": answer, "context": retrieved_docs}), "intent": intent}
+
 
 # ===========================
 # Quick test
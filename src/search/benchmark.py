@@ -0,0 +1,267 @@
+"""
+Retrieval benchmark: quality and latency per index / encoder configuration.
+
+Queries come from a labelled JSONL file (data/eval/bench_queries.jsonl):
+
+    {"query": "soft close drawer slide", "relevant": ["DZ3832-0", "DB3832-0"]}
+
+A retrieved SKU counts as relevant when it starts with one of the listed
+entries, so a label can be an exact SKU or a whole product family. Each
+configuration is run twice:
+
+- one query at a time, as the API serves them -> p50 / p95 / p99 latency
+- all queries in one batch (batched encode + FAISS search) -> QPS
+
+and scored with recall@k, MRR and nDCG@k. Results are written to
+data/eval/bench_results/<timestamp>.json; `--baseline` compares against an
+earlier run and fails when recall drops by more than `max_recall_drop`.
+"""
+
+import json
+import time
+import platform
+import subprocess
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+
+BENCH_QUERIES_FILE = Path("data/eval/bench_queries.jsonl")
+BENCH_RESULTS_DIR = Path("data/eval/bench_results")
+
+DEFAULT_CONFIGS = ["semantic", "semantic_collapsed", "bm25", "dense", "hybrid"]
+
+
+def load_queries(path=BENCH_QUERIES_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+def relevance(retrieved_skus, relevant):
+    """Index of the label each retrieved SKU satisfies, or -1."""
+    hits = []
+    for sku in retrieved_skus:
+        match = next((i for i, label in enumerate(relevant) if (sku or "").startswith(label)), -1)
+        hits.append(match)
+    return hits
+
+
+def recall_at_k(hits, n_relevant, k):
+    found = {h for h in hits[:k] if h != -1}
+    return len(found) / n_relevant if n_relevant else 0.0
+
+
+def reciprocal_rank(hits, k):
+    for rank, h in enumerate(hits[:k], start=1):
+        if h != -1:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(hits, n_relevant, k):
+    """Binary-gain nDCG; each label is credited once, at its best rank."""
+    seen, dcg = set(), 0.0
+    for rank, h in enumerate(hits[:k], start=1):
+        if h != -1 and h not in seen:
+            seen.add(h)
+            dcg += 1.0 / np.log2(rank + 1)
+    ideal = sum(1.0 / np.log2(rank + 1) for rank in range(1, min(k, n_relevant) + 1))
+    return dcg / ideal if ideal else 0.0
+
+
+def score_run(queries, retrieved, k):
+    recalls, rrs, ndcgs = [], [], []
+    for item, skus in zip(queries, retrieved):
+        hits = relevance(skus, item["relevant"])
+        recalls.append(recall_at_k(hits, len(item["relevant"]), k))
+        rrs.append(reciprocal_rank(hits, k))
+        ndcgs.append(ndcg_at_k(hits, len(item["relevant"]), k))
+    return {
+        f"recall@{k}": float(np.mean(recalls)),
+        "mrr": float(np.mean(rrs)),
+        f"ndcg@{k}": float(np.mean(ndcgs)),
+    }
+
+
+def latency_summary(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+    }
+
+
+# -----------------------------
+# Configurations
+# -----------------------------
+class SemanticConfig:
+    """faiss_index.bin + MiniLM-L6 through SemanticSearcher (torch or onnx encoder)."""
+
+    def __init__(self, backend=None, collapse=False):
+        from src.search.semantic_search import SemanticSearcher
+
+        self.searcher = SemanticSearcher(backend=backend)
+        self.collapse = collapse
+
+    def reset(self):
+        """SemanticSearcher encodes every query; nothing cached to drop."""
+
+    def search(self, query, k):
+        return [r["sku"] for r in self.searcher.search(query, top_k=k, collapse=self.collapse)]
+
+    def search_batch(self, queries, k):
+        if self.collapse:
+            return [self.search(q, k) for q in queries]
+        import faiss
+
+        q_emb = np.asarray(self.searcher.model.encode(queries, batch_size=64), dtype="float32")
+        faiss.normalize_L2(q_emb)
+        _, indices = self.searcher.index.search(q_emb, k)
+        return [[self.searcher.metadata[i]["sku"] for i in row if i != -1] for row in indices]
+
+
+class RetrieverConfig:
+    """LangChain bundle (index.faiss + MiniLM-L12) through ProductRetriever: dense, bm25 or hybrid."""
+
+    _retriever = None
+
+    def __init__(self, mode, backend=None):
+        from src.rag.retriever import ProductRetriever
+
+        # One retriever (and one model load) shared by the dense / bm25 / hybrid configs
+        if RetrieverConfig._retriever is None:
+            RetrieverConfig._retriever = ProductRetriever(backend=backend)
+        self.retriever = RetrieverConfig._retriever
+        self.mode = mode
+        if mode in ("bm25", "hybrid") and self.retriever.bm25 is None:
+            raise RuntimeError("BM25 index missing — run embed-langchain first")
+
+    def reset(self):
+        """Drop query vectors cached by warmup or earlier configs, so timings include encoding."""
+        self.retriever._cached_embed_query.cache_clear()
+
+    def _skus(self, rows):
+        return [self.retriever.metadata[row]["sku"] for row in rows]
+
+    def search(self, query, k):
+        if self.mode == "dense":
+            rows, _ = self.retriever.vector_search(query, k=k)
+            return self._skus(rows)
+        if self.mode == "bm25":
+            rows, _ = self.retriever.bm25.search(query, top_k=k)
+            return self._skus(rows)
+        return [doc.metadata["sku"] for doc in self.retriever.hybrid_search(query, k=k)]
+
+    def search_batch(self, queries, k):
+        if self.mode != "dense":
+            return [self.search(q, k) for q in queries]
+        q_emb = np.asarray(self.retriever.embeddings.embed_documents(queries), dtype="float32")
+        _, indices = self.retriever.vectorstore.index.search(q_emb, k)
+        return [self._skus(row[row != -1]) for row in indices]
+
+
+def build_config(name, backend=None):
+    if name == "semantic":
+        return SemanticConfig(backend=backend)
+    if name == "semantic_collapsed":
+        return SemanticConfig(backend=backend, collapse=True)
+    if name in ("dense", "bm25", "hybrid"):
+        return RetrieverConfig(name, backend=backend)
+    raise ValueError(f"❌ Unknown benchmark config: {name}")
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+def run_config(config, queries, k=10, warmup=3):
+    texts = [item["query"] for item in queries]
+    for text in texts[:warmup]:
+        config.search(text, k)
+    config.reset()
+
+    latencies, retrieved = [], []
+    for text in texts:
+        start = time.perf_counter()
+        retrieved.append(config.search(text, k))
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    batch_retrieved = config.search_batch(texts, k)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        **score_run(queries, retrieved, k),
+        "batch": score_run(queries, batch_retrieved, k),
+        "latency": latency_summary(latencies),
+        "qps_single": len(texts) / sum(latencies),
+        "qps_batch": len(texts) / batch_seconds,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(results, baseline_file, k, max_recall_drop=0.02):
+    """Print metric deltas against a previous run; return False when recall regressed."""
+    with open(baseline_file, "r") as f:
+        baseline = json.load(f)
+
+    ok = True
+    metric = f"recall@{k}"
+    for name, current in results["configs"].items():
+        previous = baseline["configs"].get(name)
+        if not previous or metric not in previous:
+            continue
+        drop = previous[metric] - current[metric]
+        p95_delta = current["latency"]["p95_ms"] - previous["latency"]["p95_ms"]
+        flag = "❌" if drop > max_recall_drop else "✅"
+        print(f"{flag} {name}: {metric} {previous[metric]:.3f} → {current[metric]:.3f}, "
+              f"p95 {p95_delta:+.1f} ms")
+        ok = ok and drop <= max_recall_drop
+    return ok
+
+
+def run_benchmark(configs=None, queries_file=BENCH_QUERIES_FILE, k=10, backend=None, baseline=None,
+                  max_recall_drop=0.02, output_dir=BENCH_RESULTS_DIR):
+    queries = load_queries(queries_file)
+    print(f"📝 {len(queries)} labelled queries from {queries_file}")
+
+    results = {
+        "run_at": datetime.utcnow().isoformat(),
+        "commit": git_commit(),
+        "k": k,
+        "backend": backend,
+        "queries": len(queries),
+        "python": platform.python_version(),
+        "configs": {},
+    }
+    for name in configs or DEFAULT_CONFIGS:
+        try:
+            config = build_config(name, backend=backend)
+        except (RuntimeError, ImportError, OSError) as e:
+            print(f"⚠️ Skipping {name}: {e}")
+            continue
+
+        results["configs"][name] = run_config(config, queries, k=k)
+        r = results["configs"][name]
+        print(f"📊 {name}: recall@{k}={r[f'recall@{k}']:.3f} mrr={r['mrr']:.3f} ndcg@{k}={r[f'ndcg@{k}']:.3f} "
+              f"p50={r['latency']['p50_ms']:.1f}ms p95={r['latency']['p95_ms']:.1f}ms "
+              f"p99={r['latency']['p99_ms']:.1f}ms qps={r['qps_batch']:.0f}")
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_file = output_dir / f"bench_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_file, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Benchmark results saved → {output_file}")
+
+    if baseline and not compare(results, baseline, k, max_recall_drop):
+        raise SystemExit(f"❌ Recall dropped by more than {max_recall_drop} against {baseline}")
+    return results
@@ -1,4 +1,19 @@
+"""
+Build faiss_index.bin from product_embeddings.npy.
+
+Vector storage is configurable (the passage shards use the same options):
+
+    FAISS_STORAGE=flat|fp16|sq8   float32 (default), float16 or 8-bit scalar-quantized codes
+    FAISS_PCA_DIM=128             optional PCA projection (e.g. 384 → 128) trained at build time
+
+Every build writes faiss_index_report.json: recall@k of the built index
+against exact float32 search over the same vectors, plus its size next to
+the float32 flat index it replaces.
+"""
+
 import json
+import os
+import time
 import faiss
 import numpy as np
 from pathlib import Path
@@ -7,6 +22,11 @@ EMBEDDING_DIR = Path("data/embeddings")
 EMBED_FILE = EMBEDDING_DIR / "product_embeddings.npy"
 META_FILE = EMBEDDING_DIR / "product_metadata.json"
 INDEX_FILE = EMBEDDING_DIR / "faiss_index.bin"
+REPORT_FILE = EMBEDDING_DIR / "faiss_index_report.json"
+
+FAISS_STORAGE = os.getenv("FAISS_STORAGE", "flat")
+FAISS_PCA_DIM = int(os.getenv("FAISS_PCA_DIM", "0"))
+STORAGE_CODECS = {"flat": "Flat", "fp16": "SQfp16", "sq8": "SQ8"}
 
 
 def load_embeddings():
@@ -14,7 +34,7 @@ def load_embeddings():
         raise FileNotFoundError(f"❌ Embeddings file missing: {EMBED_FILE}")
 
     embeddings = np.load(EMBED_FILE)
-    print(f"📦 Loaded embeddings → shape: {embeddings.shape}")
+    print(f"📦 Loaded embeddings → shape: {embeddings.shape} ({embeddings.dtype})")
     return embeddings.astype("float32")
 
 
@@ -28,36 +48,103 @@ def load_metadata():
     return metadata
 
 
-def build_faiss_index(embeddings):
+def index_description(dim, count, storage=FAISS_STORAGE, pca_dim=FAISS_PCA_DIM):
+    """faiss.index_factory string for the configured storage, e.g. "PCA128,L2norm,SQ8"."""
+    if storage not in STORAGE_CODECS:
+        raise ValueError(f"❌ Unknown FAISS_STORAGE '{storage}' (expected one of {', '.join(STORAGE_CODECS)})")
+
+    codec = STORAGE_CODECS[storage]
+    if not pca_dim or pca_dim >= dim:
+        return codec
+    if count < dim:
+        print(f"⚠️ {count} vectors are too few to train a {dim}→{pca_dim} PCA — keeping {dim} dimensions")
+        return codec
+    # Re-normalize after the projection so inner product stays cosine similarity
+    return f"PCA{pca_dim},L2norm,{codec}"
+
+
+def build_faiss_index(embeddings, storage=FAISS_STORAGE, pca_dim=FAISS_PCA_DIM):
     dim = embeddings.shape[1]
+    description = index_description(dim, len(embeddings), storage, pca_dim)
 
-    print(f"🧠 Creating FAISS index (dimension={dim})")
+    print(f"🧠 Creating FAISS index (dimension={dim}, {description})")
 
-    index = faiss.IndexFlatIP(dim)  # Inner product (cosine similarity with normalized vectors)
+    # Inner product (cosine similarity with normalized vectors)
+    index = faiss.index_factory(dim, description, faiss.METRIC_INNER_PRODUCT)
 
     # Normalize to use cosine similarity
     faiss.normalize_L2(embeddings)
 
+    if not index.is_trained:
+        index.train(embeddings)
     index.add(embeddings)
 
     print(f"✅ Added {index.ntotal} vectors to the FAISS index")
     return index
 
 
+def recall_report(index, embeddings, k=10, queries=1000, seed=0):
+    """
+    recall@1 / recall@k of `index` against exact float32 search, using a
+    sample of the (normalized) catalog vectors as queries. Each query's own
+    row is dropped from both result lists, so it cannot inflate recall.
+    """
+    baseline = faiss.IndexFlatIP(embeddings.shape[1])
+    baseline.add(embeddings)
+
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(embeddings), size=min(queries, len(embeddings)), replace=False)
+    k = min(k, len(embeddings) - 1)
+
+    def neighbours(searched):
+        _, found = searched.search(embeddings[rows], k + 1)
+        return [[i for i in ids if i != row][:k] for row, ids in zip(rows, found)]
+
+    expected, found = neighbours(baseline), neighbours(index)
+    recall_at_1 = np.mean([e[0] == f[0] for e, f in zip(expected, found)])
+    recall_at_k = np.mean([len(set(e) & set(f)) / k for e, f in zip(expected, found)])
+    index_bytes = faiss.serialize_index(index).nbytes
+    baseline_bytes = faiss.serialize_index(baseline).nbytes
+    return {
+        "queries": len(rows),
+        "k": k,
+        "recall@1": float(recall_at_1),
+        f"recall@{k}": float(recall_at_k),
+        "index_bytes": int(index_bytes),
+        "float32_bytes": int(baseline_bytes),
+        "compression": round(baseline_bytes / index_bytes, 2),
+    }
+
+
 def save_index(index):
     faiss.write_index(index, str(INDEX_FILE))
     print(f"💾 FAISS index saved → {INDEX_FILE}")
 
 
-def main():
+def main(storage=FAISS_STORAGE, pca_dim=FAISS_PCA_DIM):
     print("🚀 Building FAISS index...")
-    
+
     embeddings = load_embeddings()
     metadata = load_metadata()
-    
-    index = build_faiss_index(embeddings)
+
+    index = build_faiss_index(embeddings, storage=storage, pca_dim=pca_dim)
     save_index(index)
 
+    start = time.perf_counter()
+    faiss.read_index(str(INDEX_FILE))
+    report = {
+        "storage": storage,
+        "pca_dim": pca_dim or None,
+        "bytes_per_vector": index.sa_code_size(),
+        "load_seconds": time.perf_counter() - start,
+        **recall_report(index, embeddings),
+    }
+    with open(REPORT_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+    recall_k = f"recall@{report['k']}"
+    print(f"📊 recall@1={report['recall@1']:.3f} {recall_k}={report[recall_k]:.3f} vs float32, "
+          f"{report['compression']}x smaller → {REPORT_FILE}")
+
     print("🎉 FAISS index creation complete!")
 
 
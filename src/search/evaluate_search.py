@@ -2,7 +2,8 @@ import json
 import faiss
 import numpy as np
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
+
+from src.embeddings.encoders import load_encoder
 
 # Paths
 EMBED_DIR = Path("data/embeddings")
@@ -39,7 +40,7 @@ def evaluate_search():
     sku_lookup = [item["sku"] for item in metadata]
 
     print("🧠 Loading embedding model...")
-    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    model = load_encoder("sentence-transformers/all-MiniLM-L6-v2")
 
     # -----------------------------
     # TEST QUERY SET (edit as needed)
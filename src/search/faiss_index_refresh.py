@@ -3,36 +3,39 @@ import faiss
 import numpy as np
 from pathlib import Path
 from datetime import datetime
-from sentence_transformers import SentenceTransformer
+
+from src.embeddings.documents import (
+    DOC_COLUMNS, build_product_metadata, build_product_text, is_current, read_index_info, write_index_info
+)
+from src.embeddings.embedding_cache import encode_with_cache
+from src.embeddings.encoders import load_encoder
+from src.ingestion.snapshot import load_catalog_records
 
 # File locations
 EMBED_DIR = Path("data/embeddings")
 INDEX_FILE = EMBED_DIR / "faiss_index.bin"
 META_FILE = EMBED_DIR / "product_metadata.json"
 
-# Latest processed cleaned data
-LATEST_CLEAN = Path("data/processed") / "clean_products.json"
+# Latest processed cleaned data (same input the full embedder reads)
+LATEST_CLEAN = Path("data/processed") / "magento_products_cleaned.json"
 
 
 def load_latest_products():
-    if not LATEST_CLEAN.exists():
-        raise FileNotFoundError(f"❌ Clean products not found at: {LATEST_CLEAN}")
-
-    with open(LATEST_CLEAN, "r") as f:
-        return json.load(f)
+    return load_catalog_records(DOC_COLUMNS, json_path=LATEST_CLEAN)
 
 
 def build_text(product):
-    """Convert product fields into a search text block."""
-    parts = [
-        product.get("name", ""),
-        product.get("description", ""),
-        product.get("features", "")
-    ]
-    return ". ".join([p for p in parts if p]).strip()
+    """Convert product fields into a search text block (canonical builder, see documents.py)."""
+    return build_product_text(product)
 
 
 def refresh_faiss_index(model_name="sentence-transformers/all-MiniLM-L6-v2"):
+    # Appending vectors built from different text or another model would silently mix spaces
+    info = read_index_info("product_embeddings")
+    if not is_current("product_embeddings") or info.get("model") != model_name:
+        print("❌ Index was built with a different document version or model — run a full rebuild (embed-products)")
+        return
+
     print("🔄 Loading existing FAISS index and metadata...")
     index = faiss.read_index(str(INDEX_FILE))
 
@@ -59,12 +62,13 @@ def refresh_faiss_index(model_name="sentence-transformers/all-MiniLM-L6-v2"):
 
     # Load the embedding model
     print("🧠 Loading embedding model for new items...")
-    model = SentenceTransformer(model_name)
+    model = load_encoder(model_name)
 
     # Build texts and compute embeddings
     texts = [build_text(p) for p in new_products]
     print("🔢 Generating embeddings for new items...")
-    new_vecs = model.encode(texts, convert_to_tensor=False)
+    # Appended rows join the product_embeddings bundle, so extend its cache refs
+    new_vecs = encode_with_cache(model, texts, "product_embeddings", model_name, extend_refs=True)
     new_vecs = np.asarray(new_vecs).astype("float32")
 
     # Normalize vectors (cosine similarity)
@@ -76,10 +80,7 @@ def refresh_faiss_index(model_name="sentence-transformers/all-MiniLM-L6-v2"):
     # Update metadata
     print("📘 Updating metadata file...")
     for p in new_products:
-        old_meta.append({
-            "sku": p["sku"],
-            "name": p["name"]
-        })
+        old_meta.append(build_product_metadata(p))
 
     # Save updated FAISS index
     faiss.write_index(index, str(INDEX_FILE))
@@ -89,6 +90,7 @@ def refresh_faiss_index(model_name="sentence-transformers/all-MiniLM-L6-v2"):
     with open(META_FILE, "w") as f:
         json.dump(old_meta, f, indent=2)
     print(f"💾 Metadata updated → {META_FILE}")
+    write_index_info("product_embeddings", model_name, index.ntotal)
 
     print("🎉 Index refresh complete!")
 
@@ -0,0 +1,57 @@
+"""
+Route queries to the datasheet passage shard of their language.
+
+The query language is detected locally (translator.detect_language), so
+FR/DE queries go straight to the FR/DE shards with no network call. A query
+is only translated when its language has no shard, and then searched in EN.
+"""
+
+from src.conversation.translator import DEFAULT_LANGUAGE, SUPPORTED_LANGUAGES, detect_language, translate
+from src.embeddings.documents import read_index_info
+from src.embeddings.passage_index import passage_paths
+from src.search.passage_search import PassageSearcher
+
+
+class LanguageRouter:
+    def __init__(self, embedders=None, languages=SUPPORTED_LANGUAGES):
+        """
+        `embedders` maps model name -> embed_query callable so a shard can reuse
+        an encoder that is already loaded (e.g. the retriever's). Shards whose
+        files are missing, or that were built against another product catalog,
+        are skipped.
+        """
+        embedders = dict(embedders or {})
+        self.shards = {}
+        for lang in languages:
+            if not passage_paths(lang)[0].exists():
+                continue
+            model_name = read_index_info(f"passages_{lang}").get("model")
+            try:
+                searcher = PassageSearcher(lang, embed_query=embedders.get(model_name))
+            except ValueError as e:
+                print(f"⚠️ Passage shard {lang} disabled: {e}")
+                continue
+            # Shards built with the same model (FR/DE) share one encoder
+            embedders.setdefault(model_name, searcher.embed_query)
+            self.shards[lang] = searcher
+
+    def __bool__(self):
+        return bool(self.shards)
+
+    def route(self, query: str):
+        """Return (shard language, query to search with); (None, query) if no shard can serve it."""
+        lang = detect_language(query)
+        if lang in self.shards:
+            return lang, query
+        if DEFAULT_LANGUAGE in self.shards:
+            return DEFAULT_LANGUAGE, translate(query, target=DEFAULT_LANGUAGE, source=lang)
+        return None, query
+
+    def search(self, query: str, top_k: int = 5, passages_per_product: int = 2):
+        lang, routed_query = self.route(query)
+        if lang is None:
+            return []
+        hits = self.shards[lang].search(routed_query, top_k=top_k, passages_per_product=passages_per_product)
+        for hit in hits:
+            hit["language"] = lang
+        return hits
@@ -0,0 +1,111 @@
+import re
+import json
+import numpy as np
+from pathlib import Path
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+EMBEDDING_DIR = Path("data/embeddings")
+BM25_MATRIX_FILE = EMBEDDING_DIR / "bm25_index.npz"
+BM25_VOCAB_FILE = EMBEDDING_DIR / "bm25_vocab.json"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9.%-]*[a-z0-9%]|[a-z0-9]")
+PERCENT_PATTERN = re.compile(r"(\d+)\s*%")
+ALNUM_SPLIT = re.compile(r"[a-z]+|\d+")
+
+
+def tokenize(text: str):
+    """
+    Lowercase spec-aware tokenizer.
+
+    Keeps whole part numbers and percentages as tokens ("dz4501-0060ec", "75%")
+    and also emits their letter/digit pieces ("dz", "4501", "0060", "ec") so a
+    query for the series prefix "DZ" still hits every DZ part.
+    """
+    text = PERCENT_PATTERN.sub(r"\1%", (text or "").lower())
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text):
+        tokens.append(token)
+        pieces = ALNUM_SPLIT.findall(token)
+        if len(pieces) > 1:
+            tokens.extend(pieces)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a scipy sparse matrix.
+
+    Per-(doc, term) BM25 weights are precomputed at build time and stored
+    column-major, so scoring a query is one column slice + row sum over the
+    handful of query terms — no Python loop over documents.
+    """
+
+    def __init__(self, weights, vocabulary):
+        self.weights = weights.tocsc()
+        self.vocabulary = vocabulary
+
+    @property
+    def size(self):
+        return self.weights.shape[0]
+
+    @classmethod
+    def build(cls, texts, k1: float = 1.5, b: float = 0.75):
+        vectorizer = CountVectorizer(analyzer=tokenize)
+        tf = vectorizer.fit_transform(texts).tocsr().astype("float32")
+
+        doc_len = np.asarray(tf.sum(axis=1)).ravel()
+        avg_len = doc_len.mean() if len(doc_len) else 0.0
+        df = np.bincount(tf.indices, minlength=tf.shape[1])
+        idf = np.log(1.0 + (tf.shape[0] - df + 0.5) / (df + 0.5)).astype("float32")
+
+        # Rewrite every stored tf value into its BM25 contribution in place
+        norm = k1 * (1.0 - b + b * doc_len / max(avg_len, 1e-9))
+        row_norm = np.repeat(norm, np.diff(tf.indptr)).astype("float32")
+        tf.data = idf[tf.indices] * tf.data * (k1 + 1.0) / (tf.data + row_norm)
+
+        vocabulary = {term: int(i) for term, i in vectorizer.vocabulary_.items()}
+        print(f"🔤 BM25 index built — docs: {tf.shape[0]}, terms: {len(vocabulary)}")
+        return cls(tf, vocabulary)
+
+    def save(self, matrix_file=BM25_MATRIX_FILE, vocab_file=BM25_VOCAB_FILE):
+        sparse.save_npz(matrix_file, self.weights)
+        with open(vocab_file, "w") as f:
+            json.dump(self.vocabulary, f)
+        print(f"💾 BM25 index saved → {matrix_file}")
+
+    @classmethod
+    def load(cls, matrix_file=BM25_MATRIX_FILE, vocab_file=BM25_VOCAB_FILE):
+        weights = sparse.load_npz(matrix_file)
+        with open(vocab_file, "r") as f:
+            vocabulary = json.load(f)
+        return cls(weights, vocabulary)
+
+    def scores(self, query: str):
+        """Dense BM25 score per document."""
+        term_ids = sorted({self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary})
+        if not term_ids:
+            return np.zeros(self.size, dtype="float32")
+        return np.asarray(self.weights[:, term_ids].sum(axis=1)).ravel()
+
+    def search(self, query: str, top_k: int = 50):
+        """Return (rows, scores) of the top_k matching documents, best first."""
+        scores = self.scores(query)
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        order = matched[np.argsort(-scores[matched], kind="stable")]
+        return order, scores[order]
+
+
+def reciprocal_rank_fusion(*rankings, k: int = 60):
+    """
+    Fuse ranked lists of row ids: score(row) = sum(1 / (k + rank)).
+    Returns [(row, fused_score)] best first.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            row = int(row)
+            fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
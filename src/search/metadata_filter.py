@@ -0,0 +1,111 @@
+import json
+import faiss
+import numpy as np
+from pathlib import Path
+
+EMBEDDING_DIR = Path("data/embeddings")
+META_FILE = EMBEDDING_DIR / "product_metadata.json"
+
+# Categorical metadata fields that get a precomputed bitmap per value
+CATEGORICAL_FIELDS = ("category_id", "type", "material")
+
+
+def _normalize_value(value):
+    """Metadata numbers come back from pandas as floats (61.0) — treat 61 and 61.0 alike."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _capacity_bounds(capacity):
+    """Return (low, high) in kg for a capacity dict, NaN when unknown."""
+    if not isinstance(capacity, dict):
+        return np.nan, np.nan
+
+    low = capacity.get("min", capacity.get("value"))
+    high = capacity.get("max", capacity.get("value"))
+    low = float(low) if low is not None else np.nan
+    high = float(high) if high is not None else np.nan
+    return low, high
+
+
+class MetadataFilterIndex:
+    """
+    Column-oriented view of product_metadata.json used to pre-filter FAISS searches.
+
+    Categorical fields (category_id, type, material) keep one boolean bitmap per
+    distinct value; capacity is kept as two float32 arrays (low/high bound).
+    A filter is resolved with a handful of vectorized ops and handed to FAISS as
+    an IDSelectorBitmap, so the ANN search only ever visits matching rows.
+    """
+
+    def __init__(self, metadata):
+        self.size = len(metadata)
+
+        self.bitmaps = {field: {} for field in CATEGORICAL_FIELDS}
+        for field in CATEGORICAL_FIELDS:
+            values = np.array([_normalize_value(m.get(field)) for m in metadata], dtype=object)
+            for value in set(values.tolist()):
+                if value is None:
+                    continue
+                self.bitmaps[field][value] = values == value
+
+        bounds = np.array([_capacity_bounds(m.get("capacity")) for m in metadata], dtype="float32")
+        bounds = bounds.reshape(-1, 2)
+        self.capacity_low = bounds[:, 0]
+        self.capacity_high = bounds[:, 1]
+
+    @classmethod
+    def from_file(cls, meta_file=META_FILE):
+        with open(meta_file, "r") as f:
+            return cls(json.load(f))
+
+    def _field_mask(self, field, wanted):
+        """OR together the bitmaps of every accepted value of a categorical field."""
+        if not isinstance(wanted, (list, tuple, set)):
+            wanted = [wanted]
+
+        mask = np.zeros(self.size, dtype=bool)
+        for value in wanted:
+            bitmap = self.bitmaps[field].get(_normalize_value(value))
+            if bitmap is not None:
+                mask |= bitmap
+        return mask
+
+    def mask(self, category_id=None, type=None, material=None, min_capacity=None, max_capacity=None):
+        """
+        Boolean row mask for the given filters (AND across fields, OR within a field).
+
+        min_capacity keeps products whose upper rating reaches the value
+        ("rated over 200 kg"); max_capacity keeps products whose lower rating
+        does not exceed it. Products without a capacity never match a capacity filter.
+        """
+        mask = np.ones(self.size, dtype=bool)
+
+        for field, wanted in (("category_id", category_id), ("type", type), ("material", material)):
+            if wanted is not None:
+                mask &= self._field_mask(field, wanted)
+
+        # NaN comparisons are False, so unknown capacities drop out here
+        if min_capacity is not None:
+            mask &= self.capacity_high >= float(min_capacity)
+        if max_capacity is not None:
+            mask &= self.capacity_low <= float(max_capacity)
+
+        return mask
+
+    def selector(self, **filters):
+        """
+        Build FAISS search parameters restricted to the rows matching `filters`.
+
+        Returns (params, count). The packed bitmap is attached to the params
+        object so it stays alive for as long as FAISS may read it.
+        """
+        mask = self.mask(**filters)
+        bitmap = np.packbits(mask, bitorder="little")
+
+        sel = faiss.IDSelectorBitmap(self.size, faiss.swig_ptr(bitmap))
+        params = faiss.SearchParameters(sel=sel)
+        params.bitmap = bitmap
+        params.sel_ref = sel
+        return params, int(mask.sum())
@@ -0,0 +1,91 @@
+import json
+import faiss
+import numpy as np
+from pathlib import Path
+
+from src.embeddings.documents import read_index_info
+from src.embeddings.encoders import load_encoder
+from src.embeddings.passage_index import passage_paths
+from src.ingestion.clean.sku import get_parent_sku, normalize_sku_for_lookup
+
+EMBEDDING_DIR = Path("data/embeddings")
+META_FILE = EMBEDDING_DIR / "product_metadata.json"
+
+
+def group_by_product(indices, scores, passage_to_product, top_k, passages_per_product=2):
+    """
+    Collapse ranked passage hits to ranked products.
+
+    `indices`/`scores` are one FAISS result row (best first). A product's rank
+    is the rank of its best passage; up to `passages_per_product` passages are
+    kept per product. Returns [(product_row, best_score, [passage_rows])].
+    """
+    keep = indices != -1
+    indices, scores = indices[keep], scores[keep]
+    products = passage_to_product[indices]
+
+    # First occurrence of each product == its best passage, since hits are sorted
+    unique_products, first_pos = np.unique(products, return_index=True)
+    order = np.argsort(first_pos)[:top_k]
+
+    results = []
+    for product, pos in zip(unique_products[order], first_pos[order]):
+        hits = indices[products == product][:passages_per_product]
+        results.append((int(product), float(scores[pos]), hits.tolist()))
+    return results
+
+
+def check_product_alignment(passages, passage_to_product, metadata):
+    """
+    Raise ValueError unless every passage maps to a product row of its own SKU
+    family, i.e. the shard was built against this product_metadata.json.
+    """
+    if len(passage_to_product) != len(passages):
+        raise ValueError(f"❌ {len(passage_to_product)} passage→product rows for {len(passages)} passages")
+    if len(passage_to_product) and passage_to_product.max() >= len(metadata):
+        raise ValueError(f"❌ Passage map points past the {len(metadata)} products in {META_FILE}")
+    for passage, row in zip(passages, passage_to_product.tolist()):
+        family = get_parent_sku(normalize_sku_for_lookup(metadata[row].get("sku") or ""))
+        if family not in (get_parent_sku(passage["sku"] or ""), get_parent_sku(passage["product_sku"] or "")):
+            raise ValueError(f"❌ Passage of {passage['sku']} maps to product {metadata[row].get('sku')}; "
+                             f"rebuild the passage shards")
+
+
+class PassageSearcher:
+    """Spec-level retrieval over one language shard of datasheet passages, grouped back to products."""
+
+    def __init__(self, lang="en", embed_query=None):
+        self.lang = lang
+        index_file, meta_file, map_file = passage_paths(lang)
+        self.index = faiss.read_index(str(index_file))
+        self.passage_to_product = np.load(map_file).astype("int32")
+        with open(meta_file, "r", encoding="utf-8") as f:
+            self.passages = json.load(f)
+        with open(META_FILE, "r") as f:
+            self.metadata = json.load(f)
+        check_product_alignment(self.passages, self.passage_to_product, self.metadata)
+
+        if embed_query is None:
+            model = load_encoder(read_index_info(f"passages_{lang}").get("model", "sentence-transformers/all-MiniLM-L6-v2"))
+            embed_query = lambda text: model.encode([text])[0]
+        self.embed_query = embed_query
+        print(f"📑 Passage index loaded — {self.index.ntotal} {lang} passages")
+
+    def search(self, query: str, top_k: int = 5, fetch_k: int = 50, passages_per_product: int = 2):
+        q_emb = np.asarray([self.embed_query(query)], dtype="float32")
+        faiss.normalize_L2(q_emb)
+        distances, indices = self.index.search(q_emb, fetch_k)
+
+        results = []
+        grouped = group_by_product(indices[0], distances[0], self.passage_to_product, top_k, passages_per_product)
+        for rank, (product, score, passage_rows) in enumerate(grouped):
+            meta = self.metadata[product]
+            results.append({
+                "rank": rank + 1,
+                "score": score,
+                "sku": meta["sku"],
+                "name": meta["name"],
+                "product_row": product,
+                "passages": [self.passages[p] for p in passage_rows],
+            })
+        return results
@@ -2,7 +2,13 @@ import json
 import faiss
 import numpy as np
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
+
+from src.core.metrics import PRODUCT_ANN_SECONDS, SEMANTIC_ENCODE_SECONDS, SEMANTIC_SEARCH_SECONDS
+from src.core.logger import logger
+from src.embeddings.documents import is_current
+from src.embeddings.encoders import load_encoder
+from src.search.metadata_filter import MetadataFilterIndex
+from src.search.sku_index import SKU_MATCH_SCORES, SkuIndex, looks_like_sku, search_families
 
 # File paths
 EMBEDDING_DIR = Path("data/embeddings")
@@ -10,19 +16,24 @@ INDEX_FILE = EMBEDDING_DIR / "faiss_index.bin"
 META_FILE = EMBEDDING_DIR / "product_metadata.json"
 
 class SemanticSearcher:
-    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2"):
-        print("🔍 Loading FAISS index and embedding model...")
+    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2", backend=None):
+        logger.info("🔍 Loading FAISS index and embedding model...")
         
         self.index = faiss.read_index(str(INDEX_FILE))
-        print(f"📦 FAISS index loaded — vectors: {self.index.ntotal}")
+        logger.info("📦 FAISS index loaded — vectors: {}", self.index.ntotal)
+        is_current("product_embeddings")
 
         with open(META_FILE, "r") as f:
             self.metadata = json.load(f)
-        print(f"📘 Metadata loaded — {len(self.metadata)} items")
+        logger.info("📘 Metadata loaded — {} items", len(self.metadata))
+
+        self.filters = MetadataFilterIndex(self.metadata)
+        self.skus = SkuIndex(self.metadata)
 
-        self.model = SentenceTransformer(model_name)
-        print(f"🧠 Embedding model ready: {model_name}")
+        self.model = load_encoder(model_name, backend=backend)
+        logger.info("🧠 Embedding model ready: {}", model_name)
 
+    @SEMANTIC_ENCODE_SECONDS.time()
     def encode_query(self, text: str):
         """Convert query into embedding."""
         emb = self.model.encode([text], convert_to_tensor=False)
@@ -32,27 +43,95 @@ class SemanticSearcher:
         faiss.normalize_L2(emb)
         return emb
 
-    def search(self, query: str, top_k: int = 50):
-        print(f"\n🔎 Searching for: \"{query}\"")
+    @SEMANTIC_SEARCH_SECONDS.time()
+    def search(self, query: str, top_k: int = 50, filters: dict = None, collapse: bool = False,
+               variants_per_family: int = 1):
+        """
+        Semantic search, optionally restricted by metadata filters, e.g.
+        filters={"category_id": 61, "min_capacity": 200}.
+
+        Filters are applied inside FAISS through an ID selector, so a
+        filtered query is still a single pass over the index.
+
+        With collapse=True, top_k counts product families (get_parent_sku)
+        instead of rows: each result is the family's best variant, with up to
+        `variants_per_family` variants listed under "variants".
+        """
+        logger.debug('🔎 Searching for: "{}"', query)
+
+        # Part numbers embed poorly — answer them from the SKU index without encoding
+        if looks_like_sku(query):
+            results = self.search_sku(query, top_k=top_k, filters=filters)
+            if results:
+                return results
+
+        params, limit = None, self.index.ntotal
+        if filters:
+            params, limit = self.filters.selector(**filters)
+            if limit == 0:
+                return []
 
         q_emb = self.encode_query(query)
 
-        distances, indices = self.index.search(q_emb, top_k)
-        print(distances , indices)
+        def ann(fetch_k):
+            with PRODUCT_ANN_SECONDS.time():
+                distances, indices = self.index.search(q_emb, fetch_k, params=params)
+            logger.opt(lazy=True).debug("FAISS distances {} indices {}", lambda: distances, lambda: indices)
+            return indices[0], distances[0]
+
+        if collapse:
+            groups = search_families(ann, self.skus.family_ids, top_k, limit, variants_per_family)
+            return self._family_results(groups, "semantic")
+
+        indices, distances = ann(min(top_k, limit))
         results = []
-        for rank, idx in enumerate(indices[0]):
+        for rank, idx in enumerate(indices):
             if idx == -1:
                 continue
             meta = self.metadata[idx]
             results.append({
                 "rank": rank + 1,
-                "score": float(distances[0][rank]),
+                "score": float(distances[rank]),
                 "sku": meta["sku"],
-                "name": meta["name"]
+                "name": meta["name"],
+                "match": "semantic"
             })
 
         return results
 
+    def _family_results(self, groups, match):
+        results = []
+        for rank, (score, rows) in enumerate(groups):
+            meta = self.metadata[rows[0]]
+            results.append({
+                "rank": rank + 1,
+                "score": score,
+                "sku": meta["sku"],
+                "name": meta["name"],
+                "match": match,
+                "variants": [self.metadata[row]["sku"] for row in rows],
+            })
+        return results
+
+    def search_sku(self, query: str, top_k: int = 50, filters: dict = None):
+        """Exact / family / prefix SKU matches, same result shape as search()."""
+        hits = self.skus.lookup(query, limit=top_k)
+        if filters:
+            mask = self.filters.mask(**filters)
+            hits = [(row, match) for row, match in hits if mask[row]]
+
+        results = []
+        for rank, (row, match) in enumerate(hits):
+            meta = self.metadata[row]
+            results.append({
+                "rank": rank + 1,
+                "score": SKU_MATCH_SCORES[match],
+                "sku": meta["sku"],
+                "name": meta["name"],
+                "match": match
+            })
+        return results
+
 
 def test_search():
     searcher = SemanticSearcher()
@@ -0,0 +1,171 @@
+import re
+import json
+import numpy as np
+from bisect import bisect_left
+from pathlib import Path
+
+from src.ingestion.clean.sku import normalize_sku_for_lookup, get_parent_sku
+
+EMBEDDING_DIR = Path("data/embeddings")
+META_FILE = EMBEDDING_DIR / "product_metadata.json"
+
+# A single token starting with letters followed by digits, e.g. DS3031, DZ4501-0060EC, DS4180-080-035-0185U
+SKU_PATTERN = re.compile(r"^[A-Z]{1,4}\d{3,}[A-Z0-9-]*$")
+# A further whitespace-separated piece of the same part number, e.g. the 0060EC of "DZ4501 0060EC"
+SKU_PART_PATTERN = re.compile(r"^-?[A-Z0-9-]*\d[A-Z0-9-]*$")
+
+# Pseudo-similarity reported for SKU hits so they rank alongside cosine scores
+SKU_MATCH_SCORES = {"exact": 1.0, "family": 0.9, "prefix": 0.8}
+
+# Rows fetched per requested family on the first collapsing pass; variants of one family sit
+# close together. Families with more variants (up to 32) widen the search, see search_families.
+COLLAPSE_OVERFETCH = 5
+
+
+def normalize_query_sku(text: str) -> str:
+    """Uppercase, strip whitespace and apply the same SKU normalization as ingestion."""
+    sku = re.sub(r"\s+", "", (text or "")).upper()
+    return normalize_sku_for_lookup(sku)
+
+
+def compact_sku(sku: str) -> str:
+    """Hyphen-free form so DZ4501-0060EC, DZ45010060EC and DZ4501 0060EC share a key."""
+    return sku.replace("-", "")
+
+
+def looks_like_sku(query: str) -> bool:
+    """
+    True when the whole query is a part number rather than natural language.
+    Every whitespace-separated token must belong to the SKU, so "DZ4501 0060EC"
+    qualifies but "DZ4501 slides" is a product question.
+    """
+    tokens = (query or "").upper().split()
+    if not tokens or not all(SKU_PART_PATTERN.match(t) for t in tokens[1:]):
+        return False
+    return bool(SKU_PATTERN.match("".join(tokens)))
+
+
+def collapse_families(rows, scores, family_ids, top_k, variants_per_family=1):
+    """
+    Collapse ranked hits (best first) to ranked families.
+
+    A family ranks by its best variant; up to `variants_per_family` rows are
+    kept per family. Returns [(best_score, [rows])].
+    """
+    rows, scores = np.asarray(rows), np.asarray(scores)
+    keep = rows != -1
+    rows, scores = rows[keep], scores[keep]
+    families = family_ids[rows]
+
+    # First occurrence of each family == its best variant, since hits are sorted
+    _, first_pos = np.unique(families, return_index=True)
+    first_pos.sort()
+    first_pos = first_pos[:top_k]
+
+    if variants_per_family == 1:
+        return [(float(scores[pos]), [int(rows[pos])]) for pos in first_pos]
+    return [
+        (float(scores[pos]), rows[families == families[pos]][:variants_per_family].tolist())
+        for pos in first_pos
+    ]
+
+
+def search_families(search, family_ids, top_k, limit, variants_per_family=1):
+    """
+    Run `search(fetch_k) -> (rows, scores)` (best first), widening fetch_k until
+    the hits collapse to `top_k` families or all `limit` candidate rows were
+    fetched. Starts at top_k * COLLAPSE_OVERFETCH and grows 4x per pass.
+    """
+    fetch_k = min(top_k * COLLAPSE_OVERFETCH, limit)
+    while True:
+        rows, scores = search(fetch_k)
+        groups = collapse_families(rows, scores, family_ids, top_k, variants_per_family)
+        if len(groups) >= top_k or fetch_k >= limit:
+            return groups
+        fetch_k = min(fetch_k * 4, limit)
+
+
+class SkuIndex:
+    """
+    In-memory SKU lookup built on the ingestion normalization rules.
+
+    - exact:  hash map normalized SKU -> rows
+    - family: hash map parent SKU (get_parent_sku) -> rows
+    - prefix: sorted array of compact SKUs, resolved with bisect
+    - family_ids: int32 family id per row, for collapsing search results
+
+    All lookups are O(1) or O(log n) and never touch the embedding model.
+    """
+
+    def __init__(self, metadata):
+        self.metadata = metadata
+        self.exact = {}
+        self.family = {}
+        compact_keys = []
+
+        for row, meta in enumerate(metadata):
+            sku = meta.get("sku")
+            if not sku:
+                continue
+
+            key = normalize_query_sku(sku)
+            self.exact.setdefault(key, []).append(row)
+            self.exact.setdefault(compact_sku(key), []).append(row)
+            self.family.setdefault(get_parent_sku(key), []).append(row)
+            compact_keys.append((compact_sku(key), row))
+
+        # Rows without a SKU are singleton families numbered after the real ones
+        self.family_ids = np.arange(len(metadata), dtype="int32") + len(self.family)
+        for family_id, rows in enumerate(self.family.values()):
+            self.family_ids[rows] = family_id
+
+        compact_keys.sort()
+        self.prefix_keys = [k for k, _ in compact_keys]
+        self.prefix_rows = [row for _, row in compact_keys]
+
+    @classmethod
+    def from_file(cls, meta_file=META_FILE):
+        with open(meta_file, "r") as f:
+            return cls(json.load(f))
+
+    def row_of(self, sku: str):
+        """Row of an exact SKU (first one if duplicated), or None."""
+        rows = self.exact.get(normalize_query_sku(sku))
+        return rows[0] if rows else None
+
+    def prefix(self, text: str, limit: int = 50):
+        """Rows whose compact SKU starts with `text`, in SKU order."""
+        key = compact_sku(normalize_query_sku(text))
+        if not key:
+            return []
+
+        start = bisect_left(self.prefix_keys, key)
+        rows = []
+        for i in range(start, len(self.prefix_keys)):
+            if not self.prefix_keys[i].startswith(key) or len(rows) >= limit:
+                break
+            rows.append(self.prefix_rows[i])
+        return rows
+
+    def lookup(self, query: str, limit: int = 50):
+        """
+        Resolve a SKU-shaped query to [(row, match_type)] where match_type is
+        "exact", "family" or "prefix", best matches first.
+        """
+        key = normalize_query_sku(query)
+        hits = []
+        seen = set()
+
+        def add(rows, match_type):
+            for row in rows:
+                if row not in seen and len(hits) < limit:
+                    seen.add(row)
+                    hits.append((row, match_type))
+
+        add(self.exact.get(key, []) or self.exact.get(compact_sku(key), []), "exact")
+        # Siblings of the requested variant, or the variants of a requested parent
+        add(self.family.get(get_parent_sku(key), []), "family")
+        add(self.family.get(key, []), "family")
+        add(self.prefix(key, limit=limit), "prefix")
+
+        return hits
@@ -0,0 +1,330 @@
+"""
+Local Magento REST stand-in for offline ingestion tests and benchmarks.
+
+    python manage.py fake-magento --products 5000 --latency-ms 20 --error-429 0.02
+
+Serves the endpoints MagentoClient and magento_client_integration use:
+
+- POST /V1/integration/admin/token                admin token (any credentials)
+- GET  /V1/products                               searchCriteria paging, filterGroups
+                                                  (eq/neq/gt/gteq/lt/lteq/like/in/nin),
+                                                  sortOrders; total_count
+- GET  /V1/configurable-products/{sku}/children   child products
+- GET  /V1/bundle-products/{sku}/children         bundle options with product_links
+
+The catalog is synthetic and deterministic for a given seed: Accuride-like
+slide families as simple, configurable (with sized children, also listed by
+/V1/products as in Magento) and bundle products. `touch()` / `add()` change
+updated_at so delta syncs have something to fetch.
+
+Faults are injected per request: fixed latency plus jitter, and
+probabilities of 401 (token rejected), 429 (with Retry-After) and 503.
+Bearer tokens must come from the token endpoint; OAuth1 headers are
+accepted without signature checks.
+"""
+
+import asyncio
+import random
+import re
+import secrets
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+FAMILY_PREFIXES = ["DZ", "DS", "DB", "DA", "DH", "DP"]
+MATERIALS = ["Steel", "Stainless Steel", "Aluminium"]
+FEATURES = ["soft close", "full extension", "lock-in", "lock-out", "push to open", "disconnect", "heavy duty"]
+LENGTHS_MM = [250, 300, 350, 400, 450, 500, 550, 600, 700, 800]
+BASE_TIME = datetime(2024, 1, 1)
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+FILTER_KEY = re.compile(r"searchCriteria\[filterGroups\]\[(\d+)\]\[filters\]\[(\d+)\]\[(\w+)\]")
+SORT_KEY = re.compile(r"searchCriteria\[sortOrders\]\[(\d+)\]\[(\w+)\]")
+
+
+def _attr(code, value):
+    return {"attribute_code": code, "value": value}
+
+
+class FakeCatalog:
+    """Synthetic product catalog with Magento-shaped records."""
+
+    def __init__(self, products=1000, configurable_share=0.3, bundle_share=0.05, children_per_configurable=4,
+                 seed=0):
+        self.rng = random.Random(seed)
+        self.items = []          # every product, as /V1/products lists them
+        self.by_sku = {}
+        self.children = {}       # configurable sku -> child skus
+        self.bundles = {}        # bundle sku -> linked skus
+        self._bundleable = []    # visible simple skus a bundle can link to
+        self.version = 0
+        self._lock = threading.Lock()
+
+        while len(self.items) < products:
+            kind = self.rng.random()
+            if kind < configurable_share:
+                self._add_configurable(children_per_configurable, limit=products)
+            elif kind < configurable_share + bundle_share and len(self.items) > 2:
+                self._add_bundle()
+            else:
+                self._add_product("simple")
+
+    def __len__(self):
+        return len(self.items)
+
+    def _new_sku(self):
+        return f"{self.rng.choice(FAMILY_PREFIXES)}{3000 + len(self.items):04d}"
+
+    def _add_product(self, type_id, sku=None, visibility=4, length=None):
+        sku = sku or self._new_sku()
+        updated = BASE_TIME + timedelta(minutes=self.rng.randrange(0, 60 * 24 * 180))
+        material, feature = self.rng.choice(MATERIALS), self.rng.choice(FEATURES)
+        load = self.rng.choice([25, 45, 70, 100, 150, 227])
+        product = {
+            "id": len(self.items) + 1,
+            "sku": sku,
+            "name": f"{material} {feature} slide {sku}",
+            "attribute_set_id": 4,
+            "price": round(self.rng.uniform(8, 180), 2),
+            "status": 1,
+            "visibility": visibility,
+            "type_id": type_id,
+            "created_at": BASE_TIME.strftime(DATE_FORMAT),
+            "updated_at": updated.strftime(DATE_FORMAT),
+            "custom_attributes": [
+                _attr("description", f"<p>{material} drawer slide, {feature}, load rating {load} kg.</p>"),
+                _attr("short_description", f"{feature.title()} slide, {load} kg"),
+                _attr("product_features", f"{feature}; {material.lower()} construction"),
+                _attr("load_rating", f"{load} kg"),
+                _attr("material", material),
+                _attr("length", str(length) if length else None),
+                _attr("uom", "mm"),
+                _attr("country_of_manufacture", self.rng.choice(["US", "GB", "DE", "CN"])),
+                _attr("corrosion_resistant", "1" if material == "Stainless Steel" else "0"),
+                _attr("category_ids", [str(self.rng.randrange(3, 40))]),
+                _attr("meta_keyword", f"drawer slide, {feature}, {material.lower()}"),
+            ],
+        }
+        self.items.append(product)
+        self.by_sku[sku] = product
+        if type_id == "simple" and visibility == 4:
+            self._bundleable.append(sku)
+        return product
+
+    def _add_configurable(self, n_children, limit):
+        parent = self._add_product("configurable")
+        lengths = sorted(self.rng.sample(LENGTHS_MM, min(n_children, len(LENGTHS_MM))))
+        self.children[parent["sku"]] = []
+        for length in lengths:
+            if len(self.items) >= limit:
+                break
+            child = self._add_product("simple", sku=f"{parent['sku']}-{length:04d}", visibility=1, length=length)
+            self.children[parent["sku"]].append(child["sku"])
+
+    def _add_bundle(self):
+        bundle = self._add_product("bundle")
+        self.bundles[bundle["sku"]] = self.rng.sample(self._bundleable, min(2, len(self._bundleable)))
+
+    # -----------------------------
+    # Mutations (for delta syncs)
+    # -----------------------------
+    def touch(self, n, when=None):
+        """Bump updated_at on n random products; returns their SKUs."""
+        stamp = (when or datetime.utcnow()).strftime(DATE_FORMAT)
+        with self._lock:
+            touched = self.rng.sample(self.items, min(n, len(self.items)))
+            for product in touched:
+                product["updated_at"] = stamp
+                product["price"] = round(product["price"] * 1.01, 2)
+            self.version += 1
+        return [p["sku"] for p in touched]
+
+    def add(self, n):
+        with self._lock:
+            added = [self._add_product("simple") for _ in range(n)]
+            for product in added:
+                product["updated_at"] = datetime.utcnow().strftime(DATE_FORMAT)
+            self.version += 1
+        return [p["sku"] for p in added]
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def bundle_options(self, sku):
+        links = self.bundles.get(sku, [])
+        return [{
+            "option_id": i + 1,
+            "title": f"Option {i + 1}",
+            "required": True,
+            "type": "select",
+            "position": i + 1,
+            "sku": sku,
+            "product_links": [{"id": str(i + 1), "sku": link, "option_id": i + 1, "qty": 1, "position": 1,
+                               "is_default": True, "can_change_quantity": 0}],
+        } for i, link in enumerate(links)]
+
+
+def _compare_value(field, value):
+    if field in ("updated_at", "created_at"):
+        return datetime.fromisoformat(str(value).rstrip("Z").replace("T", " "))
+    if field in ("id", "price", "status", "visibility", "attribute_set_id"):
+        return float(value)
+    return str(value)
+
+
+def _matches(product, field, condition, value):
+    raw = product.get(field)
+    if raw is None:
+        raw = next((a["value"] for a in product["custom_attributes"] if a["attribute_code"] == field), None)
+    if raw is None:
+        return condition in ("neq", "nin")
+
+    if condition in ("in", "nin"):
+        found = str(raw) in {v.strip() for v in str(value).split(",")}
+        return found if condition == "in" else not found
+    if condition == "like":
+        pattern = "^" + re.escape(str(value)).replace("%", ".*") + "$"
+        return re.match(pattern, str(raw), re.IGNORECASE) is not None
+
+    left, right = _compare_value(field, raw), _compare_value(field, value)
+    return {
+        "eq": left == right, "neq": left != right,
+        "gt": left > right, "gteq": left >= right,
+        "lt": left < right, "lteq": left <= right,
+    }[condition]
+
+
+def parse_search_criteria(params):
+    """(filter groups, sort orders, page, page size) from flat searchCriteria[...] query params."""
+    groups, sorts = {}, {}
+    for key, value in params.items():
+        if m := FILTER_KEY.fullmatch(key):
+            group, index, part = int(m[1]), int(m[2]), m[3]
+            groups.setdefault(group, {}).setdefault(index, {})[part] = value
+        elif m := SORT_KEY.fullmatch(key):
+            sorts.setdefault(int(m[1]), {})[m[2]] = value
+
+    filter_groups = [
+        [(f["field"], f.get("condition_type", "eq"), f.get("value", "")) for _, f in sorted(filters.items())]
+        for _, filters in sorted(groups.items())
+    ]
+    sort_orders = [(s["field"], s.get("direction", "ASC").upper()) for _, s in sorted(sorts.items())]
+    page = int(params.get("searchCriteria[currentPage]", 1))
+    page_size = int(params.get("searchCriteria[pageSize]", 20))
+    return filter_groups, sort_orders, page, page_size
+
+
+def create_fake_magento(catalog=None, latency_ms=0.0, jitter_ms=0.0, error_401=0.0, error_429=0.0,
+                        error_5xx=0.0, retry_after=1, seed=0):
+    catalog = catalog if catalog is not None else FakeCatalog(seed=seed)
+    rng = random.Random(seed + 1)
+    tokens = set()
+    # (filters, sorts, catalog version) -> matching products; paging through one query filters once
+    result_cache = {}
+
+    app = FastAPI(title="Fake Magento")
+    app.state.catalog = catalog
+    app.state.stats = Counter()
+
+    @app.middleware("http")
+    async def faults(request: Request, call_next):
+        start = time.perf_counter()
+        if latency_ms or jitter_ms:
+            await asyncio.sleep((latency_ms + rng.uniform(0, jitter_ms)) / 1000)
+
+        roll = rng.random()
+        response = None
+        if roll < error_5xx:
+            response = JSONResponse({"message": "Service Unavailable"}, status_code=503)
+        elif roll < error_5xx + error_429:
+            response = JSONResponse({"message": "Too Many Requests"}, status_code=429,
+                                    headers={"Retry-After": str(retry_after)})
+        elif request.url.path.startswith("/V1/") and not request.url.path.endswith("/integration/admin/token"):
+            auth = request.headers.get("authorization", "")
+            valid = auth.startswith("OAuth ") or auth.removeprefix("Bearer ") in tokens
+            if not valid or roll < error_5xx + error_429 + error_401:
+                response = JSONResponse({"message": "The consumer isn't authorized to access %resources."},
+                                        status_code=401)
+
+        response = response or await call_next(request)
+        # /V1/<resource>/... -> resource; other paths (/, /docs, /openapi.json) as they are
+        parts = request.url.path.split("/")
+        label = parts[2] if len(parts) > 2 and parts[1] == "V1" else request.url.path
+        app.state.stats[f"{request.method} {label} {response.status_code}"] += 1
+        app.state.stats["seconds"] += time.perf_counter() - start
+        return response
+
+    @app.post("/V1/integration/admin/token")
+    async def admin_token():
+        token = secrets.token_hex(16)
+        tokens.add(token)
+        return token
+
+    @app.get("/V1/products")
+    async def products(request: Request):
+        filter_groups, sort_orders, page, page_size = parse_search_criteria(request.query_params)
+
+        key = (repr(filter_groups), repr(sort_orders), catalog.version)
+        matched = result_cache.get(key)
+        if matched is None:
+            # Groups are ANDed, filters inside a group ORed (Magento semantics)
+            matched = [
+                p for p in catalog.items
+                if all(any(_matches(p, *f) for f in group) for group in filter_groups)
+            ]
+            for field, direction in reversed(sort_orders):
+                matched.sort(key=lambda p: _compare_value(field, p.get(field) or 0), reverse=direction == "DESC")
+            result_cache.clear()
+            result_cache[key] = matched
+
+        start = (page - 1) * page_size
+        return {
+            "items": matched[start:start + page_size],
+            "search_criteria": {"current_page": page, "page_size": page_size},
+            "total_count": len(matched),
+        }
+
+    @app.get("/V1/configurable-products/{sku}/children")
+    async def configurable_children(sku: str):
+        return [catalog.by_sku[child] for child in catalog.children.get(sku, [])]
+
+    @app.get("/V1/bundle-products/{sku}/children")
+    async def bundle_children(sku: str):
+        return catalog.bundle_options(sku)
+
+    return app
+
+
+class FakeMagentoServer:
+    """Runs a fake Magento app on a background uvicorn thread: `with FakeMagentoServer(app) as url: ...`."""
+
+    def __init__(self, app, host="127.0.0.1", port=0):
+        import uvicorn
+
+        self.app = app
+        self.config = uvicorn.Config(app, host=host, port=port, log_level="warning", access_log=False)
+        self.server = uvicorn.Server(self.config)
+        self.thread = threading.Thread(target=self.server.run, name="fake-magento", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("❌ Fake Magento server did not start")
+            time.sleep(0.01)
+        return self.url
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+        return False
@@ -1,30 +1,62 @@
 import os
+import time
 import requests
+from functools import lru_cache
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# 429 / 5xx / connection errors are retried with exponential backoff (Retry-After wins when sent)
+MAX_RETRIES = int(os.getenv("MAGENTO_MAX_RETRIES", "4"))
+BACKOFF_SECONDS = float(os.getenv("MAGENTO_BACKOFF_SECONDS", "0.5"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
 class MagentoClient:
     """Magento client using Admin Token authentication."""
 
-    def __init__(self):
-        self.base_url = os.getenv("MAGENTO_BASE_URL")
-        self.username = os.getenv("MAGENTO_ADMIN_USERNAME")
-        self.password = os.getenv("MAGENTO_ADMIN_PASSWORD")
+    def __init__(self, base_url=None, username=None, password=None, max_retries=MAX_RETRIES,
+                 backoff_seconds=BACKOFF_SECONDS):
+        self.base_url = base_url or os.getenv("MAGENTO_BASE_URL")
+        self.username = username or os.getenv("MAGENTO_ADMIN_USERNAME")
+        self.password = password or os.getenv("MAGENTO_ADMIN_PASSWORD")
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
 
         if not all([self.base_url, self.username, self.password]):
             raise ValueError("❌ Missing Magento credentials in .env")
 
+        # One keep-alive connection pool for the token call and every page / children request
+        self.session = requests.Session()
         self.token = self.get_token()
         self.headers = {
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json"
         }
 
+    def _request(self, method, url, **kwargs):
+        """Send with retries on 429 / 5xx / connection errors; returns the last response."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                res = self.session.request(method, url, timeout=20, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                res = None
+
+            if res is not None and (res.status_code not in RETRY_STATUSES or attempt == self.max_retries):
+                return res
+
+            delay = self.backoff_seconds * 2 ** attempt
+            if res is not None and res.headers.get("Retry-After", "").isdigit():
+                delay = float(res.headers["Retry-After"])
+            print(f"⏳ Magento {res.status_code if res is not None else 'connection error'} — "
+                  f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
     def get_token(self):
         """Request admin API token."""
         url = f"{self.base_url}/V1/integration/admin/token"
-        res = requests.post(url, json={
+        res = self._request("POST", url, json={
             "username": self.username,
             "password": self.password
         })
@@ -36,15 +68,21 @@ class MagentoClient:
 
     def get(self, endpoint, params=None):
         url = f"{self.base_url}{endpoint}"
-        res = requests.get(url, headers=self.headers, params=params, timeout=20)
+        res = self._request("GET", url, headers=self.headers, params=params)
 
         if res.status_code == 401:
             print("🔄 Token expired — refreshing...")
             self.token = self.get_token()
             self.headers["Authorization"] = f"Bearer {self.token}"
-            res = requests.get(url, headers=self.headers, params=params, timeout=20)
+            res = self._request("GET", url, headers=self.headers, params=params)
 
         if res.status_code != 200:
             raise Exception(f"❌ Magento GET failed [{res.status_code}] → {res.text}")
 
         return res.json()
+
+
+@lru_cache(maxsize=1)
+def get_client() -> MagentoClient:
+    """Shared client, created (and authenticated) on first use rather than at import."""
+    return MagentoClient()
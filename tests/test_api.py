@@ -0,0 +1,76 @@
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+
+
+def test_health_and_metrics():
+    client = TestClient(app)
+    assert client.get("/health").json() == {"status": "ok"}
+    assert client.get("/metrics").status_code == 200
+
+
+def test_entry_points_do_not_import_heavy_modules():
+    code = (
+        "import sys, manage, src.main, src.rag.rag_chain, src.ingestion.sync_manager;"
+        "print(','.join(m for m in ('torch', 'sentence_transformers', 'langchain_core', 'langchain_community')"
+        " if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+
+def test_metrics_scrape_reports_retrieval_timings_and_query_cache():
+    from functools import lru_cache
+
+    import faiss
+    import numpy as np
+    from prometheus_client.parser import text_string_to_metric_families
+
+    from src.rag.retriever import ProductRetriever
+    from src.search.semantic_search import SemanticSearcher
+    from src.search.sku_index import SkuIndex
+
+    client = TestClient(app)
+
+    def scrape():
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        return {
+            (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+            for family in text_string_to_metric_families(response.text) for sample in family.samples
+        }
+
+    vectors = np.eye(4, dtype="float32")
+    index = faiss.IndexFlatIP(4)
+    index.add(vectors)
+    metadata = [{"sku": f"DZ{1000 + i}", "name": f"Slide {i}"} for i in range(4)]
+
+    searcher = SemanticSearcher.__new__(SemanticSearcher)
+    searcher.index, searcher.metadata, searcher.skus = index, metadata, SkuIndex(metadata)
+    searcher.model = type("Model", (), {"encode": lambda self, texts, **kw: vectors[:1]})()
+
+    retriever = ProductRetriever.__new__(ProductRetriever)
+    retriever.embeddings = type("Embeddings", (), {"embed_query": lambda self, text: vectors[1]})()
+    retriever._cached_embed_query = lru_cache(maxsize=16)(retriever._embed_query)
+    retriever.vectorstore = type("Store", (), {"index": index})()
+
+    before = scrape()
+    assert searcher.search("heavy duty slide", top_k=2)[0]["sku"] == "DZ1000"
+    for _ in range(2):  # second call is served from the query-embedding cache
+        assert retriever.vector_search("soft close slide", k=1)[0].tolist() == [1]
+    after = scrape()
+
+    def grew(name, by=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        return after[key] - before.get(key, 0.0) == by
+
+    assert grew("assistant_request_seconds_count", operation="semantic_search")
+    assert grew("assistant_encode_seconds_count", component="semantic_search")
+    assert grew("assistant_encode_seconds_count", component="retriever")
+    assert grew("assistant_search_seconds_count", index="product_faiss")
+    assert grew("assistant_search_seconds_count", index="langchain_faiss", by=2)
+    assert grew("assistant_cache_events_total", cache="query_embedding", result="miss")
+    assert grew("assistant_cache_events_total", cache="query_embedding", result="hit")
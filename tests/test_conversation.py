@@ -0,0 +1,148 @@
+from src.conversation import memory_manager
+from src.conversation.memory_manager import InMemorySessionStore, MemoryManager
+
+
+def test_turn_window_evicts_oldest_turns_into_the_summary():
+    calls = []
+
+    def summarizer(summary, turns, max_tokens):
+        calls.append((summary, [t["content"] for t in turns]))
+        return f"{summary}+{len(turns)}" if summary else f"summary of {len(turns)}"
+
+    memory = MemoryManager(store=InMemorySessionStore(), summarizer=summarizer, max_history_tokens=30)
+    for i in range(4):
+        memory.update("s", f"question {i} " + "x" * 20, f"answer {i} " + "y" * 20)
+
+    session = memory.load("s")
+    # Each turn pair is ~16 tokens: only the newest pair fits the 30-token window
+    assert [t["content"][:10] for t in session["turns"]] == ["question 3", "answer 3 y"]
+    assert calls[0][0] == "" and calls[0][1][0].startswith("question 0")
+    assert session["summary"] == "summary of 2+2+2"
+
+    messages = memory.history_messages(session)
+    assert messages[0] == ("system", "Conversation so far: summary of 2+2+2")
+    assert [role for role, _ in messages[1:]] == ["human", "ai"]
+
+
+def test_in_memory_sessions_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(memory_manager.time, "monotonic", lambda: now[0])
+    memory = MemoryManager(store=InMemorySessionStore(ttl=60))
+
+    memory.update("s", "slides", "DZ3832", skus=["DZ3832-0020"])
+    now[0] += 59
+    assert memory.load("s")["last_skus"] == ["DZ3832-0020"]
+    now[0] += 2
+    assert memory.load("s") == {"summary": "", "turns": [], "last_skus": []}
+
+
+def test_retrieval_query_resolves_follow_ups_only():
+    memory = MemoryManager(store=InMemorySessionStore())
+    memory.update("s", "heavy duty slides", "Try these", skus=["DZ9301-0020", "DZ9301-0024", None, "DZ3832-0020"])
+    session = memory.load("s")
+
+    assert session["last_skus"] == ["DZ9301-0020", "DZ9301-0024", "DZ3832-0020"]
+    assert memory.retrieval_query("what's its load rating?", session) == "what's its load rating? DZ9301-0020 DZ9301-0024"
+    assert memory.retrieval_query("stainless steel slides", session) == "stainless steel slides"
+    # No session: nothing to resolve against
+    assert memory.retrieval_query("what's its load rating?", memory.load(None)) == "what's its load rating?"
+
+
+# Deterministic stand-in for the sentence embedder: one dimension per keyword family
+KEYWORDS = [
+    ("slide", "drawer", "door", "runner", "rack", "chest", "cabinet", "push"),
+    ("rating", "travel", "thickness", "corrosion", "material", "temperature", "screws", "mounted"),
+    ("warranty", "order", "return", "shipping", "quote", "customer", "ship", "invoice"),
+    ("cook", "weather", "joke", "football", "poem", "capital", "movie", "weight"),
+]
+
+
+def fake_embed(text):
+    import re
+
+    words = re.findall(r"[a-z]+", text.lower())
+    return [sum(w.startswith(k) for w in words for k in family) for family in KEYWORDS] + [0.1]
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.queries = []
+
+    def embed_documents(self, texts):
+        return [fake_embed(t) for t in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return fake_embed(text)
+
+
+def test_intent_detector_short_circuits_sku_queries():
+    from src.conversation.intent_detector import IntentDetector
+
+    embedder = FakeEmbedder()
+    detector = IntentDetector(embedder.embed_documents, embedder.embed_query)
+    assert detector.detect("DZ3832-0020") == "sku_lookup"
+    assert detector.detect("dz3832 0020") == "sku_lookup"
+    assert embedder.queries == []
+
+
+def test_sku_followed_by_words_is_a_product_question():
+    from src.conversation.intent_detector import IntentDetector
+    from src.search.sku_index import looks_like_sku
+
+    assert looks_like_sku("DZ4501-0060EC") and looks_like_sku("DZ4501 0060EC") and looks_like_sku(" ds3031 ")
+    assert not looks_like_sku("DZ4501 slides") and not looks_like_sku("3832 stainless")
+    assert not looks_like_sku("DZ3832 load rating") and not looks_like_sku("")
+
+    embedder = FakeEmbedder()
+    detector = IntentDetector(embedder.embed_documents, embedder.embed_query)
+    assert detector.detect("DZ4501 slides") == "product_search"
+    assert embedder.queries == ["DZ4501 slides"]
+
+
+def test_intent_detector_picks_the_nearest_centroid():
+    from src.conversation.intent_detector import IntentDetector
+
+    embedder = FakeEmbedder()
+    detector = IntentDetector(embedder.embed_documents, embedder.embed_query)
+    assert detector.detect("soft close drawer runners for a cabinet") == "product_search"
+    assert detector.detect("what is the load rating and travel") == "spec_question"
+    assert detector.detect("warranty on my last order") == "support"
+    assert detector.detect("tell me a joke about football") == "off_topic"
+
+
+def test_intent_detector_close_calls_fall_back_to_product_search():
+    from src.conversation.intent_detector import IntentDetector
+
+    embedder = FakeEmbedder()
+    detector = IntentDetector(embedder.embed_documents, embedder.embed_query, min_margin=0.05)
+    # As close to "slide" as to "warranty" / "cook": support / off_topic must win by min_margin
+    for query in ("slide warranty", "cook a slide"):
+        scores = dict(zip(detector.labels, detector.scores(fake_embed(query))))
+        assert max(scores, key=scores.get) in ("support", "off_topic")
+        assert detector.detect(query) == "product_search"
+
+    assert detector.detect("slide warranty warranty") == "support"  # clear win
+    strict = IntentDetector(embedder.embed_documents, embedder.embed_query, min_margin=0.0)
+    assert strict.detect("slide warranty") == "support"
+
+
+def test_background_summaries_stay_off_the_request_path():
+    import threading
+
+    release = threading.Event()
+
+    def slow_summarizer(summary, turns, max_tokens):
+        release.wait(timeout=5)
+        return "llm summary"
+
+    memory = MemoryManager(store=InMemorySessionStore(), summarizer=slow_summarizer, max_history_tokens=30,
+                           background=True)
+    for i in range(2):
+        memory.update("s", f"question {i} " + "x" * 20, f"answer {i} " + "y" * 20)
+    # update() returned with the summarizer still blocked: the extractive placeholder is stored
+    assert memory.load("s")["summary"] == "question 0 " + "x" * 20
+
+    release.set()
+    memory._summaries.shutdown(wait=True)
+    assert memory.load("s")["summary"] == "llm summary"
@@ -0,0 +1,426 @@
+import faiss
+import numpy as np
+
+from src.search.build_faiss_index import build_faiss_index, index_description, recall_report
+
+
+def _vectors(n=2000, dim=64, seed=0):
+    rng = np.random.default_rng(seed)
+    # Decaying spectrum, like sentence embeddings
+    return ((rng.normal(size=(n, dim)) * np.exp(-np.arange(dim) / 10)) @ rng.normal(size=(dim, dim))).astype("float32")
+
+
+def test_compressed_index_reports_recall_against_float32():
+    vectors = _vectors()  # build_faiss_index normalizes in place; the report reuses those rows
+    flat = recall_report(build_faiss_index(vectors, storage="flat"), vectors)
+    assert flat["recall@1"] == flat["recall@10"] == 1.0 and flat["compression"] == 1.0
+
+    vectors = _vectors()
+    index = build_faiss_index(vectors, storage="sq8", pca_dim=32)
+    report = recall_report(index, vectors)
+    assert index.sa_code_size() == 32 and report["compression"] > 3
+    assert report["recall@10"] > 0.8
+
+    # Metadata filters (ID selectors) still apply to the compressed index
+    mask = np.zeros(len(vectors), dtype=bool)
+    mask[::4] = True
+    bitmap = np.packbits(mask, bitorder="little")
+    params = faiss.SearchParameters(sel=faiss.IDSelectorBitmap(len(vectors), faiss.swig_ptr(bitmap)))
+    _, ids = index.search(vectors[:5], 10, params=params)
+    assert (ids % 4 == 0).all()
+
+
+def test_pca_skipped_for_small_shards():
+    assert index_description(384, 100, "fp16", 128) == "SQfp16"
+    assert index_description(384, 5000, "sq8", 128) == "PCA128,L2norm,SQ8"
+
+
+def test_lazy_docstore_backs_langchain_faiss(tmp_path):
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    from src.embeddings.docstore import LazyDocstore, load_docstore_metadata, load_vectorstore, write_docstore
+
+    docs = [Document(page_content=f"Glissière {i} — ∅ {i} mm", metadata={"sku": f"DZ{i}", "row": i}) for i in range(50)]
+    vectors = _vectors(n=50, dim=16)
+    index = faiss.IndexFlatL2(16)
+    index.add(vectors)
+    faiss.write_index(index, str(tmp_path / "index.faiss"))
+    write_docstore(docs, tmp_path)
+
+    store = LazyDocstore(tmp_path)
+    assert len(store) == 50 and store.search("7") == docs[7]
+    assert store.search("50") == "ID 50 not found." and store.search("x") == "ID x not found."
+    assert load_docstore_metadata(tmp_path) == [doc.metadata for doc in docs]
+
+    vectorstore = load_vectorstore(DeterministicFakeEmbedding(size=16), tmp_path)
+    hits = vectorstore.similarity_search_with_score_by_vector(vectors[23].tolist(), k=3)
+    assert hits[0][0] == docs[23] and hits[0][1] == 0.0
+    assert not list(tmp_path.glob("*.pkl"))
+
+
+def test_pickled_bundle_is_migrated_once(tmp_path):
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    from src.embeddings.docstore import load_docstore_metadata, load_vectorstore
+
+    vectors = _vectors(n=20, dim=16)
+    texts = [f"Slide {i}" for i in range(20)]
+    metadatas = [{"sku": f"DZ{i}"} for i in range(20)]
+    FAISS.from_embeddings(list(zip(texts, vectors.tolist())), DeterministicFakeEmbedding(size=16),
+                          metadatas=metadatas).save_local(tmp_path)
+
+    vectorstore = load_vectorstore(DeterministicFakeEmbedding(size=16), tmp_path)
+    assert not (tmp_path / "index.pkl").exists() and (tmp_path / "docstore.jsonl").exists()
+    assert load_docstore_metadata(tmp_path) == metadatas
+
+    doc, distance = vectorstore.similarity_search_with_score_by_vector(vectors[11].tolist(), k=1)[0]
+    assert (doc.page_content, doc.metadata, distance) == ("Slide 11", {"sku": "DZ11"}, 0.0)
+    assert load_vectorstore(DeterministicFakeEmbedding(size=16), tmp_path).index.ntotal == 20
+
+
+def test_reranker_falls_back_without_queueing_behind_a_slow_batch():
+    import threading
+    import time
+
+    from langchain_core.documents import Document
+
+    from src.embeddings.ranker import CrossEncoderReranker
+
+    class SlowModel:
+        def __init__(self):
+            self.release = threading.Event()
+
+        def predict(self, pairs, **kwargs):
+            self.release.wait(5)
+            return [len(text) for _, text in pairs]
+
+    model = SlowModel()
+    reranker = CrossEncoderReranker(time_budget_ms=50, model=model)
+    docs = [Document(page_content="x" * n) for n in (1, 3, 2)]
+
+    assert reranker.rerank("q", docs, top_n=2) == docs[:2]  # over budget: vector order
+
+    start = time.perf_counter()
+    assert reranker.rerank("q", docs, top_n=2) == docs[:2]  # worker still busy: no wait at all
+    assert time.perf_counter() - start < 0.04
+
+    model.release.set()
+    reranker._executor.submit(lambda: None).result()  # slow batch done, worker free again
+    reranked = reranker.rerank("q", docs, top_n=2)
+    assert [doc.page_content for doc in reranked] == ["xxx", "xx"] and reranked[0].metadata["rerank_score"] == 3
+
+
+def test_benchmark_times_retriever_configs_with_a_cold_query_cache():
+    from functools import lru_cache
+
+    from src.search.benchmark import RetrieverConfig, run_config
+
+    encoded = []
+
+    class FakeRetriever:
+        bm25 = None
+        metadata = [{"sku": "DZ1"}]
+
+        def __init__(self):
+            self._cached_embed_query = lru_cache(maxsize=16)(self._embed_query)
+
+        def _embed_query(self, query):
+            encoded.append(query)
+            return query
+
+        def vector_search(self, query, k):
+            self._cached_embed_query(query)
+            return [0], [0.0]
+
+    config = RetrieverConfig.__new__(RetrieverConfig)
+    config.retriever, config.mode = FakeRetriever(), "dense"
+    config.search_batch = lambda queries, k: [config.search(q, k) for q in queries]
+    queries = [{"query": q, "relevant": ["DZ1"]} for q in ("a", "b", "c")]
+
+    run_config(config, queries, k=1, warmup=3)
+    # Warmup encodes a, b, c; the timed pass must encode them again rather than hit the cache
+    assert encoded[:6] == ["a", "b", "c", "a", "b", "c"]
+
+
+def test_embedding_cache_keeps_backends_apart(tmp_path, monkeypatch):
+    from src.embeddings.embedding_cache import encode_with_cache
+
+    class FakeEncoder:
+        def __init__(self, value, cache_variant=None):
+            self.value, self.calls = value, 0
+            if cache_variant:
+                self.cache_variant = cache_variant
+
+        def encode(self, texts, batch_size=64, show_progress_bar=False):
+            self.calls += 1
+            return np.full((len(texts), 2), self.value, dtype="float32")
+
+    monkeypatch.chdir(tmp_path)  # cache and checkpoints live under relative data/ paths
+    torch, int8 = FakeEncoder(1.0), FakeEncoder(2.0, "onnx-int8")
+
+    assert encode_with_cache(torch, ["slide"], "bundle", "model")[0][0] == 1.0
+    # Same model name and text, other backend: encoded again, never served the torch vector
+    assert encode_with_cache(int8, ["slide"], "bundle", "model")[0][0] == 2.0
+    assert encode_with_cache(torch, ["slide"], "bundle", "model")[0][0] == 1.0
+    assert (torch.calls, int8.calls) == (1, 1)
+    assert sorted(p.name for p in (tmp_path / "data/embeddings/cache").iterdir()) == ["model", "model@onnx-int8"]
+
+
+def test_collapsed_search_returns_k_families_past_a_large_family():
+    from src.search.metadata_filter import MetadataFilterIndex
+    from src.search.semantic_search import SemanticSearcher
+    from src.search.sku_index import SkuIndex
+
+    # 32 lengths of one slide all sit closest to the query, then one row per other family
+    metadata = [{"sku": f"DZ3832-{i:04d}", "name": "Slide"} for i in range(32)]
+    metadata += [{"sku": f"DZ{9000 + i}-0010", "name": "Other"} for i in range(10)]
+    rng = np.random.default_rng(0)
+    vectors = np.vstack([np.ones((32, 8)) + rng.normal(0, 0.01, (32, 8)), rng.normal(0, 1, (10, 8))]).astype("float32")
+    faiss.normalize_L2(vectors)
+
+    searcher = SemanticSearcher.__new__(SemanticSearcher)
+    searcher.index = faiss.IndexFlatIP(8)
+    searcher.index.add(vectors)
+    searcher.metadata, searcher.skus = metadata, SkuIndex(metadata)
+    searcher.filters = MetadataFilterIndex(metadata)
+    searcher.encode_query = lambda text: vectors[:1].copy()
+
+    results = searcher.search("slides", top_k=5, collapse=True, variants_per_family=3)
+    assert len(results) == 5 and len({r["sku"].split("-")[0] for r in results}) == 5
+    assert results[0]["variants"][0].startswith("DZ3832") and len(results[0]["variants"]) == 3
+    # Fewer families than k in the whole index: every family, once
+    assert len(searcher.search("slides", top_k=20, collapse=True)) == 11
+
+
+def test_passage_shard_must_match_the_product_rows_it_was_built_on():
+    import pytest
+
+    from src.search.passage_search import check_product_alignment
+    from src.search.sku_index import SkuIndex
+
+    metadata = [{"sku": "DZ3832-0020"}, {"sku": "DZ3832-0024"}, {"sku": "DZ9301-0014"}]
+    passages = [
+        {"sku": "DZ3832-0024", "product_sku": "DZ3832"},  # variant row: its own product
+        {"sku": "DZ9301", "product_sku": "DZ9301"},  # datasheet section: first row of the family
+    ]
+    passage_to_product = np.asarray([1, 2], dtype="int32")
+    check_product_alignment(passages, passage_to_product, metadata)
+
+    # product_metadata.json rebuilt in another order after the shard
+    with pytest.raises(ValueError):
+        check_product_alignment(passages, passage_to_product, metadata[::-1])
+    with pytest.raises(ValueError):
+        check_product_alignment(passages, np.asarray([1, 5], dtype="int32"), metadata)
+
+    # The retriever resolves hits by SKU against its own docstore rows
+    assert SkuIndex(metadata[::-1]).row_of("dz3832-0024") == 1
+    assert SkuIndex(metadata).row_of("DZ0000") is None
+
+
+def test_onnx_encoder_applies_the_exported_pooling():
+    from types import SimpleNamespace
+
+    from src.embeddings.encoders import OnnxSentenceEncoder
+
+    # Two sentences, three token positions; the second sentence has one padding token
+    tokens = np.asarray([[[1.0, 0.0], [3.0, 2.0], [5.0, 4.0]],
+                         [[2.0, 2.0], [4.0, 0.0], [9.0, 9.0]]], dtype="float32")
+    encodings = [SimpleNamespace(ids=[1, 2, 3], attention_mask=[1, 1, 1], type_ids=[0, 0, 0]),
+                 SimpleNamespace(ids=[1, 2, 0], attention_mask=[1, 1, 0], type_ids=[0, 0, 0])]
+
+    encoder = OnnxSentenceEncoder.__new__(OnnxSentenceEncoder)
+    encoder.tokenizer = SimpleNamespace(encode_batch=lambda batch: encodings)
+    encoder.session = SimpleNamespace(run=lambda outputs, feeds: [tokens])
+    encoder.input_names = {"input_ids", "attention_mask"}
+
+    expected = {"mean": [[3, 2], [3, 1]], "cls": [[1, 0], [2, 2]], "max": [[5, 4], [4, 2]]}
+    for pooling, vectors in expected.items():
+        encoder.config = {"pooling": pooling}
+        assert encoder._encode_batch(["a", "b"]).tolist() == vectors
+
+
+
+def test_onnx_int8_encoder_matches_torch(tmp_path):
+    import pytest
+
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    pytest.importorskip("sentence_transformers")
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    from src.embeddings.encoders import PARITY_SENTENCES, OnnxSentenceEncoder, export_onnx_int8, parity_cosines
+
+    # A tiny random BERT stands in for a hub model, so the test runs offline
+    hf_dir = tmp_path / "hf"
+    hf_dir.mkdir()
+    words = sorted({w.lower() for s in PARITY_SENTENCES for w in s.replace("-", " ").split()})
+    (hf_dir / "vocab.txt").write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *words]))
+    BertTokenizerFast(str(hf_dir / "vocab.txt")).save_pretrained(hf_dir)
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=5 + len(words), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                        intermediate_size=64)
+    BertModel(config).save_pretrained(hf_dir)
+
+    for pooling in ("mean", "cls"):
+        st_dir, onnx_dir = tmp_path / f"st_{pooling}", tmp_path / f"onnx_{pooling}"
+        modules = [models.Transformer(str(hf_dir)), models.Pooling(32, pooling_mode=pooling)]
+        SentenceTransformer(modules=modules, device="cpu").save(str(st_dir))
+
+        export_onnx_int8(str(st_dir), out_dir=onnx_dir)
+        reference = SentenceTransformer(str(st_dir), device="cpu")
+        candidate = OnnxSentenceEncoder(str(st_dir), model_dir=onnx_dir)
+        assert candidate.config["pooling"] == pooling
+        assert parity_cosines(reference, candidate).min() >= 0.99
+
+
+def test_metadata_filter_matches_a_brute_force_mask():
+    import json
+
+    from src.search.metadata_filter import MetadataFilterIndex
+
+    with open("data/embeddings/product_metadata.json") as f:
+        metadata = json.load(f)
+    vectors = np.load("data/embeddings/product_embeddings.npy").astype("float32")
+    filters = MetadataFilterIndex(metadata)
+
+    def brute_force(category_id, min_capacity):
+        capacity = [m.get("capacity") or {} for m in metadata]
+        return np.array([
+            m.get("category_id") == category_id
+            and c.get("max", c.get("value")) is not None and c.get("max", c.get("value")) >= min_capacity
+            for m, c in zip(metadata, capacity)
+        ])
+
+    expected = brute_force(61, 200)
+    assert expected.sum() == 4  # the real catalog: four category-61 products rated for 200 kg or more
+    assert (filters.mask(category_id=61, min_capacity=200) == expected).all()
+    assert (filters.mask(category_id=61.0, min_capacity=50) == brute_force(61, 50)).all()
+
+    queries = vectors[[0, 100, 1000]].copy()
+    faiss.normalize_L2(queries)
+    for storage in ("flat", "sq8"):
+        index = build_faiss_index(vectors.copy(), storage=storage)
+        params, matching = filters.selector(category_id=61, min_capacity=50)
+        _, found = index.search(queries, matching, params=params)
+        for row in found:
+            assert sorted(row.tolist()) == np.flatnonzero(brute_force(61, 50)).tolist()
+
+        # Fewer hits than matching rows: exact top-k of the matching rows on the flat index
+        _, found = index.search(queries, 3, params=params)
+        allowed = np.flatnonzero(brute_force(61, 50))
+        if storage == "flat":
+            scores = queries @ (vectors[allowed] / np.linalg.norm(vectors[allowed], axis=1, keepdims=True)).T
+            assert found.tolist() == allowed[np.argsort(-scores, axis=1)[:, :3]].tolist()
+        assert np.isin(found, allowed).all()
+
+
+def test_bm25_ranks_the_exact_term_first_and_round_trips(tmp_path):
+    from src.search.lexical_index import BM25Index, tokenize
+
+    texts = [
+        "Heavy duty slide, zinc finish, 200 kg load rating",
+        "Stainless steel slide DZ4501-0060EC for food service",
+        "Aluminium slide, 75 % extension",
+        "Lock-in lock-out slide with soft close",
+    ]
+    assert tokenize("DZ4501-0060EC 75 %") == ["dz4501-0060ec", "dz", "4501", "0060", "ec", "75%"]
+
+    bm25 = BM25Index.build(texts)
+    rows, scores = bm25.search("stainless DZ4501", top_k=10)
+    assert rows.tolist() == [1] and scores[0] > 0
+    assert bm25.search("soft close slide", top_k=2)[0].tolist()[0] == 3
+    assert sorted(bm25.search("slide", top_k=10)[0].tolist()) == [0, 1, 2, 3]
+    assert len(bm25.search("slide", top_k=2)[0]) == 2
+    assert bm25.search("freezer")[0].tolist() == []
+
+    bm25.save(tmp_path / "bm25.npz", tmp_path / "vocab.json")
+    loaded = BM25Index.load(tmp_path / "bm25.npz", tmp_path / "vocab.json")
+    assert loaded.size == 4 and loaded.vocabulary == bm25.vocabulary
+    for query in ("75% extension", "zinc 200 kg", "dz"):
+        assert np.allclose(loaded.scores(query), bm25.scores(query))
+
+
+def test_reciprocal_rank_fusion_order_and_ties():
+    from src.search.lexical_index import reciprocal_rank_fusion
+
+    fused = reciprocal_rank_fusion([3, 1, 2], np.asarray([1, 4]), k=60)
+    assert [row for row, _ in fused] == [1, 3, 4, 2]  # in both lists beats first in one
+    assert fused[0][1] == 1 / 62 + 1 / 61
+
+    # Equal fused scores keep the order in which rows were first seen
+    tied = reciprocal_rank_fusion([7, 8], [8, 7], k=1)
+    assert [row for row, _ in tied] == [7, 8] and tied[0][1] == tied[1][1]
+    assert reciprocal_rank_fusion([], []) == []
+
+
+def test_encode_in_chunks_resumes_from_checkpoints_in_input_order(tmp_path, monkeypatch):
+    import pytest
+
+    from src.embeddings import batch_encode
+
+    class StubEncoder:
+        """Encodes a text as [len(text)]; crashes after `fail_after` chunks."""
+
+        def __init__(self, fail_after=None):
+            self.fail_after, self.chunks = fail_after, []
+
+        def encode(self, texts, batch_size=64, show_progress_bar=False):
+            if self.fail_after is not None and len(self.chunks) == self.fail_after:
+                raise RuntimeError("encoder died")
+            self.chunks.append(list(texts))
+            return np.asarray([[len(t)] for t in texts], dtype="float32")
+
+    monkeypatch.setattr(batch_encode, "CHECKPOINT_ROOT", tmp_path)
+    texts = ["ccc", "a", "eeeee", "bb", "dddd", "ffffff"]
+
+    crashing = StubEncoder(fail_after=1)
+    with pytest.raises(RuntimeError):
+        batch_encode.encode_in_chunks(crashing, texts, "build", model_name="m", chunk_size=2)
+    assert crashing.chunks == [["a", "bb"]]  # length-sorted: the shortest texts go first
+
+    resumed = StubEncoder()
+    vectors = batch_encode.encode_in_chunks(resumed, texts, "build", model_name="m", chunk_size=2)
+    assert resumed.chunks == [["ccc", "dddd"], ["eeeee", "ffffff"]]  # the saved chunk is not encoded again
+    assert vectors[:, 0].tolist() == [len(t) for t in texts]  # caller's order, not length order
+
+    # Another model changes the manifest fingerprint: stale chunks are discarded
+    other = StubEncoder()
+    batch_encode.encode_in_chunks(other, texts, "build", model_name="other", chunk_size=2)
+    assert len(other.chunks) == 3
+    again = StubEncoder()
+    batch_encode.encode_in_chunks(again, texts[:-1], "build", model_name="other", chunk_size=2)
+    assert len(again.chunks) == 3
+
+
+def test_build_product_text_golden():
+    from src.embeddings.documents import build_product_text
+
+    product = {
+        "sku": "DZ3832-0020", "name": "Slide 20in", "short_description": "Full extension ball bearing slide",
+        "description": "", "material": "Steel", "type": "simple", "corrosion_resistant": True, "finish": "Zinc",
+        "pdf_specs": {"load_rating": "45 kg", "slide_extension": "100%", "finish": "Clear zinc", "ignored": "x"},
+        "inherited_specs": {"load_rating": "99 kg"},  # PDF specs win
+        "capacity": {"value": 45, "unit": "kg"}, "dimensions": None, "category_id": 61,
+    }
+    # Changing this text means changing every index: bump DOC_VERSION along with it
+    assert build_product_text(product) == (
+        "Slide 20in. Full extension ball bearing slide. Steel. simple. Corrosion resistant. Zinc. "
+        "Load Rating: 45 kg Slide Extension: 100% Finish: Clear zinc. Capacity: {'value': 45, 'unit': 'kg'}"
+    )
+
+
+def test_bundles_from_another_doc_version_are_not_current(tmp_path, monkeypatch):
+    from src.embeddings import documents
+
+    info_file = tmp_path / "index_info.json"
+    assert not documents.is_current("langchain_faiss", info_file)  # never built
+
+    documents.write_index_info("langchain_faiss", "model", 10, info_file)
+    assert documents.is_current("langchain_faiss", info_file)
+
+    monkeypatch.setattr(documents, "DOC_VERSION", documents.DOC_VERSION + 1)
+    assert not documents.is_current("langchain_faiss", info_file)
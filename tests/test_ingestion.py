@@ -0,0 +1,158 @@
+from fastapi.testclient import TestClient
+
+from src.utils.fake_magento import FakeCatalog, FakeMagentoServer, create_fake_magento
+from src.utils.magento_client import MagentoClient
+
+
+def fake_client(catalog, **faults):
+    client = TestClient(create_fake_magento(catalog, **faults))
+    token = client.post("/V1/integration/admin/token", json={"username": "u", "password": "p"}).json()
+    client.headers["Authorization"] = f"Bearer {token}"
+    return client
+
+
+def test_products_paging_and_updated_at_filter():
+    catalog = FakeCatalog(250, seed=1)
+    client = fake_client(catalog)
+
+    pages = [client.get("/V1/products", params={"searchCriteria[currentPage]": page,
+                                                "searchCriteria[pageSize]": 100}).json() for page in (1, 2, 3)]
+    assert [len(p["items"]) for p in pages] == [100, 100, 50]
+    assert pages[0]["total_count"] == 250
+
+    touched = set(catalog.touch(7))
+    delta = client.get("/V1/products", params={
+        "searchCriteria[pageSize]": 100,
+        "searchCriteria[filterGroups][0][filters][0][field]": "updated_at",
+        "searchCriteria[filterGroups][0][filters][0][condition_type]": "gt",
+        "searchCriteria[filterGroups][0][filters][0][value]": "2025-01-01T00:00:00Z",
+    }).json()
+    assert {item["sku"] for item in delta["items"]} == touched
+
+
+def test_children_endpoints_and_auth():
+    catalog = FakeCatalog(200, seed=2)
+    client = fake_client(catalog)
+    parent = next(iter(catalog.children))
+    children = client.get(f"/V1/configurable-products/{parent}/children").json()
+    assert [c["sku"] for c in children] == catalog.children[parent]
+
+    assert TestClient(create_fake_magento(catalog)).get("/V1/products").status_code == 401
+
+
+def test_client_retries_injected_errors():
+    app = create_fake_magento(FakeCatalog(50), error_429=0.3, error_5xx=0.2, retry_after=0, seed=3)
+    with FakeMagentoServer(app) as url:
+        client = MagentoClient(url, "u", "p", max_retries=8, backoff_seconds=0)
+        for _ in range(10):
+            assert client.get("/V1/products", params={"searchCriteria[pageSize]": 5})["total_count"] == 50
+    assert any(" 429" in key or " 503" in key for key in app.state.stats)
+
+
+def test_downloader_fetches_only_changed_pdfs(tmp_path):
+    from fastapi import FastAPI, Request, Response
+
+    from scripts.pdf.downloader import PdfDownloader
+
+    files = {f"DZ{i}_en.pdf": f"%PDF datasheet {i}".encode() for i in range(3)}
+    served = []
+    app = FastAPI()
+
+    @app.get("/{name}")
+    def pdf(name: str, request: Request):
+        etag = f'"{hash(files[name])}"'
+        if request.headers.get("if-none-match") == etag:
+            served.append((name, 304))
+            return Response(status_code=304)
+        served.append((name, 200))
+        return Response(files[name], media_type="application/pdf", headers={"ETag": etag})
+
+    with FakeMagentoServer(app) as url:
+        jobs = [(f"{url}/{name}", name, ["SKU"]) for name in files]
+        assert PdfDownloader(tmp_path, workers=3).run(jobs)["new"] == 3
+
+        files["DZ1_en.pdf"] = b"%PDF datasheet 1 rev B"
+        served.clear()
+        counts = PdfDownloader(tmp_path, workers=3).run(jobs)
+
+    assert counts["updated"] == 1 and counts["unchanged"] == 2
+    assert sorted(status for _, status in served) == [200, 304, 304]
+    assert (tmp_path / "DZ1_en.pdf").read_bytes() == b"%PDF datasheet 1 rev B"
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_parquet_snapshot_round_trips_nested_columns(tmp_path):
+    import json
+
+    import pandas as pd
+
+    from src.embeddings.documents import DOC_COLUMNS, build_product_text
+    from src.ingestion.save_processor import embed_keys_and_timestamps, save_to_formats, validate_exports
+    from src.ingestion.snapshot import load_catalog_df, load_catalog_records
+
+    df = pd.DataFrame([
+        {"sku": "DZ3832-0020", "name": "Slide 20in", "capacity": {"value": 100, "unit": "lbs"},
+         "dimensions": {"length": 20.0}, "pdf_specs": {"model": [{"load": "100 lbs"}], "features_summary": "a\n\nb"},
+         "inherited_specs": {}, "load_rating": "100", "category_id": [3, 7]},
+        {"sku": "DZ9301-0014", "name": "Lock-out", "capacity": {"unit": "kg"}, "dimensions": None,
+         "pdf_specs": {}, "inherited_specs": {"finish": None}, "load_rating": 45, "category_id": []},
+        {"sku": "DZ0115-0010", "name": None, "capacity": None, "dimensions": {"length": 10.0, "width": 0.5},
+         "pdf_specs": None, "inherited_specs": {}, "load_rating": None, "category_id": None},
+    ])
+    save_to_formats(embed_keys_and_timestamps(df), tmp_path)
+    parquet = tmp_path / "magento_products_cleaned.parquet"
+    assert validate_exports(tmp_path / "magento_products_cleaned.json", tmp_path / "magento_products_cleaned.csv",
+                            len(df), parquet)
+
+    with open(tmp_path / "magento_products_cleaned.json") as f:
+        from_json = json.load(f)
+    from_parquet = load_catalog_records(DOC_COLUMNS, path=parquet)
+
+    assert set(from_parquet[0]) == set(DOC_COLUMNS) & set(from_json[0])
+    for j, p in zip(from_json, from_parquet):
+        assert p == {k: j[k] for k in p}
+        assert build_product_text(p) == build_product_text(j)
+
+    full = load_catalog_df(path=parquet)
+    assert list(full.columns) == list(from_json[0]) and full.loc[1, "inherited_specs"] == {"finish": None}
+
+
+def test_pdf_specs_are_re_extracted_after_an_extractor_version_bump(tmp_path, monkeypatch):
+    import json
+
+    from src.ingestion.PDF import pdf_reader
+
+    pdf_folder, raw = tmp_path / "pdfs", tmp_path / "raw"
+    pdf_folder.mkdir()
+    (pdf_folder / "DZ3832_datasheet.pdf").write_bytes(b"%PDF-1.4 fake")
+    outputs = [str(tmp_path / f"specs_{lang}.json") for lang in ("en", "fr", "de")]
+
+    extracted = []
+
+    def fake_extract(folder, pdf_file):
+        extracted.append(pdf_file)
+        return {lang: {"product_id": "DZ3832", "version": pdf_reader.EXTRACTOR_VERSION} for lang in ("en", "fr", "de")}
+
+    monkeypatch.setattr(pdf_reader, "extract_pdf_specs", fake_extract)
+    run = lambda: pdf_reader.process_all_pdfs(str(pdf_folder), str(raw), *outputs)
+
+    run()
+    run()
+    assert extracted == ["DZ3832_datasheet.pdf"]  # unchanged PDF and extractor: cached
+
+    monkeypatch.setattr(pdf_reader, "EXTRACTOR_VERSION", pdf_reader.EXTRACTOR_VERSION + 1)
+    run()
+    assert len(extracted) == 2
+    with open(outputs[0]) as f:
+        assert json.load(f)[0]["version"] == pdf_reader.EXTRACTOR_VERSION
+
+
+def test_non_api_paths_are_served_and_counted():
+    app = create_fake_magento(FakeCatalog(5))
+    client = TestClient(app)
+
+    assert client.get("/").status_code == 404
+    assert client.get("/docs").status_code == 200
+    assert client.get("/openapi.json").status_code == 200
+    assert client.get("/V1/products").status_code == 401  # the REST API still needs a token
+    assert {"GET / 404", "GET /docs 200", "GET /openapi.json 200", "GET products 401"} <= set(app.state.stats)
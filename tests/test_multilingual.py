@@ -0,0 +1,17 @@
+from src.conversation.translator import detect_language, translate
+
+
+def test_detects_datasheet_languages():
+    assert detect_language("What is the load rating of the 3832 slide?") == "en"
+    assert detect_language("Quelle est la charge maximale de cette glissière ?") == "fr"
+    assert detect_language("Welche Länge hat die Schiene mit Vollauszug?") == "de"
+
+
+def test_sku_only_query_falls_back_to_default():
+    assert detect_language("DA3832-0200") == "en"
+    assert detect_language("") == "en"
+
+
+def test_translate_is_noop_without_api_key(monkeypatch):
+    monkeypatch.delenv("DEEPL_API_KEY", raising=False)
+    assert translate("glissière", target="en", source="fr") == "glissière"
@@ -0,0 +1,92 @@
+import threading
+
+from src.core.pipeline import Pipeline, Stage
+
+
+def make_pipeline(tmp_path, calls, barrier=None):
+    src_a, src_b = tmp_path / "a.txt", tmp_path / "b.txt"
+    out_a, out_b, merged = tmp_path / "a.out", tmp_path / "b.out", tmp_path / "merged.out"
+
+    def copy(src, dst, name):
+        def run():
+            if barrier:
+                barrier.wait(timeout=5)
+            calls.append(name)
+            dst.write_text(src.read_text().upper())
+        return run
+
+    def merge():
+        calls.append("merge")
+        merged.write_text(out_a.read_text() + out_b.read_text())
+
+    stages = [
+        Stage("a", copy(src_a, out_a, "a"), inputs=[src_a], outputs=[out_a]),
+        Stage("b", copy(src_b, out_b, "b"), inputs=[src_b], outputs=[out_b]),
+        Stage("merge", merge, inputs=[out_a, out_b], outputs=[merged]),
+    ]
+    return Pipeline(stages, state_file=tmp_path / "state.json", run_log_file=tmp_path / "runs.jsonl")
+
+
+def test_unchanged_inputs_skip_every_stage(tmp_path):
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("b")
+    calls = []
+
+    first = make_pipeline(tmp_path, calls).run()
+    assert sorted(calls) == ["a", "b", "merge"]
+    assert {r["status"] for r in first["stages"].values()} == {"ran"}
+
+    calls.clear()
+    second = make_pipeline(tmp_path, calls).run()
+    assert calls == []
+    assert {r["status"] for r in second["stages"].values()} == {"skipped"}
+    assert len((tmp_path / "runs.jsonl").read_text().splitlines()) == 2
+
+
+def test_changed_input_reruns_only_downstream(tmp_path):
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("b")
+    calls = []
+    make_pipeline(tmp_path, calls).run()
+
+    calls.clear()
+    (tmp_path / "b.txt").write_text("b2")
+    make_pipeline(tmp_path, calls).run()
+    assert calls == ["b", "merge"]
+    assert (tmp_path / "merged.out").read_text() == "AB2"
+
+
+def test_independent_stages_run_in_parallel(tmp_path):
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("b")
+    # Both source stages must be inside run() at the same time to pass the barrier
+    record = make_pipeline(tmp_path, [], barrier=threading.Barrier(2)).run(max_workers=2)
+    assert record["stages"]["merge"]["status"] == "ran"
+
+
+def test_failure_blocks_downstream(tmp_path):
+    (tmp_path / "b.txt").write_text("b")
+    record = make_pipeline(tmp_path, []).run()
+    assert record["stages"]["a"]["status"] == "failed"
+    assert record["stages"]["merge"]["status"] == "blocked"
+    assert record["stages"]["b"]["status"] == "ran"
+
+
+def test_finished_stages_survive_a_crash_mid_run(tmp_path):
+    import json
+
+    import pytest
+
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.txt").write_text("b")
+    crashing = make_pipeline(tmp_path, [])
+    crashing.stages["merge"].run = lambda: (_ for _ in ()).throw(KeyboardInterrupt)  # kills the run, not just the stage
+    with pytest.raises(KeyboardInterrupt):
+        crashing.run()
+    assert not (tmp_path / "runs.jsonl").exists()
+
+    calls = []
+    record = make_pipeline(tmp_path, calls).run()
+    assert calls == ["merge"]
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert record["started_at"] < state["stages"]["merge"]["finished_at"]
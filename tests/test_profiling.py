@@ -0,0 +1,53 @@
+import json
+
+from src.core import profiling
+from src.core.profiling import enable_profiling, profiled
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+def test_profiled_is_noop_when_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    assert profiled("busy")(busy)(1000) == busy(1000)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profiled_writes_artifacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    enable_profiling()
+    try:
+        profiled("busy")(busy)(200_000)
+    finally:
+        enable_profiling(False)
+
+    suffixes = sorted(p.suffix for p in tmp_path.iterdir())
+    assert suffixes == [".collapsed", ".json", ".pstats"]
+
+    summary = json.loads(next(tmp_path.glob("*.json")).read_text())
+    assert summary["memory"]["peak_mb"] >= 0
+    collapsed = next(tmp_path.glob("*.collapsed")).read_text()
+    assert "busy (test_profiling.py" in collapsed
+
+
+def test_request_profiling_one_at_a_time(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import src.main
+
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    monkeypatch.setattr(src.main, "PROFILE_HEADER", True)
+    client = TestClient(src.main.app)
+
+    artifact = client.get("/", headers={"X-Profile": "1"}).headers["X-Profile-Artifact"]
+    assert "/" not in artifact and (tmp_path / f"{artifact}.pstats").exists()
+
+    # Another request holds the slot: served, but not profiled
+    slot = profiling.request_profile_slot()
+    try:
+        response = client.get("/", headers={"X-Profile": "1"})
+    finally:
+        slot.release()
+    assert response.status_code == 200 and "X-Profile-Artifact" not in response.headers
+    assert len(list(tmp_path.glob("*.pstats"))) == 1